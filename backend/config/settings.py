@@ -19,6 +19,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # Third party
     'rest_framework',
     'corsheaders',
@@ -76,10 +77,20 @@ DATABASES = {
 # Redis / Channel Layers
 REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379')
 
+# CHANNEL_LAYER picks a backend by name (or a dotted path); compare them with
+# `python manage.py bench_channel_layer`.
+CHANNEL_LAYER_BACKENDS = {
+    'local': 'game.channel_layers.LocalFanoutChannelLayer',
+    'redis': 'channels_redis.core.RedisChannelLayer',
+    'pubsub': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+    'memory': 'channels.layers.InMemoryChannelLayer',
+}
+CHANNEL_LAYER = os.environ.get('CHANNEL_LAYER', 'local')
+
 CHANNEL_LAYERS = {
     'default': {
-        'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        'CONFIG': {
+        'BACKEND': CHANNEL_LAYER_BACKENDS.get(CHANNEL_LAYER, CHANNEL_LAYER),
+        'CONFIG': {} if CHANNEL_LAYER == 'memory' else {
             'hosts': [REDIS_URL],
         },
     },
@@ -109,6 +120,9 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STORAGES = {
+    'default': {
+        'BACKEND': 'game.storage.ContentAddressedStorage',
+    },
     'staticfiles': {
         'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
     },
@@ -122,7 +136,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework
 REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'game.auth.PlayerTokenAuthentication',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
@@ -155,6 +171,65 @@ BASE_URL = os.environ.get('BASE_URL', 'http://localhost:5173')
 
 # JWT secret for round tokens
 ROUND_TOKEN_SECRET = os.environ.get('ROUND_TOKEN_SECRET', SECRET_KEY)
+ROUND_TOKEN_TTL = int(os.environ.get('ROUND_TOKEN_TTL', '3600'))
+
+# Presence: sockets count as online until PRESENCE_TIMEOUT seconds without a heartbeat;
+# updates are written to Redis in batches every PRESENCE_FLUSH_INTERVAL seconds.
+PRESENCE_TIMEOUT = int(os.environ.get('PRESENCE_TIMEOUT', '60'))
+PRESENCE_FLUSH_INTERVAL = float(os.environ.get('PRESENCE_FLUSH_INTERVAL', '1'))
+
+# WebSocket rate limits: (messages per second, burst) per connection and per game,
+# by message type, checked before any handler runs.
+WS_RATE_LIMITS_ENABLED = os.environ.get('WS_RATE_LIMITS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+WS_RATE_LIMITS = {
+    'default': {'connection': (5, 10), 'game': (20, 40)},
+    'ping': {'connection': (1, 3), 'game': (50, 100)},
+    'join_game': {'connection': (0.2, 3), 'game': (2, 20)},
+    'add_player': {'connection': (1, 5), 'game': (2, 10)},
+    'assign_player': {'connection': (2, 5), 'game': (4, 10)},
+    'update_team': {'connection': (1, 5), 'game': (2, 10)},
+    'update_settings': {'connection': (1, 3), 'game': (1, 5)},
+}
+WS_RATE_LIMIT_DISCONNECT_AFTER = int(os.environ.get('WS_RATE_LIMIT_DISCONNECT_AFTER', '50'))
+
+# Graceful drain: `manage.py drain` creates DRAIN_FILE; sockets are told to reconnect
+# after a random delay of up to DRAIN_RECONNECT_JITTER seconds.
+DRAIN_FILE = os.environ.get('DRAIN_FILE', '/tmp/game001-draining')
+DRAIN_RECONNECT_JITTER = float(os.environ.get('DRAIN_RECONNECT_JITTER', '10'))
+
+# Signed player identity tokens, issued at create/join and checked on WebSocket connect and API calls
+PLAYER_TOKEN_SECRET = os.environ.get('PLAYER_TOKEN_SECRET', SECRET_KEY)
+PLAYER_TOKEN_TTL = int(os.environ.get('PLAYER_TOKEN_TTL', '43200'))
+
+# Prompt selection: 'random' (per game) or 'lru' (least recently served across games).
+# Games can override with settings['prompt_selection'] and scope LRU with settings['venue'].
+PROMPT_SELECTION_STRATEGY = os.environ.get('PROMPT_SELECTION_STRATEGY', 'random')
+PROMPT_LRU_WINDOW = int(os.environ.get('PROMPT_LRU_WINDOW', '5'))
+# How often the prompt-lru-sync service adds new prompts to (and drops inactive ones from) the LRU sets
+PROMPT_LRU_RESEED_SECONDS = int(os.environ.get('PROMPT_LRU_RESEED_SECONDS', '600'))
+
+# Prompt image variants: widths (px) rendered for each uploaded image, and encoder quality
+PROMPT_IMAGE_WIDTHS = [int(w) for w in os.environ.get('PROMPT_IMAGE_WIDTHS', '320,640,960,1280').split(',')]
+PROMPT_IMAGE_QUALITY = int(os.environ.get('PROMPT_IMAGE_QUALITY', '80'))
+
+# Mirroring external prompt image_url files into media (manage.py mirror_prompt_images)
+IMAGE_MIRROR_MAX_BYTES = int(os.environ.get('IMAGE_MIRROR_MAX_BYTES', str(10 * 1024 * 1024)))
+IMAGE_MIRROR_TIMEOUT = float(os.environ.get('IMAGE_MIRROR_TIMEOUT', '10'))
+IMAGE_MIRROR_RETRIES = int(os.environ.get('IMAGE_MIRROR_RETRIES', '3'))
+
+# Where ZIPs uploaded for image import wait for the image-importer service (see game/import_jobs.py)
+IMAGE_IMPORT_DIR = Path(os.environ.get('IMAGE_IMPORT_DIR', BASE_DIR / 'imports'))
+
+# Where in-progress round state lives: 'db' (PostgreSQL) or 'redis' (see game/live_state.py)
+LIVE_STATE_BACKEND = os.environ.get('LIVE_STATE_BACKEND', 'db')
+
+# Game event log: store a replay snapshot every N events per game
+EVENT_SNAPSHOT_INTERVAL = int(os.environ.get('EVENT_SNAPSHOT_INTERVAL', '50'))
+
+# On-demand profiling (see game/profiling.py)
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() in ('true', '1', 'yes')
+PROFILING_DIR = Path(os.environ.get('PROFILING_DIR', BASE_DIR / 'profiles'))
+PROFILING_MAX_FILES = int(os.environ.get('PROFILING_MAX_FILES', '200'))
 
 # Logging
 LOGGING = {
@@ -1,10 +1,16 @@
 """Django admin configuration for 001 Game."""
-import csv
-import io
 from django.contrib import admin
 from django.utils.html import format_html
 from django import forms
-from .models import Game, Team, Player, Category, Prompt, Round
+from django.db import transaction
+from .models import Game, Team, Player, Category, Prompt, Round, GameEvent
+from . import catalog, images, import_jobs, profiling, search
+from .usage import pending_uses, pending_uses_many
+from .prompt_import import COLUMNS, import_prompts
+from .image_import import MANIFEST_COLUMNS, MANIFEST_NAME
+
+ADMIN_IMPORT_ERRORS_SHOWN = 20
+ADMIN_IMPORT_STATUS_REFRESH = 2
 
 
 class TeamInline(admin.TabularInline):
@@ -33,6 +39,65 @@ class GameAdmin(admin.ModelAdmin):
     search_fields = ['code']
     readonly_fields = ['id', 'code', 'created_at', 'updated_at']
     inlines = [TeamInline, PlayerInline, RoundInline]
+    actions = ['enable_profiling', 'disable_profiling']
+    change_list_template = 'admin/game_changelist.html'
+
+    @admin.action(description='Enable profiling for selected games')
+    def enable_profiling(self, request, queryset):
+        self._set_profiling(request, queryset, True)
+
+    @admin.action(description='Disable profiling for selected games')
+    def disable_profiling(self, request, queryset):
+        self._set_profiling(request, queryset, False)
+
+    def _set_profiling(self, request, queryset, enabled):
+        from django.contrib import messages
+
+        for code in queryset.values_list('code', flat=True):
+            profiling.set_game_profiling(code, enabled)
+
+        if enabled and not profiling.is_enabled():
+            messages.warning(request, 'Games flagged, but PROFILING_ENABLED is off so nothing will be captured.')
+        else:
+            state = f'enabled for {profiling.GAME_FLAG_TTL // 3600}h' if enabled else 'disabled'
+            messages.success(
+                request,
+                f'Profiling {state} for {queryset.count()} game(s). Connected sockets pick this up on reconnect.',
+            )
+
+    def get_urls(self):
+        from django.urls import path
+        urls = super().get_urls()
+        custom_urls = [
+            path('profiles/', self.admin_site.admin_view(self.profile_list), name='game_profile_list'),
+            path(
+                'profiles/<str:name>/',
+                self.admin_site.admin_view(self.profile_download),
+                name='game_profile_download',
+            ),
+        ]
+        return custom_urls + urls
+
+    def profile_list(self, request):
+        from django.shortcuts import render
+
+        profiles = [
+            {'name': path.name, 'size_kb': path.stat().st_size // 1024}
+            for path in profiling.list_profiles()
+        ]
+        return render(request, 'admin/profile_list.html', {
+            'title': 'Captured Profiles',
+            'profiles': profiles,
+            'enabled': profiling.is_enabled(),
+        })
+
+    def profile_download(self, request, name):
+        from django.http import FileResponse, Http404
+
+        path = profiling.get_profile_path(name)
+        if path is None:
+            raise Http404('Profile not found')
+        return FileResponse(path.open('rb'), as_attachment=True, filename=path.name)
 
 
 @admin.register(Team)
@@ -55,8 +120,24 @@ class PlayerAdmin(admin.ModelAdmin):
     search_fields = ['name']
 
 
+class RepublishCatalogMixin:
+    """Flag the static catalog bundles for republishing after any change."""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        transaction.on_commit(catalog.mark_dirty)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        transaction.on_commit(catalog.mark_dirty)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        transaction.on_commit(catalog.mark_dirty)
+
+
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(RepublishCatalogMixin, admin.ModelAdmin):
     list_display = ['icon', 'name', 'name_ar', 'genre', 'sub_genre', 'difficulty', 'prompt_count', 'is_active']
     list_filter = ['genre', 'difficulty', 'is_active']
     search_fields = ['name', 'name_ar']
@@ -67,17 +148,43 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 class CsvImportForm(forms.Form):
-    csv_file = forms.FileField(label='CSV File (columns: title, title_ar, category_name, image_url, difficulty)')
+    csv_file = forms.FileField(label=f'CSV File (columns: {", ".join(COLUMNS)})')
+
+
+class ImageZipImportForm(forms.Form):
+    zip_file = forms.FileField(label=f'ZIP File (images + {MANIFEST_NAME} with columns: {", ".join(MANIFEST_COLUMNS)})')
 
 
 @admin.register(Prompt)
-class PromptAdmin(admin.ModelAdmin):
-    list_display = ['title', 'title_ar', 'category', 'difficulty', 'image_preview', 'times_used', 'is_active']
+class PromptAdmin(RepublishCatalogMixin, admin.ModelAdmin):
+    list_display = ['title', 'title_ar', 'category', 'difficulty', 'image_preview', 'times_used_live', 'is_active']
     list_filter = ['category', 'difficulty', 'is_active']
-    search_fields = ['title', 'title_ar']
-    readonly_fields = ['times_used', 'image_preview_large']
+    search_fields = ['search_text']
+    search_help_text = 'Matches English or Arabic titles, ignoring case, accents and Arabic diacritics'
+    readonly_fields = ['times_used_live', 'image_preview_large']
     change_list_template = 'admin/prompt_changelist.html'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Match normalized words against the trigram-indexed search_text instead of ILIKE scans of both titles.
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(search.substring_filter(search_term)), False
+
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        # One Redis round trip for the page instead of one per row.
+        page = list(changelist.result_list)
+        pending = pending_uses_many([prompt.id for prompt in page])
+        for prompt in page:
+            prompt.pending_uses = pending.get(prompt.id, 0)
+        return changelist
+
+    def times_used_live(self, obj):
+        pending = getattr(obj, 'pending_uses', None)
+        return obj.times_used + (pending_uses(obj.id) if pending is None else pending)
+    times_used_live.short_description = 'Times used'
+    times_used_live.admin_order_field = 'times_used'
+
     def image_preview(self, obj):
         url = obj.get_image_display_url()
         if url:
@@ -92,11 +199,22 @@ class PromptAdmin(admin.ModelAdmin):
         return 'No image'
     image_preview_large.short_description = 'Image Preview'
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if {'image', 'image_url'} & set(form.changed_data):
+            transaction.on_commit(lambda: images.process_prompt_image(obj))
+
     def get_urls(self):
         from django.urls import path
         urls = super().get_urls()
         custom_urls = [
-            path('import-csv/', self.import_csv, name='prompt_import_csv'),
+            path('import-csv/', self.admin_site.admin_view(self.import_csv), name='prompt_import_csv'),
+            path('import-images/', self.admin_site.admin_view(self.import_image_zip), name='prompt_import_images'),
+            path(
+                'import-images/<str:job_id>/',
+                self.admin_site.admin_view(self.import_image_status),
+                name='prompt_import_image_status',
+            ),
         ]
         return custom_urls + urls
 
@@ -107,31 +225,83 @@ class PromptAdmin(admin.ModelAdmin):
         if request.method == 'POST':
             form = CsvImportForm(request.POST, request.FILES)
             if form.is_valid():
-                csv_file = form.cleaned_data['csv_file']
-                decoded = csv_file.read().decode('utf-8')
-                reader = csv.DictReader(io.StringIO(decoded))
-                count = 0
-                for row in reader:
-                    category = Category.objects.filter(name=row.get('category_name', '')).first()
-                    if category:
-                        Prompt.objects.create(
-                            title=row.get('title', ''),
-                            title_ar=row.get('title_ar', ''),
-                            category=category,
-                            image_url=row.get('image_url', ''),
-                            difficulty=int(row.get('difficulty', 3)),
-                        )
-                        count += 1
-                messages.success(request, f'Successfully imported {count} prompts.')
+                result = import_prompts(form.cleaned_data['csv_file'].file)
+                messages.success(request, f'Successfully imported {result.created} prompts.')
+                self._report_rejected(request, result)
                 return redirect('..')
         else:
             form = CsvImportForm()
 
         return render(request, 'admin/csv_import.html', {'form': form, 'title': 'Import Prompts from CSV'})
 
+    def import_image_zip(self, request):
+        import redis
+        from django.shortcuts import redirect, render
+        from django.contrib import messages
+
+        if request.method == 'POST':
+            form = ImageZipImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                # Importing takes minutes for large archives; the image-importer service runs it.
+                try:
+                    job_id = import_jobs.submit(form.cleaned_data['zip_file'], user=request.user.get_username())
+                except redis.RedisError as e:
+                    messages.error(request, f'Could not queue the import: {e}')
+                else:
+                    return redirect(f'{job_id}/')
+        else:
+            form = ImageZipImportForm()
+
+        return render(request, 'admin/csv_import.html', {
+            'form': form,
+            'title': 'Import Prompt Images from ZIP',
+            'help': f'Upload a ZIP of images with a {MANIFEST_NAME} listing: {", ".join(MANIFEST_COLUMNS)}',
+        })
+
+    def import_image_status(self, request, job_id):
+        from django.http import Http404
+        from django.shortcuts import render
+
+        job = import_jobs.get(job_id)
+        if job is None:
+            raise Http404('Import not found')
+        finished = job['status'] in ('done', 'failed')
+        return render(request, 'admin/image_import_status.html', {
+            'title': f"Importing images from {job.get('name', 'ZIP')}",
+            'job': job,
+            'refresh': None if finished else ADMIN_IMPORT_STATUS_REFRESH,
+            'more_errors': int(job.get('failed', 0)) - len(job['errors']),
+        })
+
+    @staticmethod
+    def _report_rejected(request, result):
+        from django.contrib import messages
+
+        if result.failed:
+            shown = result.errors[:ADMIN_IMPORT_ERRORS_SHOWN]
+            details = '; '.join(f'line {line}: {message}' for line, message in shown)
+            more = result.failed - len(shown)
+            messages.warning(
+                request,
+                f'Rejected {result.failed} rows. {details}' + (f' (and {more} more)' if more > 0 else ''),
+            )
+
 
 @admin.register(Round)
 class RoundAdmin(admin.ModelAdmin):
     list_display = ['game', 'round_number', 'team', 'actor', 'status', 'time_taken_seconds', 'points_awarded']
     list_filter = ['status', 'game__code']
     readonly_fields = ['started_at', 'ended_at']
+
+
+@admin.register(GameEvent)
+class GameEventAdmin(admin.ModelAdmin):
+    list_display = ['game', 'version', 'event_type', 'occurred_at']
+    list_filter = ['event_type', 'game__code']
+    readonly_fields = ['game', 'version', 'event_type', 'data', 'uid', 'occurred_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
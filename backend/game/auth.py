@@ -0,0 +1,72 @@
+"""Player identity from signed tokens, for the API and WebSockets.
+
+The game has no Django users: a player is whoever holds the token issued
+when they created or joined the game. Tokens are verified in memory, so
+neither the API nor WebSocket connects read the session table.
+"""
+from urllib.parse import parse_qs
+from channels.middleware import BaseMiddleware
+from rest_framework import authentication, exceptions
+from .tokens import verify_player_token
+
+
+class PlayerIdentity:
+    """The authenticated player behind a request or socket."""
+
+    is_authenticated = True
+    is_anonymous = False
+    is_staff = False
+
+    def __init__(self, player_id: str, game_code: str):
+        self.player_id = player_id
+        self.game_code = game_code
+
+    @classmethod
+    def from_claims(cls, claims: dict) -> 'PlayerIdentity':
+        return cls(claims['sub'], claims['gc'])
+
+    def __str__(self):
+        return f'player {self.player_id} in {self.game_code}'
+
+
+class PlayerTokenAuthentication(authentication.BaseAuthentication):
+    """DRF authentication for ``Authorization: Player <token>`` headers.
+
+    Requests without the header stay anonymous; a bad token is a 401.
+    """
+    keyword = 'Player'
+
+    def authenticate(self, request):
+        header = request.headers.get('Authorization', '')
+        keyword, _, token = header.partition(' ')
+        if keyword != self.keyword:
+            return None
+        try:
+            claims = verify_player_token(token.strip())
+        except PermissionError as e:
+            raise exceptions.AuthenticationFailed(str(e))
+        return PlayerIdentity.from_claims(claims), token
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class PlayerTokenMiddleware(BaseMiddleware):
+    """Put the player from a ``?token=`` query parameter into the WebSocket scope.
+
+    Sets ``scope['player']`` to a PlayerIdentity (or None when no token was
+    sent) and ``scope['player_error']`` when the token didn't verify; the
+    consumer decides what to do with it once it knows the game code.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        scope['player'] = None
+        query = parse_qs(scope.get('query_string', b'').decode())
+        token = query.get('token', [''])[0]
+        if token:
+            try:
+                scope['player'] = PlayerIdentity.from_claims(verify_player_token(token))
+            except PermissionError as e:
+                scope['player_error'] = str(e)
+        return await self.inner(scope, receive, send)
@@ -0,0 +1,144 @@
+"""Prompt catalog published as static, versioned JSON bundles.
+
+The catalog (active categories and their active prompts, with display
+URLs) changes rarely, so instead of serializing it through DRF on every
+request it is rendered to two files under ``MEDIA_ROOT/catalog/``:
+
+- ``categories-<version>.json``: categories with prompt counts (what the
+  host's category picker needs);
+- ``catalog-<version>.json``: the same plus every prompt.
+
+Each is written next to a ``.gz`` copy for nginx's ``gzip_static``. The
+version is a hash of the content, so files never change once written and
+are served as immutable; ``GET /api/catalog/`` returns the current version
+and URLs. The version is kept in the ``Fingerprint`` table.
+
+Changes don't rebuild the bundle directly: code that edits categories or
+prompts calls ``mark_dirty()``, and the ``catalog-publisher`` service
+(``manage.py publish_catalog --loop``) republishes when the flag is set.
+Unchanged content yields the same version and nothing is written.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import redis
+from django.conf import settings
+from . import fingerprints
+from .models import Category, Prompt
+from .redis_client import get_redis
+
+logger = logging.getLogger('game')
+
+FINGERPRINT_KEY = 'catalog'
+DIRTY_KEY = 'catalog:dirty'
+BUNDLES = ['categories', 'catalog']
+KEEP_VERSIONS = 5
+
+
+def mark_dirty():
+    """Ask the publisher to rebuild the bundles."""
+    try:
+        get_redis().set(DIRTY_KEY, 1)
+    except redis.RedisError as e:
+        logger.warning(f"Could not flag the catalog for republishing: {e}")
+
+
+def take_dirty() -> bool:
+    """Clear and return the dirty flag."""
+    return bool(get_redis().getdel(DIRTY_KEY))
+
+
+def build() -> dict:
+    """Render both bundles as ``{name: json bytes}``."""
+    prompts_by_category = {}
+    prompts = (
+        Prompt.objects.filter(is_active=True, category__is_active=True)
+        .only('id', 'category_id', 'title', 'title_ar', 'difficulty', 'image', 'image_url', 'mirrored_image', 'mirrored_from')
+        .order_by('category_id', 'title', 'id')
+    )
+    for prompt in prompts.iterator(chunk_size=2000):
+        prompts_by_category.setdefault(prompt.category_id, []).append({
+            'id': str(prompt.id),
+            'title': prompt.title,
+            'title_ar': prompt.title_ar,
+            'difficulty': prompt.difficulty,
+            'image_url': prompt.get_image_display_url(),
+        })
+
+    categories, full = [], []
+    for category in Category.objects.filter(is_active=True):
+        category_prompts = prompts_by_category.get(category.id, [])
+        summary = {
+            'id': str(category.id),
+            'name': category.name,
+            'name_ar': category.name_ar,
+            'genre': category.genre,
+            'sub_genre': category.sub_genre,
+            'difficulty': category.difficulty,
+            'icon': category.icon,
+            'prompt_count': len(category_prompts),
+        }
+        categories.append(summary)
+        full.append(dict(summary, prompts=category_prompts))
+    return {
+        'categories': _dumps({'categories': categories}),
+        'catalog': _dumps({'categories': full}),
+    }
+
+
+def _dumps(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def _directory() -> Path:
+    return Path(settings.MEDIA_ROOT) / 'catalog'
+
+
+def _write(path: Path, data: bytes):
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def bundle_url(name: str, version: str) -> str:
+    return f'{settings.MEDIA_URL}catalog/{name}-{version}.json'
+
+
+def current_version():
+    """Version of the last published bundles, or None before the first publish."""
+    return fingerprints.get(FINGERPRINT_KEY)
+
+
+def publish(force: bool = False) -> tuple:
+    """Build and write the bundles; return ``(version, changed)``."""
+    bundles = build()
+    version = hashlib.sha256(b''.join(bundles[name] for name in BUNDLES)).hexdigest()[:16]
+    directory = _directory()
+    on_disk = all((directory / f'{name}-{version}.json').exists() for name in BUNDLES)
+    if fingerprints.matches(FINGERPRINT_KEY, version) and on_disk and not force:
+        return version, False
+
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in BUNDLES:
+        path = directory / f'{name}-{version}.json'
+        _write(path.with_name(path.name + '.gz'), gzip.compress(bundles[name], compresslevel=9, mtime=0))
+        _write(path, bundles[name])
+    fingerprints.store(FINGERPRINT_KEY, version)
+    _remove_old_versions(directory, version)
+    logger.info(f"Published catalog {version} ({len(bundles['catalog'])} bytes)")
+    return version, True
+
+
+def _remove_old_versions(directory: Path, current: str):
+    """Keep the newest ``KEEP_VERSIONS`` versions, for clients still holding an older pointer."""
+    files = sorted(directory.glob('catalog-*.json'), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in files[KEEP_VERSIONS:]:
+        version = old.name[len('catalog-'):-len('.json')]
+        if version == current:
+            continue
+        for name in BUNDLES:
+            for suffix in ('.json', '.json.gz'):
+                (directory / f'{name}-{version}{suffix}').unlink(missing_ok=True)
@@ -0,0 +1,124 @@
+"""Channel layer with an in-process fast path for group broadcasts.
+
+Most games have every socket on the same Daphne process, but
+``RedisChannelLayer.group_send`` still writes each broadcast to Redis and
+wakes the receivers through ``BZPOPMIN``. ``LocalFanoutChannelLayer`` keeps
+a registry of the group members that live in this process and puts
+broadcasts straight into their receive buffers, then forwards to Redis
+only for members on other nodes.
+
+Redis stays the source of truth for membership (``group_add`` still
+writes the group sorted set), so nodes running the plain Redis layer and
+nodes running this one can serve the same game. When Redis shows a group
+has no members elsewhere, that answer is reused for ``remote_recheck``
+seconds, so broadcasts to all-local groups make no Redis call at all; a
+socket joining the game on another node meanwhile gets this node's
+broadcasts after at most that delay.
+"""
+import collections
+import copy
+import logging
+import time
+from channels_redis.core import RedisChannelLayer
+
+logger = logging.getLogger('game')
+
+REMOTE_RECHECK_SECONDS = 1.0
+# Past this many remembered groups, forget the ones whose recheck is due.
+REMOTE_RECHECK_PRUNE_AT = 10000
+
+GROUP_SEND_LUA = """
+    local over_capacity = 0
+    local current_time = ARGV[#ARGV - 1]
+    local expiry = ARGV[#ARGV]
+    for i=1,#KEYS do
+        if redis.call('ZCOUNT', KEYS[i], '-inf', '+inf') < tonumber(ARGV[i + #KEYS]) then
+            redis.call('ZADD', KEYS[i], current_time, ARGV[i])
+            redis.call('EXPIRE', KEYS[i], expiry)
+        else
+            over_capacity = over_capacity + 1
+        end
+    end
+    return over_capacity
+"""
+
+
+class LocalFanoutChannelLayer(RedisChannelLayer):
+    """Redis channel layer that delivers group messages to local members in memory."""
+
+    def __init__(self, *args, remote_recheck=REMOTE_RECHECK_SECONDS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.local_groups = collections.defaultdict(set)
+        self.remote_recheck = remote_recheck
+        # group -> time.monotonic() until which it is known to have no members on other nodes
+        self.local_only_until = {}
+
+    def is_local(self, channel: str) -> bool:
+        """True for process-specific channels created by this layer instance."""
+        return '!' in channel and self.non_local_name(channel).endswith(self.client_prefix + '!')
+
+    async def group_add(self, group, channel):
+        await super().group_add(group, channel)
+        if self.is_local(channel):
+            self.local_groups[group].add(channel)
+
+    async def group_discard(self, group, channel):
+        await super().group_discard(group, channel)
+        members = self.local_groups.get(group)
+        if members is not None:
+            members.discard(channel)
+            if not members:
+                del self.local_groups[group]
+                self.local_only_until.pop(group, None)
+
+    async def group_send(self, group, message):
+        assert self.valid_group_name(group), "Group name not valid"
+        local = set(self.local_groups.get(group, ()))
+        if local:
+            # Deliver before talking to Redis so local latency never waits on it.
+            # Like the Redis path, receivers in this process share one copy.
+            delivered = copy.deepcopy(message)
+            for channel in local:
+                self.receive_buffer[channel].put_nowait(delivered)
+
+        now = time.monotonic()
+        if self.local_only_until.get(group, 0) > now:
+            return
+        remote = [channel for channel in await self._group_members(group) if channel not in local]
+        if remote:
+            self.local_only_until.pop(group, None)
+            await self._send_to_channels(group, remote, message)
+            return
+        if len(self.local_only_until) >= REMOTE_RECHECK_PRUNE_AT:
+            self.local_only_until = {
+                name: until for name, until in self.local_only_until.items() if until > now
+            }
+        self.local_only_until[group] = now + self.remote_recheck
+
+    async def _group_members(self, group):
+        key = self._group_key(group)
+        connection = self.connection(self.consistent_hash(group))
+        pipe = connection.pipeline(transaction=False)
+        pipe.zremrangebyscore(key, min=0, max=int(time.time()) - self.group_expiry)
+        pipe.zrange(key, 0, -1)
+        _, members = await pipe.execute()
+        return [member.decode('utf8') for member in members]
+
+    async def _send_to_channels(self, group, channel_names, message):
+        """The Redis half of ``RedisChannelLayer.group_send`` for an explicit member list."""
+        channel_keys_by_connection, message_by_key, capacity_by_key = (
+            self._map_channel_keys_to_connection(channel_names, message)
+        )
+        for index, channel_keys in channel_keys_by_connection.items():
+            connection = self.connection(index)
+            pipe = connection.pipeline()
+            for key in channel_keys:
+                pipe.zremrangebyscore(key, min=0, max=int(time.time()) - int(self.expiry))
+            await pipe.execute()
+
+            args = [message_by_key[key] for key in channel_keys]
+            args += [capacity_by_key[key] for key in channel_keys]
+            args += [time.time(), self.expiry]
+            over_capacity = await connection.eval(GROUP_SEND_LUA, len(channel_keys), *channel_keys, *args)
+            if over_capacity > 0:
+                logger.info(f"{over_capacity} of {len(channel_names)} remote channels over capacity in group {group}")
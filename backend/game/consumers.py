@@ -2,15 +2,24 @@
 
 Consumers are thin — they receive events and delegate to GameService.
 """
+import asyncio
 import json
 import logging
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from .services import GameService
+from . import drain, presence, profiling, ratelimit
+from .auth import PlayerIdentity
+from .tokens import issue_player_token
 from .serializers import GameSerializer, RoundSerializer
 
 logger = logging.getLogger('game')
 
+# Initial-state builds in flight, by game code. Sockets connecting to the same
+# game at once (e.g. everyone reconnecting after a deploy) share one build.
+_initial_state_builds = {}
+
 
 class GameConsumer(AsyncJsonWebsocketConsumer):
     """WebSocket consumer for game events."""
@@ -18,12 +27,25 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
     async def connect(self):
         self.game_code = self.scope['url_route']['kwargs']['code'].upper()
         self.group_name = f'game_{self.game_code}'
+        if drain.is_draining():
+            await self.close(code=1013)
+            return
+        if not await self._authenticate():
+            return
+        self.rate_limits = ratelimit.connection_buckets()
+        self.throttled_in_a_row = 0
+        self.profiling = profiling.is_enabled() and await database_sync_to_async(
+            profiling.is_game_profiled
+        )(self.game_code)
 
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
+        drain.register(self.channel_name)
+        if self.player:
+            presence.buffer.touch(self.game_code, self.player.player_id, self.channel_name, joined=True)
 
         try:
-            state = await self._get_game_state()
+            state = await self._initial_state()
             await self.send_json({
                 'type': 'game_state',
                 'version': 1,
@@ -33,7 +55,60 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
             logger.error(f"Error sending initial state: {e}")
             await self.send_json({'type': 'error', 'message': 'Game not found'})
 
+    async def _initial_state(self):
+        build = _initial_state_builds.get(self.game_code)
+        if build is None:
+            build = asyncio.ensure_future(self._get_game_state())
+            _initial_state_builds[self.game_code] = build
+            build.add_done_callback(lambda _, code=self.game_code: _initial_state_builds.pop(code, None))
+        return await asyncio.shield(build)
+
+    async def _authenticate(self) -> bool:
+        """Reject sockets whose player token is invalid or for another game.
+
+        Sockets without a token are allowed (e.g. a shared TV display);
+        ``self.player`` is then None.
+        """
+        self.player = self.scope.get('player')
+        error = self.scope.get('player_error')
+        if self.player and self.player.game_code != self.game_code:
+            error = "Token is for a different game"
+        if error:
+            logger.info(f"Rejected WebSocket for {self.game_code}: {error}")
+            await self.close(code=4401)
+            return False
+        return True
+
+    async def _throttled(self, msg_type) -> bool:
+        """Reject messages over the rate limit before any database work.
+
+        Clients that keep sending while throttled are disconnected.
+        """
+        retry_after = ratelimit.check(self.rate_limits, self.game_code, msg_type)
+        if retry_after is None:
+            self.throttled_in_a_row = 0
+            return False
+
+        self.throttled_in_a_row += 1
+        if self.throttled_in_a_row > settings.WS_RATE_LIMIT_DISCONNECT_AFTER:
+            return True  # already closing; drop whatever is still queued
+        if self.throttled_in_a_row == settings.WS_RATE_LIMIT_DISCONNECT_AFTER:
+            logger.warning(f"Closing WebSocket in {self.game_code}: {self.throttled_in_a_row} throttled messages in a row")
+            await self.close(code=4429)
+            return True
+        await self.send_json({
+            'type': 'error',
+            'version': 1,
+            'code': 'rate_limited',
+            'message': f'Too many {msg_type} messages, slow down',
+            'retry_after': round(retry_after, 2),
+        })
+        return True
+
     async def disconnect(self, close_code):
+        drain.unregister(self.channel_name)
+        if getattr(self, 'player', None):
+            presence.buffer.leave(self.game_code, self.player.player_id, self.channel_name)
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
     async def receive_json(self, content):
@@ -41,9 +116,16 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
         msg_type = content.get('type', '')
         handler = getattr(self, f'handle_{msg_type}', None)
 
+        if handler and await self._throttled(msg_type):
+            return
+
         if handler:
             try:
-                await handler(content)
+                if self.profiling:
+                    with profiling.capture(f'ws-{self.game_code}-{msg_type}'):
+                        await handler(content)
+                else:
+                    await handler(content)
             except Exception as e:
                 logger.error(f"Error handling {msg_type}: {e}")
                 await self.send_json({
@@ -58,11 +140,25 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
                 'message': f'Unknown message type: {msg_type}',
             })
 
+    async def handle_ping(self, content):
+        """Heartbeat: keeps this socket's player online. No database work."""
+        if self.player:
+            presence.buffer.touch(self.game_code, self.player.player_id, self.channel_name)
+        await self.send_json({'type': 'pong', 'version': 1})
+
     async def handle_join_game(self, content):
         player_name = content.get('player_name', '')
         session_key = content.get('session_key', '')
 
         player = await self._join_game(player_name, session_key)
+        self.player = PlayerIdentity(str(player.id), self.game_code)
+        presence.buffer.touch(self.game_code, self.player.player_id, self.channel_name, joined=True)
+        await self.send_json({
+            'type': 'joined',
+            'version': 1,
+            'player_id': str(player.id),
+            'player_token': issue_player_token(player.id, self.game_code),
+        })
 
         await self.channel_layer.group_send(self.group_name, {
             'type': 'broadcast_player_joined',
@@ -294,64 +390,95 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
             'data': event['data'],
         })
 
+    async def broadcast_presence(self, event):
+        await self.send_json({
+            'type': 'presence',
+            'version': 1,
+            'online': event['online'],
+        })
+
+    async def server_drain(self, event):
+        """This process is draining: send the client elsewhere, after a random delay."""
+        await self.send_json({
+            'type': 'reconnect',
+            'version': 1,
+            'delay_ms': drain.reconnect_delay_ms(),
+        })
+        await self.close(code=1012)
+
     # --- Database operations (sync_to_async wrappers) ---
 
     @database_sync_to_async
+    @profiling.profiled
     def _get_game_state(self):
         return GameService.get_game_state(self.game_code)
 
     @database_sync_to_async
+    @profiling.profiled
     def _join_game(self, player_name, session_key):
         return GameService.join_game(self.game_code, player_name, session_key)
 
     @database_sync_to_async
+    @profiling.profiled
     def _host_add_player(self, player_name, team_id):
         return GameService.host_add_player(self.game_code, player_name, team_id or None)
 
     @database_sync_to_async
+    @profiling.profiled
     def _assign_player(self, player_id, team_id):
         return GameService.assign_player_to_team(player_id, team_id)
 
     @database_sync_to_async
+    @profiling.profiled
     def _update_team(self, team_id, name, color):
         return GameService.update_team(team_id, name, color)
 
     @database_sync_to_async
+    @profiling.profiled
     def _start_game(self):
         return GameService.start_game(self.game_code)
 
     @database_sync_to_async
+    @profiling.profiled
     def _select_actor(self, round_id, player_id):
         return GameService.select_actor(round_id, player_id)
 
     @database_sync_to_async
+    @profiling.profiled
     def _select_category(self, round_id, category_id):
         return GameService.select_category(round_id, category_id)
 
     @database_sync_to_async
+    @profiling.profiled
     def _actor_ready(self, round_id):
         return GameService.actor_ready(round_id)
 
     @database_sync_to_async
+    @profiling.profiled
     def _start_timer(self, round_id):
         return GameService.start_timer(round_id)
 
     @database_sync_to_async
+    @profiling.profiled
     def _correct_guess(self, round_id):
         return GameService.correct_guess(round_id)
 
     @database_sync_to_async
+    @profiling.profiled
     def _timeout_round(self, round_id):
         return GameService.timeout_round(round_id)
 
     @database_sync_to_async
+    @profiling.profiled
     def _skip_round(self, round_id):
         return GameService.skip_round(round_id)
 
     @database_sync_to_async
+    @profiling.profiled
     def _next_round(self):
         return GameService.advance_to_next_round(self.game_code)
 
     @database_sync_to_async
+    @profiling.profiled
     def _update_settings(self, **kwargs):
         return GameService.update_game_settings(self.game_code, **kwargs)
@@ -0,0 +1,68 @@
+"""Graceful drain for rolling restarts.
+
+``manage.py drain`` creates ``DRAIN_FILE`` inside the container. Every
+process serving WebSockets checks for it once a second; once it appears
+the process refuses new sockets, the readiness endpoint reports 503 so the
+load balancer stops routing here, and each open socket is told to
+reconnect after a random delay (so phones spread out over
+``DRAIN_RECONNECT_JITTER`` seconds instead of stampeding the next node) and
+then closed. The notice is queued behind whatever the consumer is
+handling, so in-flight handlers finish first.
+
+The marker survives a container restart, so ``manage.py startup`` removes
+it with ``clear()`` before serving again.
+"""
+import asyncio
+import logging
+import os
+import random
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+logger = logging.getLogger('game')
+
+POLL_SECONDS = 1
+
+_local_channels = set()
+_watcher = None
+
+
+def is_draining() -> bool:
+    """True while a drain is requested for this container."""
+    return os.path.exists(settings.DRAIN_FILE)
+
+
+def clear() -> bool:
+    """Leave drain mode; returns whether a drain was in effect."""
+    try:
+        os.remove(settings.DRAIN_FILE)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def reconnect_delay_ms() -> int:
+    return random.randint(0, int(settings.DRAIN_RECONNECT_JITTER * 1000))
+
+
+def register(channel_name: str):
+    """Track a socket of this process so it can be drained."""
+    global _watcher
+    _local_channels.add(channel_name)
+    if _watcher is None or _watcher.done():
+        _watcher = asyncio.get_running_loop().create_task(_watch())
+
+
+def unregister(channel_name: str):
+    _local_channels.discard(channel_name)
+
+
+async def _watch():
+    while _local_channels:
+        if is_draining():
+            logger.info(f"Draining {len(_local_channels)} WebSocket connections")
+            channel_layer = get_channel_layer()
+            for channel_name in list(_local_channels):
+                await channel_layer.send(channel_name, {'type': 'server.drain'})
+            return
+        await asyncio.sleep(POLL_SECONDS)
@@ -0,0 +1,266 @@
+"""Append-only game event log with snapshots and replay.
+
+``GameService`` records one event per command with ``record()``. Events are
+pushed onto a Redis list after the command's transaction commits and
+``flush_events()`` moves them into ``GameEvent`` with one ``bulk_create``
+per batch, assigning per-game versions in arrival order. Every
+``EVENT_SNAPSHOT_INTERVAL`` events a ``GameSnapshot`` of the replayed
+state is stored, so ``replay()`` only applies the events after the nearest
+snapshot.
+"""
+import copy
+import json
+import logging
+import uuid
+import redis
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils import timezone
+from .locks import LockLost, RedisLock
+from .models import GameEvent, GameSnapshot
+from .redis_client import get_redis
+
+logger = logging.getLogger('game')
+
+PENDING_KEY = 'events:pending'
+FLUSH_LOCK_KEY = 'events:flush_lock'
+FLUSH_LOCK_TTL = 60
+FLUSH_BATCH_SIZE = 1000
+WRITE_ATTEMPTS = 5
+
+
+def record(game_id, event_type: str, **data):
+    """Log a command against a game once the surrounding transaction commits."""
+    event = json.dumps({
+        'uid': uuid.uuid4().hex,
+        'game_id': str(game_id),
+        'type': event_type,
+        'data': data,
+        'at': timezone.now().isoformat(),
+    }, cls=DjangoJSONEncoder)
+    transaction.on_commit(lambda: _push(event))
+
+
+def _push(event: str):
+    try:
+        get_redis().rpush(PENDING_KEY, event)
+    except redis.RedisError as e:
+        logger.warning(f"Event buffer unavailable ({e}), writing event directly")
+        _write([json.loads(event)])
+
+
+def flush_events() -> int:
+    """Move buffered events into the database; returns events written.
+
+    Only one flusher runs at a time; the lock is extended after every batch
+    and the flush stops if it was lost anyway. Events are trimmed from Redis
+    after the insert commits; if a flush dies in between, the re-flushed
+    events are skipped by their unique ``uid``.
+    """
+    r = get_redis()
+    lock = RedisLock(FLUSH_LOCK_KEY, FLUSH_LOCK_TTL)
+    if not lock.acquire():
+        return 0
+    written = 0
+    try:
+        while True:
+            raw = r.lrange(PENDING_KEY, 0, FLUSH_BATCH_SIZE - 1)
+            if not raw:
+                break
+            written += _write([json.loads(item) for item in raw])
+            lock.extend()
+            r.ltrim(PENDING_KEY, len(raw), -1)
+    except LockLost:
+        logger.warning("Event flush lock expired mid-flush; leaving the rest to the next flusher")
+    finally:
+        lock.release()
+    return written
+
+
+def _write(events) -> int:
+    """Insert events not stored yet; returns the number inserted.
+
+    Versions are assigned from the latest stored ones. A concurrent writer
+    (a direct write while Redis was down) can take the same
+    ``(game, version)``; the insert then fails as a whole and is retried
+    with freshly read versions.
+    """
+    for attempt in range(1, WRITE_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                inserted, versions = _insert(events)
+            break
+        except IntegrityError:
+            if attempt == WRITE_ATTEMPTS:
+                raise
+            logger.info(f"Event version conflict, retrying ({attempt}/{WRITE_ATTEMPTS})")
+
+    for game_id, version in versions.items():
+        # Snapshots only speed up replay; one that can't be built must not hold back the flush.
+        try:
+            _maybe_snapshot(game_id, version)
+        except Exception:
+            logger.error(f"Could not snapshot game {game_id} at version {version}", exc_info=True)
+    return inserted
+
+
+def _insert(events):
+    stored = set(GameEvent.objects.filter(uid__in=[event['uid'] for event in events]).values_list('uid', flat=True))
+    events = [event for event in events if event['uid'] not in stored]
+    game_ids = {event['game_id'] for event in events}
+    versions = dict(
+        GameEvent.objects.filter(game_id__in=game_ids)
+        .values('game_id').annotate(latest=Max('version'))
+        .values_list('game_id', 'latest')
+    )
+    versions = {str(game_id): latest for game_id, latest in versions.items()}
+
+    rows = []
+    for event in events:
+        version = versions.get(event['game_id'], 0) + 1
+        versions[event['game_id']] = version
+        rows.append(GameEvent(
+            game_id=event['game_id'],
+            version=version,
+            event_type=event['type'],
+            data=event['data'],
+            uid=event['uid'],
+            occurred_at=event['at'],
+        ))
+    GameEvent.objects.bulk_create(rows)
+    return len(rows), {game_id: versions[game_id] for game_id in game_ids}
+
+
+def _maybe_snapshot(game_id, latest_version: int):
+    snapshot = GameSnapshot.objects.filter(game_id=game_id).only('version').first()
+    since = snapshot.version if snapshot else 0
+    if latest_version - since >= settings.EVENT_SNAPSHOT_INTERVAL:
+        state, version = replay(game_id)
+        GameSnapshot.objects.get_or_create(game_id=game_id, version=version, defaults={'state': state})
+
+
+# --- Replay ---
+
+def initial_state() -> dict:
+    return {
+        'code': None,
+        'status': 'lobby',
+        'current_round': 0,
+        'total_rounds': None,
+        'max_time_per_turn': None,
+        'settings': {},
+        'category_ids': [],
+        'teams': {},
+        'players': {},
+        'rounds': {},
+    }
+
+
+# Games created before the event log have no game_created/player_joined
+# events, so later events can refer to teams and players replay never saw.
+
+def _round(state, round_id) -> dict:
+    return state['rounds'].setdefault(round_id, {'id': round_id})
+
+
+def _team(state, team_id) -> dict:
+    return state['teams'].setdefault(team_id, {'id': team_id, 'total_score': 0})
+
+
+def _player(state, player_id) -> dict:
+    return state['players'].setdefault(player_id, {'is_host': False, 'team_id': None})
+
+
+def apply(state: dict, event_type: str, data: dict) -> dict:
+    """Apply one event to a replayed state (mutates and returns ``state``)."""
+    if event_type == 'game_created':
+        state.update({
+            'code': data['code'],
+            'total_rounds': data['total_rounds'],
+            'max_time_per_turn': data['max_time_per_turn'],
+        })
+        for team in data['teams']:
+            state['teams'][team['id']] = {**team, 'total_score': 0}
+        host = data['host']
+        state['players'][host['id']] = {'name': host['name'], 'is_host': True, 'team_id': None}
+    elif event_type == 'player_joined':
+        player = _player(state, data['player_id'])
+        player['name'] = data['name']
+        if data.get('team_id'):
+            player['team_id'] = data['team_id']
+    elif event_type == 'player_assigned':
+        _player(state, data['player_id'])['team_id'] = data['team_id']
+    elif event_type == 'team_updated':
+        team = _team(state, data['team_id'])
+        team.update({k: v for k, v in data.items() if k in ('name', 'color') and v is not None})
+    elif event_type == 'settings_updated':
+        for field in ('total_rounds', 'max_time_per_turn'):
+            if field in data:
+                state[field] = data[field]
+        state['settings'].update(data.get('settings', {}))
+        if 'category_ids' in data:
+            state['category_ids'] = data['category_ids']
+    elif event_type in ('game_started', 'round_advanced'):
+        new_round = data['round']
+        state['status'] = 'in_progress'
+        state['current_round'] = new_round['round_number']
+        state['rounds'][new_round['id']] = {'status': 'selecting_actor', 'points_awarded': 0, **new_round}
+    elif event_type == 'actor_selected':
+        _round(state, data['round_id']).update({'actor_id': data['player_id'], 'status': 'selecting_category'})
+    elif event_type == 'category_selected':
+        _round(state, data['round_id']).update({
+            'category_id': data['category_id'],
+            'prompt_id': data['prompt_id'],
+            'status': 'showing_qr',
+        })
+    elif event_type == 'actor_ready':
+        _round(state, data['round_id'])['status'] = 'actor_ready'
+    elif event_type == 'timer_started':
+        _round(state, data['round_id']).update({'status': 'active', 'started_at': data['started_at']})
+    elif event_type == 'round_guessed':
+        _round(state, data['round_id']).update({
+            'status': 'guessed',
+            'time_taken_seconds': data['time_taken'],
+            'points_awarded': data['points'],
+        })
+        _team(state, data['team_id'])['total_score'] += data['points']
+    elif event_type == 'round_timed_out':
+        _round(state, data['round_id'])['status'] = 'timeout'
+    elif event_type == 'round_skipped':
+        _round(state, data['round_id'])['status'] = 'skipped'
+    elif event_type == 'game_finished':
+        state['status'] = 'finished'
+    else:
+        logger.warning(f"Unknown event type during replay: {event_type}")
+    return state
+
+
+def replay(game_id, version: int = None):
+    """Rebuild a game's state at ``version`` (default: latest).
+
+    Returns ``(state, version)`` where version is the last event applied.
+    """
+    snapshots = GameSnapshot.objects.filter(game_id=game_id)
+    events = GameEvent.objects.filter(game_id=game_id)
+    if version is not None:
+        snapshots = snapshots.filter(version__lte=version)
+        events = events.filter(version__lte=version)
+
+    snapshot = snapshots.first()
+    if snapshot:
+        state, applied = copy.deepcopy(snapshot.state), snapshot.version
+        events = events.filter(version__gt=snapshot.version)
+    else:
+        state, applied = initial_state(), 0
+
+    for event_type, data, event_version in events.order_by('version').values_list('event_type', 'data', 'version'):
+        apply(state, event_type, data)
+        applied = event_version
+    return state, applied
+
+
+def events_since(game_id, version: int = 0):
+    """Events after ``version``, oldest first, for client resync and analytics."""
+    return GameEvent.objects.filter(game_id=game_id, version__gt=version).order_by('version')
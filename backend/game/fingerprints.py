@@ -0,0 +1,38 @@
+"""Fingerprints that let idempotent maintenance steps skip work.
+
+A step hashes its inputs with ``digest()`` and compares the result with
+the value stored under its key; stored in the database so a fresh
+database never inherits a stale "already done".
+"""
+import hashlib
+import json
+from django.db import DatabaseError
+from .models import Fingerprint
+
+
+def digest(data) -> str:
+    """Stable SHA-256 of JSON-serialisable data."""
+    encoded = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def get(key: str):
+    try:
+        return Fingerprint.objects.filter(key=key).values_list('value', flat=True).first()
+    except DatabaseError:
+        return None
+
+
+def matches(key: str, value: str) -> bool:
+    try:
+        return Fingerprint.objects.filter(key=key, value=value).exists()
+    except DatabaseError:
+        return False  # table missing before the first migrate
+
+
+def store(key: str, value: str):
+    Fingerprint.objects.update_or_create(key=key, defaults={'value': value})
+
+
+def clear(key: str):
+    Fingerprint.objects.filter(key=key).delete()
@@ -0,0 +1,177 @@
+"""Bulk import of prompt images from a ZIP file.
+
+The ZIP holds the images plus ``manifest.csv`` with the columns in
+``MANIFEST_COLUMNS``: the image's path inside the ZIP, the prompt title,
+and optionally the category name (needed when a title exists in several
+categories). Entries are read one at a time straight from the archive,
+never extracted to disk; each image is verified, stored and rendered to
+its variants in a worker pool, and prompts are updated with
+``bulk_update`` in batches.
+
+Used by ``manage.py import_prompt_images`` (processes), which also runs
+the imports queued from the Prompt admin's "Import images" page.
+"""
+import csv
+import io
+import logging
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, UnidentifiedImageError
+from . import catalog, images
+from .models import Prompt
+from .prompt_import import ImportResult
+
+logger = logging.getLogger('game')
+
+MANIFEST_NAME = 'manifest.csv'
+MANIFEST_COLUMNS = ['file', 'title', 'category_name']
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+SAVE_BATCH = 200
+FIELDS = ['image', 'image_width', 'image_height', 'image_variants']
+
+
+class ImageImportResult(ImportResult):
+    """Counts, per-entry errors and throughput of one ZIP import."""
+
+    def __init__(self):
+        super().__init__()
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def __str__(self):
+        rate = self.created / self.seconds if self.seconds else 0
+        return (f'{self.created} images imported, {self.failed} rejected in {self.seconds:.1f}s '
+                f'({rate:.1f} images/s, {self.bytes / 1024 / 1024 / (self.seconds or 1):.1f} MB/s)')
+
+
+def process_image(prompt_id, filename: str, data: bytes) -> dict:
+    """Verify, store and render one image; return the prompt field values. Runs in a worker."""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+            image.verify()
+    except UnidentifiedImageError:
+        raise ValueError('not an image')
+    except (OSError, SyntaxError) as e:
+        raise ValueError(f'corrupt image: {e}')
+    name = default_storage.save(f'prompts/{filename.rsplit("/", 1)[-1]}', ContentFile(data))
+    return {
+        'image': name,
+        'image_width': width,
+        'image_height': height,
+        'image_variants': images.render_variants(prompt_id, name),
+    }
+
+
+def _read_manifest(archive: zipfile.ZipFile, result: ImportResult) -> list:
+    """Return ``(line, file, title, category_name)`` rows of the manifest."""
+    try:
+        raw = archive.open(MANIFEST_NAME)
+    except KeyError:
+        result.add_error(0, f'{MANIFEST_NAME} not found in the ZIP')
+        return []
+    with io.TextIOWrapper(raw, encoding='utf-8-sig', newline='') as text:
+        reader = csv.DictReader(text)
+        missing = {'file', 'title'} - set(reader.fieldnames or [])
+        if missing:
+            result.add_error(1, f"{MANIFEST_NAME} is missing columns: {', '.join(sorted(missing))}")
+            return []
+        return [
+            (reader.line_num, (row.get('file') or '').strip(), (row.get('title') or '').strip(),
+             (row.get('category_name') or '').strip())
+            for row in reader
+        ]
+
+
+def _prompt_ids(rows: list) -> dict:
+    """``{(title, category_name): id}`` plus ``{(title, ''): id}`` for titles in one category only."""
+    found = {}
+    ambiguous = set()
+    titles = {title for _, _, title, _ in rows}
+    for prompt_id, title, category_name in Prompt.objects.filter(title__in=titles).values_list(
+        'id', 'title', 'category__name',
+    ):
+        found.setdefault((title, category_name), prompt_id)
+        if (title, '') in found:
+            ambiguous.add(title)
+        found[(title, '')] = prompt_id
+    for title in ambiguous:
+        found[(title, '')] = None
+    return found
+
+
+def import_images(zip_file, executor, max_in_flight: int = 16, progress=None) -> ImageImportResult:
+    """Import images from a ZIP (a path or seekable binary file) using ``executor`` for the work.
+
+    ``progress``, if given, is called with the running result after each
+    saved batch.
+    """
+    result = ImageImportResult()
+    started = time.perf_counter()
+    try:
+        archive = zipfile.ZipFile(zip_file)
+    except (zipfile.BadZipFile, OSError) as e:
+        result.add_error(0, f'not a ZIP file: {e}')
+        return result
+
+    with archive:
+        rows = _read_manifest(archive, result)
+        prompt_ids = _prompt_ids(rows)
+        in_flight, pending = {}, []
+
+        def collect(futures):
+            for future in futures:
+                line, prompt_id = in_flight.pop(future)
+                try:
+                    pending.append(Prompt(pk=prompt_id, **future.result()))
+                except (ValueError, OSError) as e:
+                    result.add_error(line, str(e))
+
+        for line, filename, title, category_name in rows:
+            key = (title, category_name)
+            if key not in prompt_ids:
+                where = f" in '{category_name}'" if category_name else ''
+                result.add_error(line, f"no prompt titled '{title}'{where}")
+                continue
+            if prompt_ids[key] is None:
+                result.add_error(line, f"'{title}' exists in several categories; set category_name")
+                continue
+            try:
+                info = archive.getinfo(filename)
+            except KeyError:
+                result.add_error(line, f"'{filename}' is not in the ZIP")
+                continue
+            if info.file_size > MAX_IMAGE_BYTES:
+                result.add_error(line, f"'{filename}' is larger than {MAX_IMAGE_BYTES // 1024 // 1024} MB")
+                continue
+
+            if len(in_flight) >= max_in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            data = archive.read(info)
+            result.bytes += len(data)
+            in_flight[executor.submit(process_image, prompt_ids[key], filename, data)] = (line, prompt_ids[key])
+
+            if len(pending) >= SAVE_BATCH:
+                result.created += _save(pending)
+                pending.clear()
+                result.seconds = time.perf_counter() - started
+                if progress:
+                    progress(result)
+
+        collect(wait(in_flight).done)
+        result.created += _save(pending)
+
+    result.seconds = time.perf_counter() - started
+    if result.created:
+        catalog.mark_dirty()
+    logger.info(f'Prompt image ZIP import: {result}')
+    return result
+
+
+def _save(prompts: list) -> int:
+    Prompt.objects.bulk_update(prompts, FIELDS)
+    return len(prompts)
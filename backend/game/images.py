@@ -0,0 +1,129 @@
+"""Resized, modern-format variants of prompt images.
+
+Local prompt images (uploaded, or mirrored from ``image_url``, see
+``Prompt.local_image``) are kept as the original and also rendered at the
+widths in ``PROMPT_IMAGE_WIDTHS`` (never upscaled) as AVIF (when this
+Pillow build can write it), WebP and JPEG. The variants are recorded in
+``Prompt.image_variants``:
+
+    {'source': 'prompts/x.jpg', 'variants': [
+        {'format': 'webp', 'width': 640, 'height': 480, 'name': 'prompts/3f/3fa2….webp'}, ...]}
+
+Like every media file, variants are stored under the hash of their own
+bytes (see ``game.storage``), so a replaced image gets new URLs and
+identical variants are shared. Variants that no prompt uses any more are
+left for ``manage.py dedupe_media --prune``. ``render_variants`` only
+touches storage, not the database, so
+``manage.py process_prompt_images`` can run it in a process pool and save
+the results in bulk.
+"""
+import hashlib
+import io
+import logging
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger('game')
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+# Preferred first; JPEG is the fallback every browser accepts.
+FORMAT_PREFERENCE = ['avif', 'webp', 'jpeg']
+DEFAULT_DEVICE_WIDTH = 768
+
+
+def output_formats() -> list:
+    """Formats this Pillow build can write, in order of preference."""
+    Image.init()
+    return [fmt for fmt in FORMAT_PREFERENCE if fmt.upper() in Image.SAVE]
+
+
+def target_widths(source_width: int) -> list:
+    widths = sorted(settings.PROMPT_IMAGE_WIDTHS)
+    return sorted({w for w in widths if w < source_width} | {min(source_width, widths[-1])})
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+    buffer = io.BytesIO()
+    options = {'quality': settings.PROMPT_IMAGE_QUALITY}
+    if fmt == 'jpeg':
+        options.update(optimize=True, progressive=True)
+    elif fmt == 'webp':
+        options['method'] = 4
+    image.save(buffer, format=fmt.upper(), **options)
+    return buffer.getvalue()
+
+
+def render_variants(prompt_id, source_name: str) -> dict:
+    """Render and store every variant of ``source_name``; return the ``image_variants`` value."""
+    with default_storage.open(source_name, 'rb') as source:
+        data = source.read()
+    with Image.open(io.BytesIO(data)) as opened:
+        image = ImageOps.exif_transpose(opened)
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+    folder = f'prompts/variants/{prompt_id}/{hashlib.sha256(data).hexdigest()[:12]}'
+    variants = []
+    for width in target_widths(image.width):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt in output_formats():
+            name = default_storage.save(f'{folder}/{width}.{fmt}', ContentFile(_encode(resized, fmt)))
+            variants.append({'format': fmt, 'width': width, 'height': height, 'name': name})
+    return {'source': source_name, 'variants': variants}
+
+
+def needs_processing(prompt) -> bool:
+    local = prompt.local_image
+    return bool(local) and (prompt.image_variants or {}).get('source') != local.name
+
+
+def process_prompt_image(prompt):
+    """Render variants for the prompt's current local image and save them, replacing old ones."""
+    local = prompt.local_image
+    if local:
+        try:
+            prompt.image_variants = render_variants(prompt.pk, local.name)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not process image of prompt {prompt.pk}: {e}")
+            return
+    else:
+        prompt.image_variants = {}
+    type(prompt).objects.filter(pk=prompt.pk).update(image_variants=prompt.image_variants)
+
+
+def variants_payload(prompt) -> list:
+    """Variants with URLs, for the actor payload; empty if the image is not processed yet."""
+    if needs_processing(prompt) or not prompt.local_image:
+        return []
+    return [
+        {
+            'type': MIME_TYPES[variant['format']],
+            'url': default_storage.url(variant['name']),
+            'width': variant['width'],
+            'height': variant['height'],
+        }
+        for variant in prompt.image_variants.get('variants', [])
+    ]
+
+
+def best_sources(variants: list, device_width=None) -> list:
+    """Per format, in order of preference, the smallest variant at least ``device_width`` pixels wide.
+
+    Falls back to the largest variant of a format when none is wide
+    enough, and to ``DEFAULT_DEVICE_WIDTH`` when the client did not say.
+    The browser picks the first type it supports (``<picture>``); the
+    last entry is always JPEG.
+    """
+    device_width = device_width or DEFAULT_DEVICE_WIDTH
+    sources = []
+    for fmt in FORMAT_PREFERENCE:
+        candidates = sorted((v for v in variants or [] if v['type'] == MIME_TYPES[fmt]), key=lambda v: v['width'])
+        if candidates:
+            sources.append(next((v for v in candidates if v['width'] >= device_width), candidates[-1]))
+    return sources
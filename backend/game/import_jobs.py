@@ -0,0 +1,113 @@
+"""Queued prompt image ZIP imports.
+
+The Prompt admin's "Import images" page doesn't import in the request: it
+stores the upload in ``IMAGE_IMPORT_DIR``, records a job in Redis and
+redirects to a status page. The ``image-importer`` compose service
+(``manage.py import_prompt_images --queue``) takes jobs off the queue one
+at a time and runs them like the command does, writing the running result
+into the job as it goes.
+
+A job being run sits in ``RUNNING_KEY`` until it finishes, so jobs of an
+importer that died are queued again when the next one starts.
+"""
+import json
+import logging
+import os
+import time
+import uuid
+from django.conf import settings
+from .redis_client import get_redis
+
+logger = logging.getLogger('game')
+
+QUEUE_KEY = 'image_import:queue'
+RUNNING_KEY = 'image_import:running'
+JOB_KEY = 'image_import:job:{}'
+JOB_TTL = 7 * 24 * 3600
+UPLOAD_CHUNK = 1024 * 1024
+REPORTED_ERRORS = 20
+
+
+def _path(job_id: str) -> str:
+    return os.path.join(settings.IMAGE_IMPORT_DIR, f'{job_id}.zip')
+
+
+def _update(job_id: str, **fields):
+    key = JOB_KEY.format(job_id)
+    pipe = get_redis().pipeline()
+    pipe.hset(key, mapping=fields)
+    pipe.expire(key, JOB_TTL)
+    pipe.execute()
+
+
+def submit(upload, user: str = '') -> str:
+    """Store an uploaded ZIP and queue its import; returns the job id."""
+    job_id = uuid.uuid4().hex
+    os.makedirs(settings.IMAGE_IMPORT_DIR, exist_ok=True)
+    with open(_path(job_id), 'wb') as file:
+        for chunk in upload.chunks(UPLOAD_CHUNK):
+            file.write(chunk)
+    try:
+        _update(job_id, status='queued', name=upload.name, user=user, submitted=time.time())
+        get_redis().rpush(QUEUE_KEY, job_id)
+    except Exception:
+        os.remove(_path(job_id))
+        raise
+    return job_id
+
+
+def get(job_id: str):
+    """The job's fields, with ``errors`` decoded; ``None`` if unknown or expired."""
+    job = get_redis().hgetall(JOB_KEY.format(job_id))
+    if not job:
+        return None
+    job['errors'] = json.loads(job.get('errors') or '[]')
+    return job
+
+
+def requeue_abandoned() -> int:
+    """Queue again the jobs a previous importer was running when it died."""
+    redis = get_redis()
+    moved = 0
+    while redis.lmove(RUNNING_KEY, QUEUE_KEY, 'RIGHT', 'LEFT'):
+        moved += 1
+    return moved
+
+
+def run_next(run, timeout: float = 5):
+    """Wait up to ``timeout`` seconds for a job and import it with ``run(path, progress)``.
+
+    ``run`` returns the final ``ImageImportResult``; ``progress`` is passed
+    through to ``import_images``. Returns the job id, or ``None`` if the
+    queue stayed empty.
+    """
+    redis = get_redis()
+    job_id = redis.blmove(QUEUE_KEY, RUNNING_KEY, timeout, 'LEFT', 'RIGHT')
+    if job_id is None:
+        return None
+
+    def report(result, status):
+        _update(
+            job_id, status=status, summary=str(result), created=result.created, failed=result.failed,
+            errors=json.dumps(result.errors[:REPORTED_ERRORS]),
+        )
+
+    path = _path(job_id)
+    try:
+        if not os.path.exists(path):
+            _update(job_id, status='failed', summary='The uploaded file is gone')
+            return job_id
+        _update(job_id, status='running', started=time.time())
+        try:
+            result = run(path, lambda result: report(result, 'running'))
+        except Exception as e:
+            logger.error(f'Image import {job_id} failed', exc_info=True)
+            _update(job_id, status='failed', summary=f'Import failed: {e}', finished=time.time())
+            return job_id
+        report(result, 'done')
+        _update(job_id, finished=time.time())
+        return job_id
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+        redis.lrem(RUNNING_KEY, 1, job_id)
@@ -0,0 +1,407 @@
+"""Redis-resident state for in-progress games (optional).
+
+With ``LIVE_STATE_BACKEND = 'redis'`` the current round and team scores of
+an in-progress game live in a Redis hash, and the in-round clicks
+(``actor_ready``, ``start_timer``, ``correct_guess``, ``timeout_round``,
+``skip_round``) become single Lua-scripted transitions instead of Postgres
+transactions. A background writer (``manage.py persist_live_state``)
+copies dirty hashes back to ``Round`` and ``Team``.
+
+Operations that still run against Postgres (selecting actor/category,
+advancing, scoreboard) first persist the game's pending state and, once
+their transaction commits, drop the hash, which is lazily rebuilt from
+Postgres on next use. The hash is only dropped if no transition landed
+since it was persisted (checked in Lua against its ``generation`` and
+``version``). The same rebuild is the crash-recovery path: a lost hash is
+reloaded from the last persisted state.
+"""
+import logging
+import uuid
+from datetime import datetime
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Game, Team, Round
+from . import prompt_cache
+from .redis_client import get_redis
+from .scoring import calculate_points
+
+logger = logging.getLogger('game')
+
+GAME_KEY = 'live:game:{code}'
+ROUND_KEY = 'live:round:{round_id}'
+DIRTY_KEY = 'live:dirty'
+STATE_TTL = 24 * 60 * 60
+
+# KEYS[1]=game hash, KEYS[2]=round->code key; ARGV=field/value pairs
+HYDRATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+redis.call('HSET', KEYS[1], unpack(ARGV))
+redis.call('EXPIRE', KEYS[1], %(ttl)d)
+redis.call('SET', KEYS[2], redis.call('HGET', KEYS[1], 'code'), 'EX', %(ttl)d)
+return 1
+""" % {'ttl': STATE_TTL}
+
+# KEYS[1]=game hash, KEYS[2]=dirty set
+# ARGV[1]=round id, ARGV[2]=allowed statuses (comma separated),
+# ARGV[3]=score field or '', ARGV[4]=score increment, ARGV[5..]=field/value pairs
+TRANSITION_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return -1 end
+if redis.call('HGET', KEYS[1], 'round_id') ~= ARGV[1] then return -2 end
+local status = redis.call('HGET', KEYS[1], 'status')
+local allowed = false
+for s in string.gmatch(ARGV[2], '[^,]+') do
+    if s == status then allowed = true end
+end
+if not allowed then return -3 end
+for i = 5, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+if ARGV[3] ~= '' then
+    redis.call('HINCRBY', KEYS[1], ARGV[3], ARGV[4])
+end
+redis.call('HINCRBY', KEYS[1], 'version', 1)
+redis.call('SADD', KEYS[2], redis.call('HGET', KEYS[1], 'code'))
+return 1
+"""
+
+# KEYS[1]=game hash, KEYS[2]=dirty set; ARGV[1]=code, ARGV[2]=persisted version, ARGV[3]=generation
+MARK_PERSISTED_SCRIPT = """
+if (redis.call('HGET', KEYS[1], 'generation') or '') ~= ARGV[3] then return 0 end
+redis.call('HSET', KEYS[1], 'persisted_version', ARGV[2])
+if redis.call('HGET', KEYS[1], 'version') == ARGV[2] then
+    redis.call('SREM', KEYS[2], ARGV[1])
+end
+return 1
+"""
+
+# KEYS[1]=game hash, KEYS[2]=dirty set; ARGV[1]=code, ARGV[2]=generation, ARGV[3]=version just persisted
+DROP_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 1 end
+if (redis.call('HGET', KEYS[1], 'generation') or '') ~= ARGV[2]
+        or redis.call('HGET', KEYS[1], 'version') ~= ARGV[3] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('SREM', KEYS[2], ARGV[1])
+return 1
+"""
+DROP_ATTEMPTS = 5
+
+_scripts = {}
+
+
+def is_enabled() -> bool:
+    return settings.LIVE_STATE_BACKEND == 'redis'
+
+
+def _script(source):
+    if source not in _scripts:
+        _scripts[source] = get_redis().register_script(source)
+    return _scripts[source]
+
+
+def _game_key(code: str) -> str:
+    return GAME_KEY.format(code=code.upper())
+
+
+def _dt(value: str):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _float(value: str):
+    return float(value) if value else None
+
+
+def hydrate(code: str) -> bool:
+    """Load a game's current round and scores from Postgres into Redis.
+
+    Does nothing if the hash already exists, so concurrent callers can't
+    overwrite newer live state. Returns False if the game has no current
+    round.
+    """
+    game = Game.objects.only('id', 'code', 'current_round').get(code=code.upper())
+    game_round = Round.objects.filter(game=game, round_number=game.current_round).first()
+    if game_round is None:
+        return False
+
+    fields = {
+        'code': game.code,
+        'game_id': str(game.id),
+        'round_id': str(game_round.id),
+        'round_number': game_round.round_number,
+        'team_id': str(game_round.team_id),
+        'actor_id': str(game_round.actor_id or ''),
+        'category_id': str(game_round.category_id or ''),
+        'token': game_round.token,
+        'status': game_round.status,
+        'started_at': game_round.started_at.isoformat() if game_round.started_at else '',
+        'ended_at': game_round.ended_at.isoformat() if game_round.ended_at else '',
+        'time_taken_seconds': '' if game_round.time_taken_seconds is None else game_round.time_taken_seconds,
+        'points_awarded': game_round.points_awarded,
+        'multiplier': game_round.metadata.get('multiplier', 1.0),
+        'generation': uuid.uuid4().hex,
+        'version': 0,
+        'persisted_version': 0,
+    }
+    for team_id, total_score in Team.objects.filter(game=game).values_list('id', 'total_score'):
+        fields[f'score:{team_id}'] = total_score
+
+    args = []
+    for field, value in fields.items():
+        args.extend([field, value])
+    _script(HYDRATE_SCRIPT)(keys=[_game_key(game.code), ROUND_KEY.format(round_id=game_round.id)], args=args)
+    return True
+
+
+def code_for_round(round_id) -> str:
+    """Game code for a round, from Redis when the round is live."""
+    code = get_redis().get(ROUND_KEY.format(round_id=round_id))
+    if code:
+        return code
+    return Round.objects.values_list('game__code', flat=True).get(id=round_id)
+
+
+def _read(code: str) -> dict:
+    return get_redis().hgetall(_game_key(code))
+
+
+def _current(code: str) -> dict:
+    """Read the live hash, rebuilding it from Postgres if it is missing."""
+    state = _read(code)
+    if not state and hydrate(code):
+        state = _read(code)
+    return state
+
+
+def _transition(round_id, allowed, fields, error, score_field='', score_increment=0) -> dict:
+    """Apply a status transition atomically; returns the updated hash."""
+    code = code_for_round(round_id)
+    args = [str(round_id), ','.join(allowed), score_field, score_increment]
+    for field, value in fields.items():
+        args.extend([field, value])
+
+    keys = [_game_key(code), DIRTY_KEY]
+    result = _script(TRANSITION_SCRIPT)(keys=keys, args=args)
+    if result == -1 and hydrate(code):
+        result = _script(TRANSITION_SCRIPT)(keys=keys, args=args)
+    if result == -2 or result == -1:
+        raise ValueError("Round is not the current round")
+    if result == -3:
+        raise ValueError(error)
+    return _read(code)
+
+
+def _as_round(state: dict) -> Round:
+    """Build an unsaved Round mirroring the live hash, for serializers."""
+    return Round(
+        id=state['round_id'],
+        game_id=state['game_id'],
+        round_number=int(state['round_number']),
+        team_id=state['team_id'],
+        actor_id=state['actor_id'] or None,
+        category_id=state['category_id'] or None,
+        token=state['token'],
+        status=state['status'],
+        started_at=_dt(state['started_at']),
+        ended_at=_dt(state['ended_at']),
+        time_taken_seconds=_float(state['time_taken_seconds']),
+        points_awarded=int(state['points_awarded']),
+    )
+
+
+def actor_ready(round_id: str) -> Round:
+    state = _transition(
+        round_id, ('showing_qr', 'prompt_reveal', 'actor_ready'), {'status': 'actor_ready'},
+        error="Round is not waiting for the actor",
+    )
+    logger.info(f"Round {state['round_number']}: actor is ready")
+    return _as_round(state)
+
+
+def start_timer(round_id: str) -> Round:
+    state = _transition(
+        round_id, ('actor_ready', 'prompt_reveal', 'showing_qr'),
+        {'status': 'active', 'started_at': timezone.now().isoformat()},
+        error="Round is not ready to start timer",
+    )
+    logger.info(f"Round {state['round_number']}: timer started")
+    return _as_round(state)
+
+
+def correct_guess(round_id: str) -> dict:
+    code = code_for_round(round_id)
+    current = _current(code)
+    if current.get('round_id') != str(round_id) or current.get('status') != 'active':
+        raise ValueError("Round is not active")
+
+    now = timezone.now()
+    time_taken = (now - _dt(current['started_at'])).total_seconds()
+    points = calculate_points(time_taken, float(current['multiplier']))
+
+    state = _transition(
+        round_id, ('active',),
+        {
+            'status': 'guessed',
+            'ended_at': now.isoformat(),
+            'time_taken_seconds': round(time_taken, 1),
+            'points_awarded': points,
+        },
+        error="Round is not active",
+        score_field=f"score:{current['team_id']}",
+        score_increment=points,
+    )
+    prompt_cache.clear_payload(state['round_id'])
+    team_score = int(state[f"score:{state['team_id']}"])
+    logger.info(f"Round {state['round_number']}: guessed in {time_taken:.1f}s, {points} points")
+    return {
+        'round': _as_round(state),
+        'time_taken': round(time_taken, 1),
+        'points': points,
+        'team_score': team_score,
+    }
+
+
+def timeout_round(round_id: str) -> Round:
+    code = code_for_round(round_id)
+    current = _current(code)
+    now = timezone.now()
+    started_at = _dt(current.get('started_at', ''))
+    state = _transition(
+        round_id, ('active',),
+        {
+            'status': 'timeout',
+            'ended_at': now.isoformat(),
+            'time_taken_seconds': (now - started_at).total_seconds() if started_at else '',
+            'points_awarded': 0,
+        },
+        error="Round is not active",
+    )
+    prompt_cache.clear_payload(state['round_id'])
+    logger.info(f"Round {state['round_number']}: timed out")
+    return _as_round(state)
+
+
+def skip_round(round_id: str) -> Round:
+    code = code_for_round(round_id)
+    current = _current(code)
+    now = timezone.now()
+    started_at = _dt(current.get('started_at', ''))
+    state = _transition(
+        round_id,
+        ('active', 'showing_qr', 'prompt_reveal', 'actor_ready', 'selecting_actor', 'selecting_category'),
+        {
+            'status': 'skipped',
+            'ended_at': now.isoformat(),
+            'time_taken_seconds': (now - started_at).total_seconds() if started_at else '',
+            'points_awarded': 0,
+        },
+        error="Round cannot be skipped in current state",
+    )
+    prompt_cache.clear_payload(state['round_id'])
+    logger.info(f"Round {state['round_number']}: skipped")
+    return _as_round(state)
+
+
+def overlay(state: dict) -> dict:
+    """Apply live round status and scores to a ``get_game_state`` result."""
+    live = _read(state['code'])
+    if not live:
+        return state
+
+    for team in state['teams']:
+        score = live.get(f"score:{team['id']}")
+        if score is not None:
+            team['total_score'] = int(score)
+
+    current_round = state.get('round')
+    if current_round and current_round['id'] == live['round_id']:
+        current_round.update({
+            'status': live['status'],
+            'started_at': live['started_at'] or None,
+            'time_taken_seconds': _float(live['time_taken_seconds']),
+            'points_awarded': int(live['points_awarded']),
+        })
+    for slot in state.get('schedule', []):
+        if slot['round_number'] == int(live['round_number']):
+            slot['status'] = live['status']
+    return state
+
+
+def _write(state: dict):
+    with transaction.atomic():
+        Round.objects.filter(id=state['round_id']).update(
+            status=state['status'],
+            started_at=_dt(state['started_at']),
+            ended_at=_dt(state['ended_at']),
+            time_taken_seconds=_float(state['time_taken_seconds']),
+            points_awarded=int(state['points_awarded']),
+        )
+        for field, value in state.items():
+            if field.startswith('score:'):
+                Team.objects.filter(id=field[len('score:'):]).update(total_score=int(value))
+
+
+def persist_game(code: str) -> bool:
+    """Write a game's live state to Postgres if it has unpersisted changes.
+
+    Inside a transaction the hash is marked persisted only once it commits.
+    """
+    key = _game_key(code)
+    state = get_redis().hgetall(key)
+    if not state or state['version'] == state['persisted_version']:
+        return False
+
+    _write(state)
+    args = [state['code'], state['version'], state.get('generation', '')]
+    transaction.on_commit(lambda: _script(MARK_PERSISTED_SCRIPT)(keys=[key, DIRTY_KEY], args=args))
+    return True
+
+
+def persist_dirty() -> int:
+    """Persist every game with pending changes; returns games written."""
+    written = 0
+    for code in get_redis().smembers(DIRTY_KEY):
+        try:
+            written += persist_game(code)
+        except Exception as e:
+            logger.error(f"Failed to persist live state for game {code}: {e}", exc_info=True)
+    return written
+
+
+def _drop(code: str) -> bool:
+    """Persist and delete the hash, unless transitions keep landing; True if it is gone."""
+    key = _game_key(code)
+    for _ in range(DROP_ATTEMPTS):
+        state = get_redis().hgetall(key)
+        if not state:
+            return True
+        if state['version'] != state['persisted_version']:
+            _write(state)
+        args = [state['code'], state.get('generation', ''), state['version']]
+        if _script(DROP_SCRIPT)(keys=[key, DIRTY_KEY], args=args):
+            return True
+    logger.warning(f"Live state of game {code} kept changing; left for the writer")
+    return False
+
+
+def release(code: str):
+    """Persist pending changes before a Postgres-side change; drop the hash after it commits.
+
+    Call this before mutating a game's rounds or scores in Postgres. The
+    rows are written in the caller's transaction, so the change sees them;
+    if it rolls back, the hash and its dirty flag are left as they were.
+    After commit the hash is rebuilt from the new rows on next use.
+    """
+    persist_game(code)
+    transaction.on_commit(lambda: _drop(code))
+
+
+def rebuild_all() -> int:
+    """Crash recovery: persist and reload all in-progress games from Postgres."""
+    persist_dirty()
+    rebuilt = 0
+    for code in Game.objects.filter(status='in_progress').values_list('code', flat=True):
+        if _drop(code):
+            rebuilt += hydrate(code)
+    return rebuilt
@@ -0,0 +1,49 @@
+"""Owned Redis locks for background jobs.
+
+The lock key holds a random token and expires after ``ttl`` seconds, so a
+crashed holder can't block others forever. Extending and releasing check
+the token in a Lua script, so a holder that overran its TTL can neither
+delete nor prolong a lock that has since been taken by someone else.
+"""
+import uuid
+from .redis_client import get_redis
+
+# KEYS[1]=lock key; ARGV[1]=token
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# KEYS[1]=lock key; ARGV[1]=token, ARGV[2]=ttl
+EXTEND_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class LockLost(Exception):
+    """The lock expired and was taken by another holder while work was running."""
+
+
+class RedisLock:
+    """``SET NX EX`` lock with a per-holder token."""
+
+    def __init__(self, key: str, ttl: int):
+        self.key = key
+        self.ttl = ttl
+        self.token = uuid.uuid4().hex
+
+    def acquire(self) -> bool:
+        return bool(get_redis().set(self.key, self.token, nx=True, ex=self.ttl))
+
+    def extend(self):
+        """Reset the TTL; raises LockLost if the lock is no longer ours."""
+        if not get_redis().eval(EXTEND_SCRIPT, 1, self.key, self.token, self.ttl):
+            raise LockLost(self.key)
+
+    def release(self):
+        get_redis().eval(RELEASE_SCRIPT, 1, self.key, self.token)
@@ -0,0 +1,96 @@
+"""Management command to benchmark channel layer broadcast fan-out.
+
+For each layer and group size it adds that many channels to a group,
+broadcasts ``--messages`` times and waits until every member received
+each message, reporting latency percentiles and Redis commands executed
+per broadcast (from ``INFO commandstats``, so run it against an otherwise
+idle Redis).
+"""
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+from game.redis_client import get_redis
+
+
+def _redis_calls() -> int:
+    stats = get_redis().info('commandstats')
+    return sum(entry['calls'] for name, entry in stats.items() if name != 'cmdstat_info')
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark group_send latency and Redis ops per broadcast across channel layers and group sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--layers', default='local,redis,pubsub',
+            help=f'Comma-separated layer names ({", ".join(settings.CHANNEL_LAYER_BACKENDS)}) or dotted paths',
+        )
+        parser.add_argument('--sizes', default='2,8,16,32,64', help='Comma-separated group sizes')
+        parser.add_argument('--messages', type=int, default=200, help='Broadcasts per group size')
+        parser.add_argument('--json', dest='json_path', help='Also write results to this JSON file')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        results = []
+        for name in options['layers'].split(','):
+            backend = settings.CHANNEL_LAYER_BACKENDS.get(name, name)
+            for size in sizes:
+                in_memory = name == 'memory'
+                layer = import_string(backend)(**({} if in_memory else {'hosts': [settings.REDIS_URL]}))
+                result = asyncio.run(self._bench(layer, size, options['messages'], counts_redis=not in_memory))
+                result.update({'layer': name, 'group_size': size})
+                results.append(result)
+                self._print(result)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+
+    async def _bench(self, layer, size, messages, counts_redis):
+        group = f'bench_{uuid.uuid4().hex[:8]}'
+        channels = [await layer.new_channel() for _ in range(size)]
+        for channel in channels:
+            await layer.group_add(group, channel)
+
+        # Warm up connections and subscriptions before measuring.
+        await layer.group_send(group, {'type': 'bench.message'})
+        await asyncio.gather(*(layer.receive(channel) for channel in channels))
+
+        calls_before = _redis_calls() if counts_redis else 0
+        latencies = []
+        for n in range(messages):
+            started = time.perf_counter()
+            await layer.group_send(group, {'type': 'bench.message', 'n': n})
+            await asyncio.gather(*(layer.receive(channel) for channel in channels))
+            latencies.append((time.perf_counter() - started) * 1000)
+        calls = (_redis_calls() - calls_before) / messages if counts_redis else None
+
+        for channel in channels:
+            await layer.group_discard(group, channel)
+        if hasattr(layer, 'flush'):
+            await layer.flush()
+
+        return {
+            'p50_ms': round(statistics.median(latencies), 3),
+            'p95_ms': round(_percentile(latencies, 95), 3),
+            'max_ms': round(max(latencies), 3),
+            'redis_ops_per_broadcast': round(calls, 1) if calls is not None else None,
+        }
+
+    def _print(self, result):
+        ops = result['redis_ops_per_broadcast']
+        self.stdout.write(
+            f"{result['layer']:>8}  group={result['group_size']:<4} "
+            f"p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms max={result['max_ms']:.2f}ms "
+            f"redis_ops/broadcast={'-' if ops is None else ops}"
+        )
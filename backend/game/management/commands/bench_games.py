@@ -0,0 +1,117 @@
+"""Management command to load-test a running server with concurrent games.
+
+Creates ``--games`` games through the API, joins ``--players`` sockets to
+each, then has every host rename a team as fast as broadcasts come back
+for ``--duration`` seconds. Each rename is a database write, a game state
+build and a broadcast, i.e. a typical game action. Reports completed
+actions per second and the time until every socket in the game saw the
+update.
+
+Run it against the server with different ``WEB_WORKERS`` values (and
+``WS_RATE_LIMITS_ENABLED=False``, or the limits cap each game) to see how
+throughput scales with worker processes.
+"""
+import asyncio
+import json
+import statistics
+import time
+import urllib.request
+from django.core.management.base import BaseCommand, CommandError
+
+try:
+    import websockets
+except ImportError:  # installed with uvicorn[standard]
+    websockets = None
+
+
+def _post(url: str, data: dict) -> dict:
+    request = urllib.request.Request(
+        url, data=json.dumps(data).encode(), headers={'Content-Type': 'application/json'}, method='POST',
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())
+
+
+class Command(BaseCommand):
+    help = 'Load-test a running server with concurrent games over WebSockets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help='Server base URL')
+        parser.add_argument('--games', default='5,10,20', help='Comma-separated concurrent game counts to run')
+        parser.add_argument('--players', type=int, default=6, help='Sockets per game (host included)')
+        parser.add_argument('--duration', type=float, default=20, help='Seconds to run each step')
+
+    def handle(self, *args, **options):
+        if websockets is None:
+            raise CommandError("bench_games needs the 'websockets' package (pip install 'uvicorn[standard]')")
+        base_url = options['url'].rstrip('/')
+        ws_url = base_url.replace('http', 'ws', 1)
+        for games in [int(count) for count in options['games'].split(',')]:
+            result = asyncio.run(self._step(base_url, ws_url, games, options['players'], options['duration']))
+            self.stdout.write(
+                f"games={games:<4} actions/s={result['actions_per_second']:<8.1f} "
+                f"deliveries/s={result['deliveries_per_second']:<9.1f} "
+                f"p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms throttled={result['throttled']}"
+            )
+            if result['throttled']:
+                self.stdout.write(self.style.WARNING('Actions were rate limited; run the server with WS_RATE_LIMITS_ENABLED=False'))
+
+    async def _step(self, base_url, ws_url, games, players, duration):
+        sessions = await asyncio.gather(*(self._setup_game(base_url, ws_url, players) for _ in range(games)))
+        deadline = time.perf_counter() + duration
+        stats = {'latencies': [], 'throttled': 0}
+        try:
+            await asyncio.gather(*(self._play(session, deadline, stats) for session in sessions))
+        finally:
+            for session in sessions:
+                await asyncio.gather(*(socket.close() for socket in session['sockets']))
+
+        latencies = stats['latencies'] or [0]
+        return {
+            'actions_per_second': len(stats['latencies']) / duration,
+            'deliveries_per_second': len(stats['latencies']) * players / duration,
+            'p50_ms': statistics.median(latencies),
+            'p95_ms': sorted(latencies)[int(len(latencies) * 0.95)] if len(latencies) > 1 else latencies[0],
+            'throttled': stats['throttled'],
+        }
+
+    async def _setup_game(self, base_url, ws_url, players):
+        created = await asyncio.to_thread(_post, f'{base_url}/api/games/', {'host_name': 'Bench host'})
+        code = created['code']
+        tokens = [created['player_token']]
+        for n in range(players - 1):
+            joined = await asyncio.to_thread(
+                _post, f'{base_url}/api/games/{code}/join/', {'player_name': f'Bench {n}'},
+            )
+            tokens.append(joined['player_token'])
+
+        sockets = [await websockets.connect(f'{ws_url}/ws/game/{code}/?token={token}') for token in tokens]
+        return {'code': code, 'team_id': created['game']['teams'][0]['id'], 'sockets': sockets}
+
+    async def _play(self, session, deadline, stats):
+        host = session['sockets'][0]
+        n = 0
+        while time.perf_counter() < deadline:
+            n += 1
+            name = f"{session['code']}-{n}"
+            started = time.perf_counter()
+            await host.send(json.dumps({'type': 'update_team', 'team_id': session['team_id'], 'name': name}))
+            waits = [asyncio.ensure_future(self._await_team_name(socket, name, stats)) for socket in session['sockets']]
+            try:
+                await asyncio.wait_for(asyncio.gather(*waits), timeout=10)
+            except (asyncio.TimeoutError, RuntimeError):
+                for wait in waits:
+                    wait.cancel()
+                break
+            stats['latencies'].append((time.perf_counter() - started) * 1000)
+
+    async def _await_team_name(self, socket, name, stats):
+        while True:
+            message = json.loads(await socket.recv())
+            if message.get('code') == 'rate_limited':
+                stats['throttled'] += 1
+                raise RuntimeError('rate limited')
+            if message.get('type') == 'team_updated' and any(
+                team['name'] == name for team in message['data']['teams']
+            ):
+                return
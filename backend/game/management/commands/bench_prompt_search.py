@@ -0,0 +1,121 @@
+"""Management command to benchmark prompt search on a large synthetic catalog.
+
+Fills an inactive "Search benchmark" category (invisible to games and the
+catalog bundles) up to ``--prompts`` prompts with generated English and
+Arabic titles, then times the old admin search (``ILIKE`` on both
+titles), the admin's indexed substring search and ``search_prompts`` for
+the same queries. Run it against PostgreSQL; ``--cleanup`` removes the
+benchmark prompts.
+"""
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from game.models import Category, Prompt
+from game.search import search_prompts, substring_filter
+from game.text import search_text
+
+CATEGORY_NAME = 'Search benchmark'
+BATCH_SIZE = 5000
+RESULTS = 20
+
+SYLLABLES = ['ka', 'ri', 'mon', 'tel', 'sa', 'vor', 'lin', 'de', 'mar', 'zu', 'pen', 'gro', 'shi', 'tan', 'bel']
+ARABIC_WORDS = ['مُحَمَّد', 'صَلاح', 'أَحمد', 'إِسماعيل', 'آمال', 'مدرسة', 'القاهرة', 'نَجم', 'مصطفى', 'ليلى', 'بيت',
+                'الحارة', 'عِشق', 'السينما', 'فارس', 'مَدينة', 'الشمس', 'قَمر', 'سِرّ', 'الصحراء']
+DIACRITICS = ['َ', 'ُ', 'ِ', 'ّ', 'ْ']
+
+
+def _english_word(rng) -> str:
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+
+def _arabic_word(rng) -> str:
+    word = rng.choice(ARABIC_WORDS)
+    return word + rng.choice(DIACRITICS) if rng.random() < 0.3 else word
+
+
+class Command(BaseCommand):
+    help = 'Benchmark prompt search against a large synthetic catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prompts', type=int, default=1_000_000, help='Benchmark prompts to have in the catalog')
+        parser.add_argument('--queries', type=int, default=200, help='Queries per search method')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for titles and queries')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the benchmark prompts and exit')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            deleted, _ = Category.objects.filter(name=CATEGORY_NAME).delete()
+            self.stdout.write(f'Deleted {deleted} benchmark rows.')
+            return
+
+        rng = random.Random(options['seed'])
+        self._fill(options['prompts'], rng)
+        queries = self._queries(options['queries'], rng)
+        self.stdout.write(f'Database: {connection.vendor}; {Prompt.objects.count()} prompts; {len(queries)} queries each.')
+
+        methods = {
+            'ILIKE on title/title_ar (old admin)': lambda q: Prompt.objects.filter(
+                Q(title__icontains=q) | Q(title_ar__icontains=q))[:RESULTS],
+            'indexed substring (admin)': lambda q: Prompt.objects.filter(substring_filter(q))[:RESULTS],
+            'search_prompts (API)': lambda q: search_prompts(q)[:RESULTS],
+        }
+        for label, method in methods.items():
+            timings, hits = [], 0
+            for query in queries:
+                started = time.perf_counter()
+                hits += bool(list(method(query)))
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f'{label:<36} p50={statistics.median(timings):8.2f}ms '
+                f'p95={timings[int(len(timings) * 0.95) - 1]:8.2f}ms '
+                f'max={timings[-1]:8.2f}ms  queries with results={hits}/{len(queries)}'
+            )
+
+        if connection.vendor == 'postgresql':
+            self.stdout.write('\nPlan of search_prompts:')
+            self.stdout.write(search_prompts(queries[0])[:RESULTS].explain())
+
+    def _fill(self, target: int, rng):
+        category, _ = Category.objects.get_or_create(
+            name=CATEGORY_NAME, defaults={'is_active': False, 'genre': 'general', 'icon': '🔎'},
+        )
+        existing = category.prompts.count()
+        if existing >= target:
+            return
+        self.stdout.write(f'Generating {target - existing} prompts...')
+        started = time.perf_counter()
+        for offset in range(existing, target, BATCH_SIZE):
+            batch = []
+            for _ in range(min(BATCH_SIZE, target - offset)):
+                title = ' '.join(_english_word(rng) for _ in range(rng.randint(1, 4)))
+                title_ar = ' '.join(_arabic_word(rng) for _ in range(rng.randint(1, 3)))
+                batch.append(Prompt(
+                    category=category, title=title, title_ar=title_ar,
+                    search_text=search_text(title, title_ar), is_active=False,
+                ))
+            Prompt.objects.bulk_create(batch)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE game_prompt')
+        self.stdout.write(f'Generated in {time.perf_counter() - started:.0f}s.')
+
+    def _queries(self, count: int, rng) -> list:
+        """Whole words, prefixes, Arabic without diacritics or with another alef form, and typos."""
+        queries = []
+        for n in range(count):
+            kind = n % 4
+            if kind == 0:
+                queries.append(_english_word(rng).lower())
+            elif kind == 1:
+                queries.append(_english_word(rng)[:5])
+            elif kind == 2:
+                queries.append(search_text('', rng.choice(ARABIC_WORDS)).replace('ا', 'أ', 1))
+            else:
+                word = _english_word(rng)
+                position = rng.randrange(1, len(word))
+                queries.append(word[:position] + word[position + 1:])
+        return queries
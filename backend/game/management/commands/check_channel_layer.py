@@ -0,0 +1,87 @@
+"""Management command to verify group delivery across nodes.
+
+Creates two instances of a channel layer to stand in for two Daphne
+processes, builds a group with members on both, and checks that every
+broadcast reaches each current member exactly once, whichever node sends
+it, including after members leave. Useful after changing ``CHANNEL_LAYER``.
+"""
+import asyncio
+import uuid
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+SETTLE_SECONDS = 2
+
+
+class Command(BaseCommand):
+    help = 'Check that group broadcasts reach mixed local/remote members exactly once'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--layer', default=settings.CHANNEL_LAYER, help='Layer name or dotted path')
+        parser.add_argument('--local', type=int, default=3, help='Members on the sending node')
+        parser.add_argument('--remote', type=int, default=2, help='Members on the other node')
+
+    def handle(self, *args, **options):
+        backend = settings.CHANNEL_LAYER_BACKENDS.get(options['layer'], options['layer'])
+        if options['layer'] == 'memory':
+            raise CommandError("The in-memory layer cannot span nodes")
+        layer_class = import_string(backend)
+        failures = asyncio.run(self._check(layer_class, options['local'], options['remote']))
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS(f"{backend}: all broadcasts delivered exactly once"))
+
+    async def _check(self, layer_class, local_count, remote_count):
+        nodes = [layer_class(hosts=[settings.REDIS_URL]) for _ in range(2)]
+        group = f'check_{uuid.uuid4().hex[:8]}'
+        members = {}
+        for index, count in ((0, local_count), (1, remote_count)):
+            for _ in range(count):
+                channel = await nodes[index].new_channel()
+                await nodes[index].group_add(group, channel)
+                members[channel] = index
+
+        received = {channel: [] for channel in members}
+        readers = [
+            asyncio.ensure_future(self._read(nodes[index], channel, received[channel]))
+            for channel, index in members.items()
+        ]
+        expected = {channel: [] for channel in members}
+        try:
+            for sender in (0, 1):
+                await self._broadcast(nodes[sender], group, f'from-node-{sender}', members, expected)
+
+            # Drop one member on each node; the rest must still get exactly one copy.
+            for index in (0, 1):
+                leaving = next((c for c, i in members.items() if i == index), None)
+                if leaving:
+                    await nodes[index].group_discard(group, leaving)
+                    del members[leaving]
+            for sender in (0, 1):
+                await self._broadcast(nodes[sender], group, f'after-discard-{sender}', members, expected)
+
+            await asyncio.sleep(SETTLE_SECONDS)
+        finally:
+            for reader in readers:
+                reader.cancel()
+            for channel, index in members.items():
+                await nodes[index].group_discard(group, channel)
+            for node in nodes:
+                await node.flush()
+
+        return [
+            f"member {channel} expected {sorted(expected[channel])}, received {sorted(got)}"
+            for channel, got in received.items()
+            if sorted(got) != sorted(expected[channel])
+        ]
+
+    async def _read(self, layer, channel, into):
+        while True:
+            message = await layer.receive(channel)
+            into.append(message['label'])
+
+    async def _broadcast(self, layer, group, label, members, expected):
+        await layer.group_send(group, {'type': 'check.message', 'label': label})
+        for channel in members:
+            expected[channel].append(label)
@@ -0,0 +1,140 @@
+"""Management command to move prompt media to content-addressed names.
+
+Files saved before ``game.storage.ContentAddressedStorage`` have arbitrary
+names (``prompts/photo_x1Yz.jpg``). This hashes each referenced file,
+stores it under its hash (once, however many prompts use it), points the
+prompts at the new names and removes the old files. ``--prune`` then
+deletes media files no prompt references any more, which is also how
+files replaced later are cleaned up; the ``media-pruner`` compose service
+runs it with ``--loop``.
+"""
+import logging
+import os
+import time
+from django.core.files import File
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from game import catalog
+from game.models import Prompt
+from game.storage import ContentAddressedStorage, content_hash, hashed_name, is_hashed
+
+SAVE_BATCH = 500
+PRUNE_MIN_AGE = 3600
+MEDIA_DIRS = ['prompts']
+
+logger = logging.getLogger('game')
+
+
+def referenced_names(prompt) -> list:
+    names = [prompt.image.name if prompt.image else '', prompt.mirrored_image.name if prompt.mirrored_image else '']
+    names += [variant['name'] for variant in (prompt.image_variants or {}).get('variants', [])]
+    return [name for name in names if name]
+
+
+class Command(BaseCommand):
+    help = 'Rename prompt media to content hashes, merging duplicates, and prune unreferenced files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prune', action='store_true', help='Also delete media files no prompt references')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+        parser.add_argument('--loop', action='store_true', help='Keep running on an interval')
+        parser.add_argument('--interval', type=float, default=86400, help='Seconds between runs with --loop')
+
+    def handle(self, *args, **options):
+        self.storage = storages['default']
+        if not isinstance(self.storage, ContentAddressedStorage):
+            raise CommandError('STORAGES["default"] is not game.storage.ContentAddressedStorage')
+        while True:
+            try:
+                self._run(options['dry_run'], options['prune'])
+            except Exception:
+                if not options['loop']:
+                    raise
+                logger.error('Media dedupe failed, retrying on the next pass', exc_info=True)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def _run(self, dry_run: bool, prune: bool):
+        started = time.perf_counter()
+
+        fields = ['id', 'image', 'mirrored_image', 'image_variants']
+        prompts = list(Prompt.objects.only(*fields))
+        renames, missing = {}, 0
+        for prompt in prompts:
+            for name in referenced_names(prompt):
+                if is_hashed(name) or name in renames:
+                    continue
+                if not self.storage.exists(name):
+                    missing += 1
+                    self.stderr.write(f'  missing: {name}')
+                    continue
+                renames[name] = self._rehash(name, dry_run)
+
+        if dry_run:
+            changed = [prompt for prompt in prompts if set(referenced_names(prompt)) & renames.keys()]
+        else:
+            changed = [prompt for prompt in prompts if self._rename(prompt, renames)]
+            with transaction.atomic():
+                Prompt.objects.bulk_update(changed, ['image', 'mirrored_image', 'image_variants'], batch_size=SAVE_BATCH)
+            for old in renames:
+                self.storage.delete_unshared(old)
+            if changed:
+                catalog.mark_dirty()
+
+        distinct = len(set(renames.values()))
+        self.stdout.write(
+            f'{"Would rename" if dry_run else "Renamed"} {len(renames)} files to {distinct} content-addressed files '
+            f'({len(renames) - distinct} duplicates merged) across {len(changed)} prompts; {missing} missing.'
+        )
+
+        if prune:
+            referenced = {renames.get(name, name) for prompt in prompts for name in referenced_names(prompt)}
+            self._prune(referenced, dry_run)
+        self.stdout.write(self.style.SUCCESS(f'Done in {time.perf_counter() - started:.1f}s.'))
+
+    def _rehash(self, name: str, dry_run: bool) -> str:
+        with self.storage.open(name, 'rb') as source:
+            if dry_run:
+                return hashed_name(name, content_hash(source))
+            return self.storage.save(name, File(source, name=os.path.basename(name)))
+
+    @staticmethod
+    def _rename(prompt, renames: dict) -> bool:
+        changed = False
+        for field in ('image', 'mirrored_image'):
+            file = getattr(prompt, field)
+            if file and file.name in renames:
+                setattr(prompt, field, renames[file.name])
+                changed = True
+        variants = prompt.image_variants or {}
+        for variant in variants.get('variants', []):
+            if variant['name'] in renames:
+                variant['name'] = renames[variant['name']]
+                changed = True
+        if variants.get('source') in renames:
+            variants['source'] = renames[variants['source']]
+            changed = True
+        return changed
+
+    def _prune(self, referenced: set, dry_run: bool):
+        cutoff = time.time() - PRUNE_MIN_AGE
+        removed, freed = 0, 0
+        for top in MEDIA_DIRS:
+            root = os.path.join(self.storage.location, top)
+            for directory, _, files in os.walk(root):
+                for filename in files:
+                    path = os.path.join(directory, filename)
+                    name = os.path.relpath(path, self.storage.location).replace(os.sep, '/')
+                    stat = os.stat(path)
+                    # Skip fresh files: their prompt may not be committed yet.
+                    if name in referenced or stat.st_mtime > cutoff:
+                        continue
+                    removed += 1
+                    freed += stat.st_size
+                    if not dry_run:
+                        self.storage.delete_unshared(name)
+        self.stdout.write(
+            f'{"Would prune" if dry_run else "Pruned"} {removed} unreferenced files ({freed / 1024 / 1024:.1f} MB).'
+        )
@@ -0,0 +1,29 @@
+"""Management command to drain this container's WebSocket connections before a restart."""
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from game import drain
+
+
+class Command(BaseCommand):
+    help = 'Stop accepting sockets, tell connected clients to reconnect elsewhere, then wait'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--wait', type=float, default=None,
+            help='Seconds to wait for clients to leave (default: DRAIN_RECONNECT_JITTER + 5)',
+        )
+        parser.add_argument('--cancel', action='store_true', help='Leave drain mode and accept sockets again')
+
+    def handle(self, *args, **options):
+        if options['cancel']:
+            drain.clear()
+            self.stdout.write('Drain cancelled; accepting connections.')
+            return
+
+        Path(settings.DRAIN_FILE).write_text(str(time.time()))
+        wait = options['wait'] if options['wait'] is not None else settings.DRAIN_RECONNECT_JITTER + 5
+        self.stdout.write(f'Draining; waiting {wait:.0f}s for clients to reconnect elsewhere...')
+        time.sleep(wait)
+        self.stdout.write(self.style.SUCCESS('Drained. Safe to stop this container.'))
@@ -0,0 +1,29 @@
+"""Management command to move buffered game events into the database."""
+import logging
+import time
+from django.core.management.base import BaseCommand
+from game.events import flush_events
+
+logger = logging.getLogger('game')
+
+
+class Command(BaseCommand):
+    help = 'Flush buffered game events into the GameEvent table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep flushing on an interval')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between flushes with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                written = flush_events()
+                if written or not options['loop']:
+                    self.stdout.write(f'Flushed {written} events.')
+            except Exception:
+                if not options['loop']:
+                    raise
+                logger.error('Event flush failed, retrying on the next pass', exc_info=True)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+"""Management command to fold buffered prompt usage counts into the database."""
+import logging
+import time
+from django.core.management.base import BaseCommand
+from game.usage import flush_prompt_usage
+
+logger = logging.getLogger('game')
+
+
+class Command(BaseCommand):
+    help = 'Flush buffered prompt usage counters into Prompt.times_used'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep flushing on an interval')
+        parser.add_argument('--interval', type=int, default=60, help='Seconds between flushes with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                updated = flush_prompt_usage()
+                self.stdout.write(f'Flushed usage for {updated} prompts.')
+            except Exception:
+                if not options['loop']:
+                    raise
+                logger.error('Usage flush failed, retrying on the next pass', exc_info=True)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,65 @@
+"""Management command to attach images to prompts from a ZIP with a manifest.
+
+With ``--queue`` it instead runs the ZIP imports uploaded on the Prompt
+admin page (see ``game.import_jobs``), one after another, until stopped.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from game import import_jobs
+from game.image_import import MANIFEST_COLUMNS, MANIFEST_NAME, import_images
+
+logger = logging.getLogger('game')
+
+RETRY_DELAY = 5
+
+
+class Command(BaseCommand):
+    help = f'Import prompt images from a ZIP containing {MANIFEST_NAME} ({", ".join(MANIFEST_COLUMNS)})'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='ZIP file to import')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes')
+        parser.add_argument('--queue', action='store_true', help='Run the imports queued from the admin until stopped')
+
+    def handle(self, *args, **options):
+        self.workers = options['workers']
+        if options['queue']:
+            self._run_queue()
+            return
+        if not options['path'] or not os.path.isfile(options['path']):
+            raise CommandError(f"{options['path'] or 'A ZIP path'} does not exist")
+
+        def progress(result):
+            self.stdout.write(f'  {result}...')
+
+        result = self._import(options['path'], progress)
+        for line, message in result.errors:
+            self.stderr.write(f'line {line}: {message}' if line else message)
+        if result.failed > len(result.errors):
+            self.stderr.write(f'... and {result.failed - len(result.errors)} more errors')
+        self.stdout.write(self.style.SUCCESS(str(result)))
+
+    def _import(self, path: str, progress):
+        # Workers don't use the database; don't let them inherit open connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=django.setup) as pool:
+            return import_images(path, pool, max_in_flight=self.workers * 2, progress=progress)
+
+    def _run_queue(self):
+        requeued = import_jobs.requeue_abandoned()
+        if requeued:
+            self.stdout.write(f'Queued {requeued} interrupted imports again.')
+        while True:
+            try:
+                job_id = import_jobs.run_next(self._import)
+            except Exception:
+                logger.error('Could not run queued image imports', exc_info=True)
+                time.sleep(RETRY_DELAY)
+                continue
+            if job_id:
+                self.stdout.write(f"Image import {job_id}: {(import_jobs.get(job_id) or {}).get('summary')}")
@@ -0,0 +1,33 @@
+"""Management command to import prompts from a CSV file of any size."""
+from django.core.management.base import BaseCommand, CommandError
+from game.prompt_import import BATCH_SIZE, COLUMNS, import_prompts
+
+
+class Command(BaseCommand):
+    help = f'Import prompts from a CSV file (columns: {", ".join(COLUMNS)})'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file to import')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per bulk insert')
+        parser.add_argument('--dry-run', action='store_true', help='Validate rows without writing anything')
+
+    def handle(self, *args, **options):
+        try:
+            csv_file = open(options['path'], 'rb')
+        except OSError as e:
+            raise CommandError(str(e))
+
+        def progress(result):
+            self.stdout.write(f'  {result}...')
+
+        with csv_file:
+            result = import_prompts(
+                csv_file, batch_size=options['batch_size'], dry_run=options['dry_run'], progress=progress,
+            )
+
+        for line, message in result.errors:
+            self.stderr.write(f'line {line}: {message}')
+        if result.failed > len(result.errors):
+            self.stderr.write(f'... and {result.failed - len(result.errors)} more errors')
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {result.created} prompts, rejected {result.failed} rows.'))
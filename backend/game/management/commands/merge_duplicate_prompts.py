@@ -0,0 +1,113 @@
+"""Management command to merge duplicate prompts.
+
+Prompts of one category sharing a ``title_key`` ("Spider-Man",
+"Spiderman", "spider man") are duplicates. Per group one prompt is kept:
+active first, then one with an image, then the most used. The others'
+rounds are pointed at it, their usage counts added to it, blank fields
+(``title_ar``, ``image_url``, ``metadata`` keys, and the uploaded or
+mirrored image with its variants) filled from them, and they are deleted. Buffered usage counts are flushed first so none are
+lost with the deleted rows.
+"""
+import redis
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from game import catalog, usage
+from game.models import Prompt, Round
+
+GROUP_BATCH = 500
+USAGE_FLUSH_WAIT = 30
+MERGED_FIELDS = [
+    'title_ar', 'image_url', 'times_used', 'metadata', 'image', 'image_width', 'image_height',
+    'mirrored_image', 'mirrored_from', 'image_variants',
+]
+
+
+def _image_rank(prompt) -> int:
+    """An uploaded image beats a mirrored copy, which beats a bare external URL."""
+    if prompt.image:
+        return 3
+    if prompt.local_image:
+        return 2
+    return 1 if prompt.image_url else 0
+
+
+def _rank(prompt):
+    return (prompt.is_active, _image_rank(prompt), prompt.times_used)
+
+
+def _take_images(keeper, prompt):
+    """Fill the keeper's missing image fields from a duplicate (media files are shared, not copied)."""
+    if not keeper.image and prompt.image:
+        keeper.image = prompt.image.name
+        keeper.image_width, keeper.image_height = prompt.image_width, prompt.image_height
+        keeper.image_variants = prompt.image_variants
+    if not keeper.image_url and prompt.image_url:
+        keeper.image_url = prompt.image_url
+        keeper.mirrored_image, keeper.mirrored_from = prompt.mirrored_image.name or None, prompt.mirrored_from
+        if not keeper.image:
+            keeper.image_variants = prompt.image_variants
+
+
+class Command(BaseCommand):
+    help = 'Merge prompts duplicated within a category (same normalized title), repointing their rounds'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='List the duplicates without merging')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        if not dry_run:
+            try:
+                usage.flush_prompt_usage(wait=USAGE_FLUSH_WAIT)
+            except redis.RedisError as e:
+                self.stderr.write(f'Could not flush buffered usage counts ({e}); counts of merged prompts may be lost.')
+
+        groups = list(
+            Prompt.objects.exclude(title_key='').values_list('category_id', 'title_key')
+            .annotate(count=Count('id')).filter(count__gt=1).order_by()
+        )
+        if not groups:
+            self.stdout.write('No duplicate prompts.')
+            return
+
+        merged = 0
+        for start in range(0, len(groups), GROUP_BATCH):
+            keys = {(category_id, key) for category_id, key, _ in groups[start:start + GROUP_BATCH]}
+            members = {}
+            prompts = Prompt.objects.filter(
+                category_id__in={category_id for category_id, _ in keys},
+                title_key__in={key for _, key in keys},
+            ).select_related('category')
+            for prompt in prompts:
+                if (prompt.category_id, prompt.title_key) in keys:
+                    members.setdefault((prompt.category_id, prompt.title_key), []).append(prompt)
+            with transaction.atomic():
+                for group in members.values():
+                    merged += self._merge(group, dry_run)
+
+        if not dry_run:
+            catalog.mark_dirty()
+        verb = 'Would merge' if dry_run else 'Merged'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {merged} duplicates into {len(groups)} prompts.'))
+
+    def _merge(self, group: list, dry_run: bool) -> int:
+        group.sort(key=_rank, reverse=True)
+        keeper, duplicates = group[0], group[1:]
+        rounds = Round.objects.filter(prompt__in=duplicates)
+        self.stdout.write(
+            f'  {keeper.category.name}: {keeper.title} <- '
+            f"{', '.join(prompt.title for prompt in duplicates)} ({rounds.count()} rounds)"
+        )
+        if dry_run:
+            return len(duplicates)
+
+        rounds.update(prompt=keeper)
+        for prompt in duplicates:
+            keeper.times_used += prompt.times_used
+            keeper.title_ar = keeper.title_ar or prompt.title_ar
+            _take_images(keeper, prompt)
+            keeper.metadata = {**prompt.metadata, **keeper.metadata}
+        Prompt.objects.filter(pk__in=[prompt.pk for prompt in duplicates]).delete()
+        keeper.save(update_fields=MERGED_FIELDS)
+        return len(duplicates)
@@ -0,0 +1,90 @@
+"""Management command to copy external prompt images into local media storage."""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from game import catalog, mirror
+from game.models import Prompt
+
+logger = logging.getLogger('game')
+
+SAVE_BATCH = 100
+FIELDS = ['mirrored_image', 'mirrored_from', 'image_variants']
+# A failed URL is skipped for RETRY_BACKOFF seconds, doubling per failure up to RETRY_BACKOFF_MAX.
+RETRY_BACKOFF = 300
+RETRY_BACKOFF_MAX = 24 * 60 * 60
+
+
+class Command(BaseCommand):
+    help = 'Mirror external prompt image_url files into local media and render their variants'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8, help='Parallel downloads')
+        parser.add_argument('--limit', type=int, default=None, help='Mirror at most this many prompts per pass')
+        parser.add_argument('--loop', action='store_true', help='Keep mirroring new URLs on an interval')
+        parser.add_argument('--interval', type=float, default=300, help='Seconds between passes with --loop')
+
+    def handle(self, *args, **options):
+        failed = {}
+        while True:
+            try:
+                self._pass(options, failed)
+            except Exception:
+                if not options['loop']:
+                    raise
+                logger.error('Image mirror pass failed', exc_info=True)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def _pass(self, options, failed: dict):
+        """Mirror once; ``failed`` maps ``(id, url)`` to ``(failures, retry_at)``."""
+        prompts = (
+            Prompt.objects.filter(Q(image='') | Q(image__isnull=True))
+            .filter(Q(image_url__startswith='http://') | Q(image_url__startswith='https://'))
+            .exclude(mirrored_from=F('image_url'))
+            .only('id', 'image', 'image_url', *FIELDS)
+        )
+        now = time.monotonic()
+        todo = [p for p in prompts.iterator() if failed.get((p.pk, p.image_url), (0, now))[1] <= now]
+        if options['limit'] is not None:
+            todo = todo[:options['limit']]
+        if not todo:
+            if not options['loop']:
+                self.stdout.write('No external images to mirror.')
+            return
+
+        started = time.perf_counter()
+        mirrored, pending = 0, []
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            futures = {pool.submit(mirror.mirror, prompt.pk, prompt.image_url): prompt for prompt in todo}
+            for future in as_completed(futures):
+                prompt = futures[future]
+                try:
+                    values = future.result()
+                except (mirror.MirrorError, OSError, ValueError) as e:
+                    failures = failed.get((prompt.pk, prompt.image_url), (0, 0))[0] + 1
+                    backoff = min(RETRY_BACKOFF * 2 ** (failures - 1), RETRY_BACKOFF_MAX)
+                    failed[(prompt.pk, prompt.image_url)] = (failures, time.monotonic() + backoff)
+                    self.stderr.write(f'  {prompt.image_url}: {e} (retrying in {backoff}s)')
+                    continue
+                failed.pop((prompt.pk, prompt.image_url), None)
+                pending.append(Prompt(pk=prompt.pk, **values))
+                if len(pending) >= SAVE_BATCH:
+                    mirrored += self._save(pending)
+                    pending = []
+        mirrored += self._save(pending)
+        if mirrored:
+            catalog.mark_dirty()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Mirrored {mirrored} of {len(todo)} images in {elapsed:.1f}s, '
+            f'{len(todo) - mirrored} failed.'
+        ))
+
+    def _save(self, updated: list) -> int:
+        # Copies of URLs these prompts no longer use are left for ``dedupe_media --prune``.
+        Prompt.objects.bulk_update(updated, FIELDS)
+        return len(updated)
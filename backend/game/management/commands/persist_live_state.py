@@ -0,0 +1,41 @@
+"""Management command that writes Redis-resident game state back to PostgreSQL."""
+import logging
+import time
+from django.core.management.base import BaseCommand
+from game import live_state
+
+logger = logging.getLogger('game')
+
+
+class Command(BaseCommand):
+    help = 'Persist live (Redis) game state to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep persisting on an interval')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between passes with --loop')
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Before starting, rebuild live state of in-progress games from the database (crash recovery)',
+        )
+
+    def handle(self, *args, **options):
+        if not live_state.is_enabled():
+            self.stdout.write('LIVE_STATE_BACKEND is not "redis"; nothing to do.')
+            return
+
+        if options['rebuild']:
+            rebuilt = live_state.rebuild_all()
+            self.stdout.write(f'Rebuilt live state for {rebuilt} games.')
+
+        while True:
+            try:
+                written = live_state.persist_dirty()
+                if written or not options['loop']:
+                    self.stdout.write(f'Persisted {written} games.')
+            except Exception:
+                if not options['loop']:
+                    raise
+                logger.error('Live state persist failed, retrying on the next pass', exc_info=True)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,67 @@
+"""Management command to render image variants for existing prompts.
+
+Images are decoded and encoded in a process pool (one process per CPU by
+default); the parent only reads the work list and writes results back with
+``bulk_update``.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+from game import images
+from game.models import Prompt
+
+SAVE_BATCH = 200
+
+
+class Command(BaseCommand):
+    help = 'Render resized WebP/AVIF/JPEG variants of prompt images that are missing or outdated'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-render every image, not only missing/outdated ones')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes')
+
+    def handle(self, *args, **options):
+        todo = []
+        with_file = (Q(image__gt='') | Q(mirrored_image__gt=''))
+        fields = ['id', 'image', 'image_url', 'mirrored_image', 'mirrored_from', 'image_variants']
+        for prompt in Prompt.objects.filter(with_file).only(*fields):
+            if prompt.local_image and (options['all'] or images.needs_processing(prompt)):
+                todo.append((prompt.pk, prompt.local_image.name))
+        if not todo:
+            self.stdout.write('All prompt images are up to date.')
+            return
+
+        self.stdout.write(f"Processing {len(todo)} images with {options['workers']} workers "
+                          f"(formats: {', '.join(images.output_formats())})...")
+        started = time.perf_counter()
+        done, failed, pending = 0, 0, []
+        # Workers don't use the database; don't let them inherit open connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+            futures = {pool.submit(images.render_variants, pk, name): pk for pk, name in todo}
+            for future in as_completed(futures):
+                pk = futures[future]
+                try:
+                    pending.append(Prompt(pk=pk, image_variants=future.result()))
+                except (OSError, ValueError) as e:
+                    failed += 1
+                    self.stderr.write(f'  {pk}: {e}')
+                    continue
+                if len(pending) >= SAVE_BATCH:
+                    done += self._save(pending)
+                    pending = []
+                    self.stdout.write(f'  {done}/{len(todo)} done')
+        done += self._save(pending)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {done} images in {elapsed:.1f}s ({done / elapsed:.1f} images/s), {failed} failed.'
+        ))
+
+    def _save(self, prompts: list) -> int:
+        Prompt.objects.bulk_update(prompts, ['image_variants'])
+        return len(prompts)
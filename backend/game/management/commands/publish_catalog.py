@@ -0,0 +1,44 @@
+"""Management command that publishes the prompt catalog as static JSON bundles."""
+import logging
+import time
+import redis
+from django.core.management.base import BaseCommand
+from game import catalog
+
+logger = logging.getLogger('game')
+
+
+class Command(BaseCommand):
+    help = 'Render the catalog to versioned, pre-compressed JSON bundles when it changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep republishing whenever the catalog is marked changed')
+        parser.add_argument('--interval', type=float, default=10, help='Seconds between checks with --loop')
+        parser.add_argument('--force', action='store_true', help='Rewrite the bundles even if unchanged')
+
+    def handle(self, *args, **options):
+        # The Redis flag is taken into ``pending``, which is only cleared by a successful publish.
+        pending, force = True, options['force']
+        while True:
+            if pending:
+                try:
+                    self._publish(force)
+                    pending = force = False
+                except Exception:
+                    if not options['loop']:
+                        raise
+                    logger.error('Catalog publish failed, retrying on the next pass', exc_info=True)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+            try:
+                pending = catalog.take_dirty() or pending
+            except redis.RedisError as e:
+                self.stderr.write(f'Could not read the catalog flag: {e}')
+
+    def _publish(self, force: bool):
+        version, changed = catalog.publish(force=force)
+        if changed:
+            self.stdout.write(f'Published catalog {version}.')
+        else:
+            self.stdout.write(f'Catalog {version} is current.')
@@ -0,0 +1,21 @@
+"""Management command to show how many WebSocket messages were throttled."""
+from django.core.management.base import BaseCommand
+from game.ratelimit import METRICS_KEY, throttled_totals
+from game.redis_client import get_redis
+
+
+class Command(BaseCommand):
+    help = 'Show throttled WebSocket message counts by scope and message type'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Clear the counters after printing')
+
+    def handle(self, *args, **options):
+        totals = throttled_totals()
+        if not totals:
+            self.stdout.write('No throttled messages recorded.')
+        for field, count in sorted(totals.items(), key=lambda item: -item[1]):
+            scope, _, msg_type = field.partition(':')
+            self.stdout.write(f'{msg_type:<20} {scope:<12} {count}')
+        if options['reset']:
+            get_redis().delete(METRICS_KEY)
@@ -1,6 +1,15 @@
-"""Management command to seed initial categories and prompts."""
+"""Management command to seed initial categories and prompts.
+
+The seed set is diffed against the database in a handful of queries and
+applied with batched inserts and updates. Its hash is stored as a
+fingerprint, so running the command again with an unchanged seed set (as
+every deploy does) returns after two queries.
+"""
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from game import catalog, fingerprints
 from game.models import Category, Prompt
+from game.text import search_text, title_key
 
 
 SEED_CATEGORIES = [
@@ -306,49 +315,115 @@ SEED_CATEGORIES = [
     },
 ]
 
+FINGERPRINT_KEY = 'seed_data'
+BATCH_SIZE = 500
+CATEGORY_FIELDS = ['name_ar', 'genre', 'sub_genre', 'difficulty', 'icon']
+PROMPT_FIELDS = ['title', 'title_ar', 'difficulty', 'search_text', 'title_key']
+
 
 class Command(BaseCommand):
     help = 'Seed initial categories and prompts for 001 Game'
 
     def add_arguments(self, parser):
         parser.add_argument('--clear', action='store_true', help='Clear existing data before seeding')
+        parser.add_argument('--force', action='store_true', help='Seed even if the seed set is unchanged')
+        parser.add_argument(
+            '--no-update', action='store_true',
+            help='Only create missing rows; leave fields of existing ones as edited in the admin',
+        )
 
     def handle(self, *args, **options):
+        seed_hash = fingerprints.digest(SEED_CATEGORIES)
+
         if options['clear']:
             self.stdout.write('Clearing existing data...')
             Prompt.objects.all().delete()
             Category.objects.all().delete()
+            fingerprints.clear(FINGERPRINT_KEY)
+        elif not options['force'] and self._up_to_date(seed_hash):
+            self.stdout.write('Seed data unchanged, nothing to do.')
+            return
 
-        total_categories = 0
-        total_prompts = 0
+        with transaction.atomic():
+            categories, categories_created, categories_updated = self._upsert_categories(not options['no_update'])
+            prompts_created, prompts_updated = self._upsert_prompts(categories, not options['no_update'])
+            fingerprints.store(FINGERPRINT_KEY, seed_hash)
+        if categories_created or categories_updated or prompts_created or prompts_updated:
+            catalog.mark_dirty()
 
-        for cat_data in SEED_CATEGORIES:
-            prompts_data = cat_data.pop('prompts')
+        self.stdout.write(self.style.SUCCESS(
+            f'\nSeeding complete: {categories_created} categories, {prompts_created} prompts created; '
+            f'{categories_updated} categories, {prompts_updated} prompts updated.'
+        ))
+
+    def _up_to_date(self, seed_hash: str) -> bool:
+        """True if this seed set was applied and its categories weren't deleted since."""
+        if not fingerprints.matches(FINGERPRINT_KEY, seed_hash):
+            return False
+        names = {cat_data['name'] for cat_data in SEED_CATEGORIES}
+        return Category.objects.filter(name__in=names).values('name').distinct().count() == len(names)
 
-            category, created = Category.objects.get_or_create(
-                name=cat_data['name'],
-                defaults=cat_data,
-            )
-            if created:
-                total_categories += 1
+    def _upsert_categories(self, update: bool):
+        """Create missing seed categories and refresh changed ones; return them by name."""
+        existing = {}
+        for category in Category.objects.filter(name__in=[c['name'] for c in SEED_CATEGORIES]).order_by('pk'):
+            existing.setdefault(category.name, category)
+
+        to_create, to_update = [], []
+        for cat_data in SEED_CATEGORIES:
+            category = existing.get(cat_data['name'])
+            if category is None:
+                category = Category(name=cat_data['name'], **{f: cat_data[f] for f in CATEGORY_FIELDS})
+                existing[category.name] = category
+                to_create.append(category)
                 self.stdout.write(f'  Created category: {category.icon} {category.name}')
-            else:
-                self.stdout.write(f'  Category exists: {category.icon} {category.name}')
+            elif update and self._apply(category, cat_data, CATEGORY_FIELDS):
+                to_update.append(category)
+                self.stdout.write(f'  Updated category: {category.icon} {category.name}')
 
-            for prompt_data in prompts_data:
-                _, p_created = Prompt.objects.get_or_create(
-                    title=prompt_data['title'],
-                    category=category,
-                    defaults={
-                        'title_ar': prompt_data.get('title_ar', ''),
-                        'difficulty': prompt_data.get('difficulty', 3),
-                    },
-                )
-                if p_created:
-                    total_prompts += 1
+        Category.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        Category.objects.bulk_update(to_update, CATEGORY_FIELDS, batch_size=BATCH_SIZE)
+        return existing, len(to_create), len(to_update)
 
-            cat_data['prompts'] = prompts_data
+    def _upsert_prompts(self, categories: dict, update: bool):
+        existing = {}
+        prompts = Prompt.objects.filter(
+            category__in=[categories[c['name']] for c in SEED_CATEGORIES],
+        ).only('id', 'category_id', *PROMPT_FIELDS).order_by('pk')
+        for prompt in prompts.iterator(chunk_size=2000):
+            existing.setdefault((prompt.category_id, prompt.title_key), prompt)
 
-        self.stdout.write(self.style.SUCCESS(
-            f'\nSeeding complete: {total_categories} categories, {total_prompts} prompts created.'
-        ))
+        to_create, to_update = [], []
+        for cat_data in SEED_CATEGORIES:
+            category = categories[cat_data['name']]
+            for prompt_data in cat_data['prompts']:
+                values = {
+                    'title': prompt_data['title'],
+                    'title_ar': prompt_data.get('title_ar', ''),
+                    'difficulty': prompt_data.get('difficulty', 3),
+                    'search_text': search_text(prompt_data['title'], prompt_data.get('title_ar', '')),
+                    'title_key': title_key(prompt_data['title']),
+                }
+                # Matched by title_key, so a prompt added in the admin as "Spiderman" is
+                # updated rather than duplicated by the seed's "Spider-Man".
+                prompt = existing.get((category.pk, values['title_key']))
+                if prompt is None:
+                    prompt = Prompt(category=category, **values)
+                    existing[(category.pk, prompt.title_key)] = prompt
+                    to_create.append(prompt)
+                elif update and self._apply(prompt, values, PROMPT_FIELDS):
+                    to_update.append(prompt)
+
+        Prompt.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        Prompt.objects.bulk_update(to_update, PROMPT_FIELDS, batch_size=BATCH_SIZE)
+        return len(to_create), len(to_update)
+
+    @staticmethod
+    def _apply(obj, values: dict, fields: list) -> bool:
+        """Set ``fields`` from ``values`` on ``obj``; True if anything changed."""
+        changed = False
+        for field in fields:
+            if getattr(obj, field) != values[field]:
+                setattr(obj, field, values[field])
+                changed = True
+        return changed
@@ -0,0 +1,132 @@
+"""Management command that prepares a container and starts the web tier.
+
+Replaces running ``migrate``, ``seed_data`` and ``collectstatic`` on every
+start. Each step first checks whether it has anything to do and is
+skipped otherwise:
+
+- ``migrate`` runs only if the migration plan for the current code is not
+  empty (the applied set in ``django_migrations`` already covers every
+  migration on disk).
+- ``seed`` runs ``seed_data``, which returns early when the seed set's
+  fingerprint is unchanged.
+- ``static`` runs ``collectstatic`` only if the hash of the source static
+  files (path, size, mtime) differs from the one written next to the
+  collected files, or the manifest is missing. This fingerprint lives in
+  ``STATIC_ROOT`` rather than the database because collected files belong
+  to the container's filesystem.
+
+All steps run in this one process, so Django is imported once. Afterwards
+each step's duration is reported and, unless ``--no-serve`` is given, the
+process is replaced by ``serve.sh``, after removing a drain marker left
+by ``manage.py drain`` before the container was restarted.
+"""
+import io
+import os
+import time
+from pathlib import Path
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from game import drain, fingerprints
+from game.management.commands import seed_data
+
+STEPS = ['migrate', 'seed', 'static']
+STATIC_FINGERPRINT_FILE = '.source-fingerprint'
+MANIFEST_FILE = 'staticfiles.json'
+
+
+def pending_migrations() -> list:
+    """Migrations on disk that are not yet applied to the default database."""
+    connection = connections[DEFAULT_DB_ALIAS]
+    executor = MigrationExecutor(connection)
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+def static_source_fingerprint() -> str:
+    """Hash of every file collectstatic would copy, by path, size and mtime."""
+    entries = []
+    for finder in get_finders():
+        for path, storage in finder.list(['CVS', '.*', '*~']):
+            stat = os.stat(storage.path(path))
+            entries.append((getattr(storage, 'prefix', None) or '', path, stat.st_size, stat.st_mtime_ns))
+    entries.sort()
+    return fingerprints.digest([settings.STATIC_URL, settings.STORAGES['staticfiles'], entries])
+
+
+class Command(BaseCommand):
+    help = 'Run only the needed migrate/seed/collectstatic steps, then start the servers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--steps', default=','.join(STEPS),
+            help=f'Comma-separated steps to consider (default: {",".join(STEPS)})',
+        )
+        parser.add_argument('--force', action='store_true', help='Run every selected step even if up to date')
+        parser.add_argument('--no-serve', action='store_true', help='Exit after the steps instead of starting serve.sh')
+
+    def handle(self, *args, **options):
+        steps = [step.strip() for step in options['steps'].split(',') if step.strip()]
+        unknown = set(steps) - set(STEPS)
+        if unknown:
+            raise CommandError(f"Unknown steps: {', '.join(sorted(unknown))} (choose from {', '.join(STEPS)})")
+
+        started = time.perf_counter()
+        report = []
+        for step in STEPS:
+            if step not in steps:
+                continue
+            step_started = time.perf_counter()
+            outcome = getattr(self, f'_{step}')(options['force'])
+            report.append((step, outcome, time.perf_counter() - step_started))
+
+        self.stdout.write('Startup steps:')
+        for step, outcome, seconds in report:
+            self.stdout.write(f'  {step:<8} {outcome:<34} {seconds:6.2f}s')
+        self.stdout.write(self.style.SUCCESS(f'Ready in {time.perf_counter() - started:.2f}s'))
+
+        if not options['no_serve']:
+            self._serve()
+
+    def _migrate(self, force: bool) -> str:
+        pending = pending_migrations()
+        if not pending and not force:
+            return 'skipped, no unapplied migrations'
+        call_command('migrate', interactive=False, verbosity=0)
+        return f'applied {len(pending)} migrations'
+
+    def _seed(self, force: bool) -> str:
+        was_seeded = fingerprints.matches(seed_data.FINGERPRINT_KEY, fingerprints.digest(seed_data.SEED_CATEGORIES))
+        # A failed seed must not keep the server from starting, as before.
+        try:
+            call_command('seed_data', force=force, stdout=io.StringIO())
+        except Exception as e:
+            self.stderr.write(f'seed_data failed: {e}')
+            return 'failed, continuing'
+        return 'skipped, seed set unchanged' if was_seeded and not force else 'seeded'
+
+    def _static(self, force: bool) -> str:
+        static_root = Path(settings.STATIC_ROOT)
+        marker = static_root / STATIC_FINGERPRINT_FILE
+        source_hash = static_source_fingerprint()
+        up_to_date = (
+            (static_root / MANIFEST_FILE).exists()
+            and marker.exists()
+            and marker.read_text().strip() == source_hash
+        )
+        if up_to_date and not force:
+            return 'skipped, static sources unchanged'
+        call_command('collectstatic', interactive=False, verbosity=0)
+        marker.write_text(source_hash)
+        return 'collected'
+
+    def _serve(self):
+        # The marker lives in the container's filesystem, which a restart keeps.
+        if drain.clear():
+            self.stdout.write('Removed the drain marker from before the restart.')
+        connections.close_all()
+        serve = Path(settings.BASE_DIR) / 'serve.sh'
+        self.stdout.flush()
+        os.execv('/bin/sh', ['sh', str(serve)])
@@ -0,0 +1,31 @@
+"""Management command that keeps LRU prompt rotation sets in line with the catalog."""
+import time
+import redis
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from game.prompt_selection import sync_all
+
+
+class Command(BaseCommand):
+    help = 'Add new active prompts to LRU rotation sets and remove deactivated or deleted ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep syncing on an interval')
+        parser.add_argument(
+            '--interval', type=float, default=settings.PROMPT_LRU_RESEED_SECONDS,
+            help='Seconds between syncs with --loop',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                changed = sync_all()
+                if changed or not options['loop']:
+                    self.stdout.write(f'Synced LRU sets: {changed} prompts added or removed.')
+            except redis.RedisError as e:
+                if not options['loop']:
+                    raise
+                self.stderr.write(f'Could not sync LRU sets: {e}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
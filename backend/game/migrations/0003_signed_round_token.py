@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0002_alter_player_session_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='round',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('selecting_category', 'Selecting Category'), ('selecting_actor', 'Selecting Actor'), ('showing_qr', 'Showing QR'), ('prompt_reveal', 'Prompt Reveal'), ('actor_ready', 'Actor Ready'), ('active', 'Active'), ('guessed', 'Guessed'), ('timeout', 'Timeout'), ('skipped', 'Skipped')], default='pending', max_length=30),
+        ),
+        migrations.AlterField(
+            model_name='round',
+            name='token',
+            field=models.CharField(blank=True, default='', help_text='Signed JWT for actor QR', max_length=255),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+def backfill_image_dimensions(apps, schema_editor):
+    Prompt = apps.get_model('game', 'Prompt')
+    for prompt in Prompt.objects.exclude(image='').exclude(image__isnull=True).iterator():
+        try:
+            prompt.image_width, prompt.image_height = prompt.image.width, prompt.image.height
+        except (OSError, ValueError):
+            continue
+        prompt.save(update_fields=['image_width', 'image_height'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0003_signed_round_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prompt',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='prompt',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='prompt',
+            name='image',
+            field=models.ImageField(blank=True, height_field='image_height', null=True, upload_to='prompts/', width_field='image_width'),
+        ),
+        migrations.RunPython(backfill_image_dimensions, migrations.RunPython.noop),
+    ]
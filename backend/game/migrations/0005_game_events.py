@@ -0,0 +1,42 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0004_prompt_image_dimensions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('event_type', models.CharField(max_length=50)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('uid', models.CharField(help_text='Deduplicates re-flushed events', max_length=32, unique=True)),
+                ('occurred_at', models.DateTimeField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='game.game')),
+            ],
+            options={
+                'ordering': ['game', 'version'],
+                'unique_together': {('game', 'version')},
+            },
+        ),
+        migrations.CreateModel(
+            name='GameSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('state', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='game.game')),
+            ],
+            options={
+                'ordering': ['game', '-version'],
+                'unique_together': {('game', 'version')},
+            },
+        ),
+    ]
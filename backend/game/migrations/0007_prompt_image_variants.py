@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0006_fingerprints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prompt',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized/re-encoded copies of image (see game/images.py)'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0007_prompt_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prompt',
+            name='mirrored_from',
+            field=models.URLField(blank=True, default='', editable=False, help_text='image_url that mirrored_image was fetched from', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='prompt',
+            name='mirrored_image',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='prompts/mirrored/'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+from game.text import search_text
+
+
+def backfill_search_text(apps, schema_editor):
+    Prompt = apps.get_model('game', 'Prompt')
+    batch = []
+    for prompt in Prompt.objects.only('id', 'title', 'title_ar').iterator(chunk_size=2000):
+        prompt.search_text = search_text(prompt.title, prompt.title_ar)
+        batch.append(prompt)
+        if len(batch) >= 2000:
+            Prompt.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    Prompt.objects.bulk_update(batch, ['search_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0008_prompt_mirrored_image'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='prompt',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Normalized title + title_ar (see game/text.py), indexed for search'),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='prompt',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_text'], name='prompt_search_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='prompt',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('search_text', config='simple'), name='prompt_search_fts'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from game.text import title_key
+
+
+def backfill_title_key(apps, schema_editor):
+    Prompt = apps.get_model('game', 'Prompt')
+    batch = []
+    for prompt in Prompt.objects.only('id', 'title').iterator(chunk_size=2000):
+        prompt.title_key = title_key(prompt.title)
+        batch.append(prompt)
+        if len(batch) >= 2000:
+            Prompt.objects.bulk_update(batch, ['title_key'])
+            batch = []
+    Prompt.objects.bulk_update(batch, ['title_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0009_prompt_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prompt',
+            name='title_key',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Normalized title without spaces; prompts sharing it within a category are duplicates'),
+        ),
+        migrations.RunPython(backfill_title_key, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='prompt',
+            index=models.Index(fields=['category', 'title_key'], name='prompt_title_key'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+"""Local copies of prompt images that only exist as an external ``image_url``.
+
+``manage.py mirror_prompt_images`` fetches each external URL (several at
+a time), stores the file as ``Prompt.mirrored_image`` with the URL in
+``mirrored_from``, and renders its variants. ``Prompt.local_image`` uses
+the copy only while ``mirrored_from`` still equals ``image_url``, so an
+edited URL falls back to the external image until it is mirrored again.
+
+Downloads are capped at ``IMAGE_MIRROR_MAX_BYTES``, must decode as an
+image, and are retried with backoff on connection errors and 5xx/429
+responses; other client errors fail immediately.
+"""
+import http.client
+import io
+import logging
+import time
+import urllib.error
+import urllib.request
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, UnidentifiedImageError
+from . import images
+
+logger = logging.getLogger('game')
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp', 'AVIF': 'avif', 'BMP': 'bmp'}
+USER_AGENT = 'game001-image-mirror/1.0'
+
+
+class MirrorError(Exception):
+    """The image could not be mirrored; ``retry`` says whether trying again may help."""
+
+    def __init__(self, message: str, retry: bool = False):
+        super().__init__(message)
+        self.retry = retry
+
+
+def _download(url: str) -> bytes:
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT, 'Accept': 'image/*'})
+    limit = settings.IMAGE_MIRROR_MAX_BYTES
+    try:
+        with urllib.request.urlopen(request, timeout=settings.IMAGE_MIRROR_TIMEOUT) as response:
+            length = response.headers.get('Content-Length')
+            if length and int(length) > limit:
+                raise MirrorError(f'image is {int(length)} bytes, over the {limit} byte limit')
+            data = response.read(limit + 1)
+    except urllib.error.HTTPError as e:
+        raise MirrorError(f'HTTP {e.code}', retry=e.code >= 500 or e.code == 429)
+    except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+        raise MirrorError(str(getattr(e, 'reason', e)), retry=True)
+    except http.client.HTTPException as e:
+        # Truncated bodies (IncompleteRead), malformed status lines, ...
+        raise MirrorError(f'{type(e).__name__}: {e}', retry=True)
+    if len(data) > limit:
+        raise MirrorError(f'image is over the {limit} byte limit')
+    if length and len(data) < int(length):
+        raise MirrorError(f'response truncated at {len(data)} of {length} bytes', retry=True)
+    return data
+
+
+def fetch(url: str) -> bytes:
+    """Download ``url``, retrying transient failures ``IMAGE_MIRROR_RETRIES`` times."""
+    attempt = 0
+    while True:
+        try:
+            return _download(url)
+        except MirrorError as e:
+            if not e.retry or attempt >= settings.IMAGE_MIRROR_RETRIES:
+                raise
+            attempt += 1
+            time.sleep(0.5 * 2 ** attempt)
+
+
+def mirror(prompt_id, url: str) -> dict:
+    """Fetch and store one image; return the field values to save on the prompt."""
+    data = fetch(url)
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image_format = image.format
+            image.verify()
+    except UnidentifiedImageError:
+        raise MirrorError('not an image')
+    except (OSError, SyntaxError) as e:
+        raise MirrorError(f'corrupt image: {e}')
+    extension = EXTENSIONS.get(image_format, image_format.lower())
+    name = default_storage.save(f'prompts/mirrored/{prompt_id}.{extension}', ContentFile(data))
+    return {
+        'mirrored_image': name,
+        'mirrored_from': url,
+        'image_variants': images.render_variants(prompt_id, name),
+    }
+
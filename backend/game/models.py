@@ -2,8 +2,11 @@
 import uuid
 import string
 import random
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
 from django.utils import timezone
+from .text import search_text, title_key
 
 
 def generate_game_code():
@@ -113,22 +116,67 @@ class Prompt(models.Model):
     title = models.CharField(max_length=300)
     title_ar = models.CharField(max_length=300, blank=True, default='')
     image_url = models.URLField(max_length=500, blank=True, default='')
-    image = models.ImageField(upload_to='prompts/', blank=True, null=True)
+    image = models.ImageField(
+        upload_to='prompts/', blank=True, null=True,
+        width_field='image_width', height_field='image_height',
+    )
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    mirrored_image = models.ImageField(upload_to='prompts/mirrored/', blank=True, null=True, editable=False)
+    mirrored_from = models.URLField(
+        max_length=500, blank=True, default='', editable=False,
+        help_text='image_url that mirrored_image was fetched from',
+    )
+    image_variants = models.JSONField(
+        default=dict, blank=True, editable=False,
+        help_text='Resized/re-encoded copies of image (see game/images.py)',
+    )
     difficulty = models.IntegerField(default=3, help_text='1-5 difficulty scale')
     times_used = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
     metadata = models.JSONField(default=dict, blank=True, help_text='Extra info: year, actors, etc.')
+    search_text = models.TextField(
+        blank=True, default='', editable=False,
+        help_text='Normalized title + title_ar (see game/text.py), indexed for search',
+    )
+    title_key = models.TextField(
+        blank=True, default='', editable=False,
+        help_text='Normalized title without spaces; prompts sharing it within a category are duplicates',
+    )
 
     class Meta:
         ordering = ['category', 'title']
+        indexes = [
+            GinIndex(fields=['search_text'], opclasses=['gin_trgm_ops'], name='prompt_search_trgm'),
+            GinIndex(SearchVector('search_text', config='simple'), name='prompt_search_fts'),
+            models.Index(fields=['category', 'title_key'], name='prompt_title_key'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.search_text = search_text(self.title, self.title_ar)
+        self.title_key = title_key(self.title)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'title', 'title_ar'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_text', 'title_key'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.title} ({self.category.name})"
 
+    @property
+    def local_image(self):
+        """The uploaded image, else the local copy of image_url if it is current."""
+        if self.image:
+            return self.image
+        if self.mirrored_image and self.mirrored_from == self.image_url:
+            return self.mirrored_image
+        return None
+
     def get_image_display_url(self):
         """Return the best available image URL."""
-        if self.image:
-            return self.image.url
+        local = self.local_image
+        if local:
+            return local.url
         return self.image_url or ''
 
 
@@ -154,7 +202,7 @@ class Round(models.Model):
     prompt = models.ForeignKey(Prompt, on_delete=models.SET_NULL, null=True, blank=True, related_name='rounds')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='rounds')
     status = models.CharField(max_length=30, choices=STATUS_CHOICES, default='pending')
-    token = models.CharField(max_length=255, blank=True, default='', db_index=True, help_text='Secure token for actor QR')
+    token = models.CharField(max_length=255, blank=True, default='', help_text='Signed JWT for actor QR')
     started_at = models.DateTimeField(null=True, blank=True)
     ended_at = models.DateTimeField(null=True, blank=True)
     time_taken_seconds = models.FloatField(null=True, blank=True)
@@ -167,3 +215,45 @@ class Round(models.Model):
 
     def __str__(self):
         return f"Round {self.round_number} - Game {self.game.code}"
+
+
+class GameEvent(models.Model):
+    """Append-only log of game commands, numbered per game by ``version``."""
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='events')
+    version = models.PositiveIntegerField()
+    event_type = models.CharField(max_length=50)
+    data = models.JSONField(default=dict, blank=True)
+    uid = models.CharField(max_length=32, unique=True, help_text='Deduplicates re-flushed events')
+    occurred_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['game', 'version']
+        unique_together = ['game', 'version']
+
+    def __str__(self):
+        return f"{self.event_type} v{self.version} (Game {self.game_id})"
+
+
+class GameSnapshot(models.Model):
+    """Replayed game state at a given event version, to bound replay cost."""
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='snapshots')
+    version = models.PositiveIntegerField()
+    state = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['game', '-version']
+        unique_together = ['game', 'version']
+
+    def __str__(self):
+        return f"Snapshot v{self.version} (Game {self.game_id})"
+
+
+class Fingerprint(models.Model):
+    """Hash of the inputs of an idempotent maintenance step, to skip it when unchanged."""
+    key = models.CharField(max_length=100, unique=True)
+    value = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key}: {self.value[:12]}"
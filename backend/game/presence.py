@@ -0,0 +1,120 @@
+"""Which players currently have a socket open, per game.
+
+Each open socket is a member ``{player_id}|{channel_name}`` of the sorted
+set ``presence:{code}``, scored by its last heartbeat. A player counts as
+online while any of their sockets has been seen within
+``PRESENCE_TIMEOUT`` seconds, so a crashed node's sockets simply age out.
+
+Consumers don't write to Redis themselves: connects, heartbeats and
+disconnects go into a per-process ``PresenceBuffer`` that writes them in
+one pipeline every ``PRESENCE_FLUSH_INTERVAL`` seconds. When a flush
+changes who is online in a game, the game group gets a small ``presence``
+broadcast with the online player ids; the full game state is not rebuilt.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+import redis
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from .redis_client import get_redis
+
+logger = logging.getLogger('game')
+
+PRESENCE_KEY = 'presence:{code}'
+
+
+def _key(game_code: str) -> str:
+    return PRESENCE_KEY.format(code=game_code.upper())
+
+
+def _online_from(members) -> list:
+    return sorted({member.split('|', 1)[0] for member in members})
+
+
+def online_players(game_code: str) -> list:
+    """Ids of players with a live socket in this game."""
+    cutoff = time.time() - settings.PRESENCE_TIMEOUT
+    try:
+        members = get_redis().zrangebyscore(_key(game_code), cutoff, '+inf')
+    except redis.RedisError as e:
+        logger.warning(f"Presence unavailable for {game_code}: {e}")
+        return []
+    return _online_from(members)
+
+
+def _write(touches: dict, leaves: dict, changed: set) -> dict:
+    """Apply buffered updates; return the online players of games in ``changed``."""
+    now = time.time()
+    cutoff = now - settings.PRESENCE_TIMEOUT
+    pipe = get_redis().pipeline(transaction=False)
+    for code in touches.keys() | leaves.keys():
+        key = _key(code)
+        if touches.get(code):
+            pipe.zadd(key, touches[code])
+        if leaves.get(code):
+            pipe.zrem(key, *leaves[code])
+        pipe.zremrangebyscore(key, '-inf', cutoff)
+        pipe.expire(key, settings.PRESENCE_TIMEOUT * 2)
+    ordered = sorted(changed)
+    for code in ordered:
+        pipe.zrangebyscore(_key(code), cutoff, '+inf')
+    results = pipe.execute()
+    return {code: _online_from(members) for code, members in zip(ordered, results[len(results) - len(ordered):])}
+
+
+class PresenceBuffer:
+    """Collects presence updates from this process's consumers and flushes them in batches."""
+
+    def __init__(self):
+        self.touches = defaultdict(dict)
+        self.leaves = defaultdict(set)
+        self.changed = set()
+        self._task = None
+
+    def touch(self, game_code: str, player_id: str, channel_name: str, joined: bool = False):
+        member = f'{player_id}|{channel_name}'
+        self.touches[game_code][member] = time.time()
+        self.leaves[game_code].discard(member)
+        if joined:
+            self.changed.add(game_code)
+        self._ensure_flushing()
+
+    def leave(self, game_code: str, player_id: str, channel_name: str):
+        member = f'{player_id}|{channel_name}'
+        self.touches[game_code].pop(member, None)
+        self.leaves[game_code].add(member)
+        self.changed.add(game_code)
+        self._ensure_flushing()
+
+    def _ensure_flushing(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while self.touches or self.leaves:
+            await asyncio.sleep(settings.PRESENCE_FLUSH_INTERVAL)
+            await self.flush()
+
+    async def flush(self):
+        touches, leaves, changed = dict(self.touches), dict(self.leaves), self.changed
+        self.touches, self.leaves, self.changed = defaultdict(dict), defaultdict(set), set()
+        if not touches and not leaves:
+            return
+        try:
+            online = await sync_to_async(_write, thread_sensitive=False)(touches, leaves, changed)
+        except redis.RedisError as e:
+            logger.warning(f"Dropped presence updates for {len(touches | leaves)} games: {e}")
+            return
+
+        channel_layer = get_channel_layer()
+        for code, player_ids in online.items():
+            await channel_layer.group_send(f'game_{code}', {
+                'type': 'broadcast_presence',
+                'online': player_ids,
+            })
+
+
+buffer = PresenceBuffer()
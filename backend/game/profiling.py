@@ -0,0 +1,163 @@
+"""On-demand profiling for REST actions and WebSocket handlers.
+
+Profiling is off unless ``PROFILING_ENABLED`` is set, and even then only
+runs for staff requests that ask for it (``X-Profile: 1`` header or
+``?profile=1``) or for games an admin has flagged from the Game admin.
+Profiles are written as pstats files to ``PROFILING_DIR`` and can be
+downloaded from the admin.
+"""
+import cProfile
+import contextvars
+import functools
+import logging
+import pstats
+import re
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger('game')
+
+GAME_FLAG_KEY = 'profiling:game:{code}'
+# A forgotten flag stops profiling a game after this long.
+GAME_FLAG_TTL = 24 * 3600
+
+_current_capture = contextvars.ContextVar('game_profile_capture', default=None)
+
+
+def is_enabled() -> bool:
+    return settings.PROFILING_ENABLED
+
+
+def set_game_profiling(game_code: str, enabled: bool):
+    """Flag (or unflag) a game so all of its traffic gets profiled for ``GAME_FLAG_TTL`` seconds."""
+    key = GAME_FLAG_KEY.format(code=game_code.upper())
+    if enabled:
+        cache.set(key, True, timeout=GAME_FLAG_TTL)
+    else:
+        cache.delete(key)
+
+
+def is_game_profiled(game_code: str) -> bool:
+    if not is_enabled() or not game_code:
+        return False
+    return bool(cache.get(GAME_FLAG_KEY.format(code=game_code.upper())))
+
+
+def wants_profile(request, game_code: str = None) -> bool:
+    """Decide whether a Django request should be profiled.
+
+    The staff check only touches the session when the client explicitly
+    asked for a profile, so ordinary traffic pays a single settings lookup.
+    """
+    if not is_enabled():
+        return False
+    if is_game_profiled(game_code):
+        return True
+    asked = request.headers.get('X-Profile') == '1' or request.GET.get('profile') == '1'
+    if not asked:
+        return False
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_staff)
+
+
+class Capture:
+    """Collects cProfile runs for one profiled operation and dumps them."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.profiles = []
+        self.started = time.perf_counter()
+
+    def run(self, func, *args, **kwargs):
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, *args, **kwargs)
+        finally:
+            self.profiles.append(profiler)
+
+    def dump(self):
+        if not self.profiles:
+            return None
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        directory = settings.PROFILING_DIR
+        directory.mkdir(parents=True, exist_ok=True)
+        safe_label = re.sub(r'[^A-Za-z0-9_.-]+', '_', self.label)
+        path = directory / f'{time.strftime("%Y%m%d-%H%M%S")}-{safe_label}-{elapsed_ms:.0f}ms.prof'
+
+        stats = pstats.Stats(self.profiles[0])
+        for profiler in self.profiles[1:]:
+            stats.add(profiler)
+        stats.dump_stats(str(path))
+
+        _prune()
+        logger.info(f"Profile for {self.label} written to {path.name} ({elapsed_ms:.0f}ms)")
+        return path
+
+
+@contextmanager
+def capture(label: str):
+    """Profile every ``profiled`` function called inside this block.
+
+    The capture is carried in a context variable, which asgiref copies into
+    ``database_sync_to_async`` worker threads, so WebSocket handlers get
+    their database work profiled even though it runs off the event loop.
+    """
+    current = Capture(label)
+    token = _current_capture.set(current)
+    try:
+        yield current
+    finally:
+        _current_capture.reset(token)
+        try:
+            current.dump()
+        except OSError as e:
+            logger.error(f"Could not write profile for {label}: {e}")
+
+
+def profiled(func):
+    """Run ``func`` under cProfile when a capture is active, else call it directly."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        current = _current_capture.get()
+        if current is None:
+            return func(*args, **kwargs)
+        return current.run(func, *args, **kwargs)
+    return wrapper
+
+
+class ProfilingMixin:
+    """ViewSet mixin that profiles the whole dispatch of opted-in requests."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if not wants_profile(request, kwargs.get('code')):
+            return super().dispatch(request, *args, **kwargs)
+
+        label = f'http-{type(self).__name__}-{request.method}-{request.path}'
+        with capture(label) as current:
+            response = current.run(super().dispatch, request, *args, **kwargs)
+        response['X-Profile-Captured'] = '1'
+        return response
+
+
+def list_profiles():
+    """Return saved profiles, newest first."""
+    directory = settings.PROFILING_DIR
+    if not directory.exists():
+        return []
+    return sorted(directory.glob('*.prof'), key=lambda p: p.stat().st_mtime, reverse=True)
+
+
+def get_profile_path(name: str):
+    """Resolve a profile file name inside PROFILING_DIR, or None."""
+    if '/' in name or '\\' in name or not name.endswith('.prof'):
+        return None
+    path = settings.PROFILING_DIR / name
+    return path if path.is_file() else None
+
+
+def _prune():
+    keep = settings.PROFILING_MAX_FILES
+    for stale in list_profiles()[keep:]:
+        stale.unlink(missing_ok=True)
@@ -0,0 +1,48 @@
+"""Cached actor prompt payloads, keyed by round.
+
+``select_category`` stores the payload when it assigns a prompt and the
+round-ending transitions clear it, so the actor endpoint can serve a
+viewable round without touching the database.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from . import images
+
+
+def payload_key(round_id) -> str:
+    return f'round:{round_id}:prompt'
+
+
+def build_payload(game_round, prompt, category) -> dict:
+    """Build the actor's prompt payload from already-loaded objects."""
+    return {
+        'round_id': str(game_round.id),
+        'round_number': game_round.round_number,
+        'prompt_id': str(prompt.id),
+        'title': prompt.title,
+        'title_ar': prompt.title_ar,
+        'image_url': prompt.get_image_display_url(),
+        'image_width': prompt.image_width if prompt.image else None,
+        'image_height': prompt.image_height if prompt.image else None,
+        'image_variants': images.variants_payload(prompt),
+        'category': category.name,
+        'category_ar': category.name_ar,
+        'category_icon': category.icon,
+    }
+
+
+def get_payload(round_id):
+    return cache.get(payload_key(round_id))
+
+
+def store_payload(payload: dict):
+    """Store the payload once the current transaction (if any) commits."""
+    key = payload_key(payload['round_id'])
+    transaction.on_commit(lambda: cache.set(key, payload, timeout=settings.ROUND_TOKEN_TTL))
+
+
+def clear_payload(round_id):
+    """Drop the payload once the round can no longer be viewed."""
+    key = payload_key(round_id)
+    transaction.on_commit(lambda: cache.delete(key))
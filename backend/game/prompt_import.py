@@ -0,0 +1,168 @@
+"""Streaming CSV import of prompts.
+
+Rows are read one at a time from the file, validated, and inserted with
+``bulk_create`` in batches, each batch in its own transaction, so memory
+stays flat and a bad row never costs more than itself. Categories are
+loaded once up front and looked up by name from memory.
+
+Rows that duplicate a prompt of the same category (same ``title_key``,
+e.g. "Spiderman" for "Spider-Man"), either already in the catalog or
+earlier in the file, are rejected. One indexed query per batch checks the
+catalog; keys seen earlier in the file are kept in memory.
+
+Used by the Prompt admin's "Import CSV" page and by
+``manage.py import_prompts`` for files too large for an upload.
+"""
+import csv
+import io
+import logging
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import transaction
+from . import catalog
+from .models import Category, Prompt
+from .text import search_text, title_key
+
+logger = logging.getLogger('game')
+
+COLUMNS = ['title', 'title_ar', 'category_name', 'image_url', 'difficulty']
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+_validate_url = URLValidator(schemes=['http', 'https'])
+_title_max = Prompt._meta.get_field('title').max_length
+_title_ar_max = Prompt._meta.get_field('title_ar').max_length
+_image_url_max = Prompt._meta.get_field('image_url').max_length
+
+
+class ImportResult:
+    """Counts and per-row errors (``(line number, message)``) of one import."""
+
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def __str__(self):
+        return f'{self.created} imported, {self.failed} rejected'
+
+
+def _parse_row(row: dict, categories: dict) -> Prompt:
+    """Build an unsaved Prompt from a CSV row, raising ValueError with the reason."""
+    title = (row.get('title') or '').strip()
+    if not title:
+        raise ValueError("title is required")
+    if len(title) > _title_max:
+        raise ValueError(f"title is longer than {_title_max} characters")
+
+    title_ar = (row.get('title_ar') or '').strip()
+    if len(title_ar) > _title_ar_max:
+        raise ValueError(f"title_ar is longer than {_title_ar_max} characters")
+
+    category_name = (row.get('category_name') or '').strip()
+    category_id = categories.get(category_name)
+    if category_id is None:
+        raise ValueError(f"unknown category '{category_name}'")
+
+    image_url = (row.get('image_url') or '').strip()
+    if image_url:
+        if len(image_url) > _image_url_max:
+            raise ValueError(f"image_url is longer than {_image_url_max} characters")
+        try:
+            _validate_url(image_url)
+        except ValidationError:
+            raise ValueError(f"invalid image_url '{image_url}'")
+
+    difficulty = (row.get('difficulty') or '').strip() or '3'
+    try:
+        difficulty = int(difficulty)
+    except ValueError:
+        raise ValueError(f"difficulty must be a number, got '{difficulty}'")
+    if not 1 <= difficulty <= 5:
+        raise ValueError("difficulty must be between 1 and 5")
+
+    return Prompt(
+        title=title,
+        title_ar=title_ar,
+        search_text=search_text(title, title_ar),
+        title_key=title_key(title),
+        category_id=category_id,
+        image_url=image_url,
+        difficulty=difficulty,
+    )
+
+
+def _insert(batch: list, dry_run: bool, result: ImportResult) -> int:
+    """Insert ``(line, prompt)`` pairs, rejecting duplicates of existing prompts."""
+    existing = {}
+    for category_id, key, title in Prompt.objects.filter(
+        category_id__in={prompt.category_id for _, prompt in batch},
+        title_key__in={prompt.title_key for _, prompt in batch},
+    ).values_list('category_id', 'title_key', 'title'):
+        existing[(category_id, key)] = title
+    prompts = []
+    for line, prompt in batch:
+        duplicate_of = existing.get((prompt.category_id, prompt.title_key))
+        if duplicate_of is not None:
+            result.add_error(line, f"duplicate of existing prompt '{duplicate_of}'")
+        else:
+            prompts.append(prompt)
+    if not prompts or dry_run:
+        return len(prompts)
+    with transaction.atomic():
+        Prompt.objects.bulk_create(prompts)
+    return len(prompts)
+
+
+def import_prompts(binary_file, batch_size: int = BATCH_SIZE, dry_run: bool = False, progress=None) -> ImportResult:
+    """Import prompts from a UTF-8 CSV file opened in binary mode.
+
+    ``progress``, if given, is called with the running ImportResult after
+    each batch. With ``dry_run`` rows are validated but nothing is written.
+    """
+    result = ImportResult()
+    categories = {}
+    for name, category_id in Category.objects.values_list('name', 'id'):
+        categories.setdefault(name, category_id)
+    text = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    batch = []
+    seen = {}
+    try:
+        missing = {'title', 'category_name'} - set(reader.fieldnames or [])
+        if missing:
+            result.add_error(1, f"missing columns: {', '.join(sorted(missing))}")
+            return result
+
+        for row in reader:
+            try:
+                prompt = _parse_row(row, categories)
+            except ValueError as e:
+                result.add_error(reader.line_num, str(e))
+                continue
+            first_line = seen.setdefault((prompt.category_id, prompt.title_key), reader.line_num)
+            if first_line != reader.line_num:
+                result.add_error(reader.line_num, f"duplicate of line {first_line}")
+                continue
+            batch.append((reader.line_num, prompt))
+            if len(batch) >= batch_size:
+                result.created += _insert(batch, dry_run, result)
+                batch = []
+                if progress:
+                    progress(result)
+    except (UnicodeDecodeError, csv.Error) as e:
+        result.add_error(reader.line_num or 1, f"unreadable CSV, stopped here: {e}")
+    finally:
+        text.detach()
+
+    if batch:
+        result.created += _insert(batch, dry_run, result)
+    if result.created and not dry_run:
+        catalog.mark_dirty()
+    logger.info(f"Prompt CSV import: {result}")
+    return result
@@ -0,0 +1,152 @@
+"""Prompt selection strategies for ``GameService.select_category``.
+
+``random`` picks uniformly among the category's prompts not yet used in
+the game. ``lru`` keeps a Redis sorted set per category (optionally per
+venue) scored by last-served time and picks among the least recently
+served prompts, so consecutive games at a venue don't repeat the same
+prompts. The strategy comes from ``game.settings['prompt_selection']``,
+defaulting to ``PROMPT_SELECTION_STRATEGY``.
+
+A missing sorted set is seeded on first use with at most
+``HOT_SEED_LIMIT`` prompts, so a click never pays for the whole category;
+``manage.py sync_prompt_lru`` adds the rest and later additions, and drops
+deactivated prompts, in the background. A chosen prompt is marked served
+once the round's transaction commits, so a rolled-back selection doesn't
+push it to the back of the rotation.
+"""
+import logging
+import random
+import time
+import redis
+from django.conf import settings
+from django.db import transaction
+from .models import Prompt
+from .redis_client import get_redis
+
+logger = logging.getLogger('game')
+
+SEED_BATCH_SIZE = 5000
+HOT_SEED_LIMIT = 1000
+LRU_KEYS_KEY = 'prompt_lru:keys'  # hash: sorted set key -> category id
+
+
+def choose_prompt(game, category, used_prompt_ids) -> Prompt:
+    """Pick the prompt for a round in ``category``."""
+    strategy = game.settings.get('prompt_selection', settings.PROMPT_SELECTION_STRATEGY)
+    if strategy == 'lru':
+        try:
+            prompt = _choose_least_recent(game, category, used_prompt_ids)
+            if prompt is not None:
+                return prompt
+        except redis.RedisError as e:
+            logger.warning(f"LRU prompt selection unavailable ({e}), falling back to random")
+    return _choose_random(category, used_prompt_ids)
+
+
+def _choose_random(category, used_prompt_ids) -> Prompt:
+    available_prompts = Prompt.objects.filter(
+        category=category,
+        is_active=True,
+    ).exclude(id__in=used_prompt_ids)
+
+    if not available_prompts.exists():
+        available_prompts = Prompt.objects.filter(
+            category=category,
+            is_active=True,
+        )
+
+    if not available_prompts.exists():
+        raise ValueError(f"No prompts available in category {category.name}")
+
+    return random.choice(list(available_prompts))
+
+
+def _lru_key(category_id, venue: str = None) -> str:
+    if venue:
+        return f'prompt_lru:{venue}:{category_id}'
+    return f'prompt_lru:{category_id}'
+
+
+def _add_unserved(r, key, prompt_ids) -> int:
+    """Add prompts with score 0 (never served), keeping existing scores."""
+    added, batch = 0, {}
+    for prompt_id in prompt_ids:
+        batch[str(prompt_id)] = 0
+        if len(batch) >= SEED_BATCH_SIZE:
+            added += r.zadd(key, batch, nx=True)
+            batch = {}
+    if batch:
+        added += r.zadd(key, batch, nx=True)
+    return added
+
+
+def _ensure_seeded(r, key, category):
+    """Seed a missing sorted set with a bounded batch; ``sync_all`` adds the rest."""
+    if r.exists(key):
+        return
+    r.hset(LRU_KEYS_KEY, key, str(category.id))
+    prompt_ids = (
+        Prompt.objects.filter(category=category, is_active=True)
+        .order_by().values_list('id', flat=True)[:HOT_SEED_LIMIT]
+    )
+    _add_unserved(r, key, prompt_ids)
+
+
+def sync_all() -> int:
+    """Bring every LRU sorted set in line with its category's active prompts.
+
+    Runs in the background (``manage.py sync_prompt_lru``); returns the
+    number of prompts added or removed.
+    """
+    r = get_redis()
+    changed = 0
+    for key, category_id in r.hgetall(LRU_KEYS_KEY).items():
+        if not r.exists(key):
+            r.hdel(LRU_KEYS_KEY, key)  # re-seeded on next use
+            continue
+        active = {
+            str(prompt_id) for prompt_id in
+            Prompt.objects.filter(category_id=category_id, is_active=True)
+            .order_by().values_list('id', flat=True).iterator(chunk_size=SEED_BATCH_SIZE)
+        }
+        members = set(r.zrange(key, 0, -1))
+        changed += _add_unserved(r, key, active - members)
+        stale = list(members - active)
+        for start in range(0, len(stale), SEED_BATCH_SIZE):
+            changed += r.zrem(key, *stale[start:start + SEED_BATCH_SIZE])
+    return changed
+
+
+def _choose_least_recent(game, category, used_prompt_ids):
+    """Pick among the least recently served prompts, or None if the set is exhausted."""
+    r = get_redis()
+    key = _lru_key(category.id, game.settings.get('venue'))
+    _ensure_seeded(r, key, category)
+
+    used = {str(prompt_id) for prompt_id in used_prompt_ids}
+    window = settings.PROMPT_LRU_WINDOW
+    candidate_ids = [
+        prompt_id for prompt_id in r.zrange(key, 0, len(used) + window - 1)
+        if prompt_id not in used
+    ][:window]
+    if not candidate_ids:
+        return None
+
+    prompts = list(Prompt.objects.filter(id__in=candidate_ids, category=category, is_active=True))
+    stale = set(candidate_ids) - {str(p.id) for p in prompts}
+    if stale:
+        # Deactivated or deleted prompts would otherwise sit at the front forever.
+        r.zrem(key, *stale)
+    if not prompts:
+        return None
+
+    prompt = random.choice(prompts)
+    transaction.on_commit(lambda: _mark_served(key, prompt.id))
+    return prompt
+
+
+def _mark_served(key, prompt_id):
+    try:
+        get_redis().zadd(key, {str(prompt_id): time.time()}, xx=True)
+    except redis.RedisError as e:
+        logger.warning(f"Could not mark prompt {prompt_id} as served: {e}")
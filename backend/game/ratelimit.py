@@ -0,0 +1,138 @@
+"""Token-bucket rate limits for WebSocket messages.
+
+``GameConsumer`` checks every incoming message against two buckets before
+any handler (and so any database work) runs: one for the connection and
+one shared by every connection to the same game in this process. Limits
+are set per message type in ``WS_RATE_LIMITS`` with a ``default`` entry
+for the rest; each is ``(rate per second, burst)``.
+
+Game buckets are per process, which matches how games are served (all of
+a game's sockets normally share a Daphne process). Throttled messages are
+counted in memory and added to the Redis hash ``ratelimit:throttled`` every
+``METRICS_FLUSH_SECONDS``; ``manage.py ratelimit_stats`` shows the totals.
+"""
+import asyncio
+import logging
+import time
+from collections import Counter
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from .redis_client import get_redis
+
+logger = logging.getLogger('game')
+
+METRICS_KEY = 'ratelimit:throttled'
+METRICS_FLUSH_SECONDS = 10
+IDLE_GAME_SECONDS = 600
+
+
+class TokenBucket:
+    """Allows ``burst`` messages at once, refilled at ``rate`` per second."""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        """Seconds until the next message would be allowed."""
+        return max(0.0, (1 - self.tokens) / self.rate) if self.rate else float('inf')
+
+
+def _limits(msg_type: str, scope: str):
+    limits = settings.WS_RATE_LIMITS
+    return (limits.get(msg_type) or limits['default'])[scope]
+
+
+class BucketSet:
+    """Buckets keyed by message type, created on first use."""
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        self.buckets = {}
+        self.last_used = time.monotonic()
+
+    def get(self, msg_type: str) -> TokenBucket:
+        key = msg_type if msg_type in settings.WS_RATE_LIMITS else 'default'
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(*_limits(key, self.scope))
+        self.last_used = time.monotonic()
+        return bucket
+
+
+_game_buckets = {}
+_throttled = Counter()
+_metrics_task = None
+
+
+def connection_buckets() -> BucketSet:
+    return BucketSet('connection')
+
+
+def game_buckets(game_code: str) -> BucketSet:
+    buckets = _game_buckets.get(game_code)
+    if buckets is None:
+        _prune_idle_games()
+        buckets = _game_buckets[game_code] = BucketSet('game')
+    return buckets
+
+
+def _prune_idle_games():
+    cutoff = time.monotonic() - IDLE_GAME_SECONDS
+    for code in [code for code, buckets in _game_buckets.items() if buckets.last_used < cutoff]:
+        del _game_buckets[code]
+
+
+def check(connection: BucketSet, game_code: str, msg_type: str):
+    """Return None if the message may proceed, else seconds to wait before retrying."""
+    if not settings.WS_RATE_LIMITS_ENABLED:
+        return None
+    for scope, bucket in (('connection', connection.get(msg_type)), ('game', game_buckets(game_code).get(msg_type))):
+        if not bucket.take():
+            _record(scope, msg_type)
+            return bucket.retry_after()
+    return None
+
+
+def _record(scope: str, msg_type: str):
+    global _metrics_task
+    _throttled[f'{scope}:{msg_type}'] += 1
+    if _metrics_task is None or _metrics_task.done():
+        _metrics_task = asyncio.get_running_loop().create_task(_flush_metrics_later())
+
+
+async def _flush_metrics_later():
+    await asyncio.sleep(METRICS_FLUSH_SECONDS)
+    counts = dict(_throttled)
+    _throttled.clear()
+    try:
+        await sync_to_async(_write_metrics, thread_sensitive=False)(counts)
+    except redis.RedisError as e:
+        logger.warning(f"Could not record throttle metrics: {e}")
+    logger.info(f"Throttled WebSocket messages in the last {METRICS_FLUSH_SECONDS}s: {counts}")
+
+
+def _write_metrics(counts: dict):
+    pipe = get_redis().pipeline(transaction=False)
+    for field, count in counts.items():
+        pipe.hincrby(METRICS_KEY, field, count)
+    pipe.execute()
+
+
+def throttled_totals() -> dict:
+    """Throttled message counts by ``scope:message_type`` across all processes."""
+    return {field: int(count) for field, count in get_redis().hgetall(METRICS_KEY).items()}
@@ -0,0 +1,13 @@
+"""Shared Redis client for features that need more than the cache API."""
+import redis
+from django.conf import settings
+
+_client = None
+
+
+def get_redis() -> redis.Redis:
+    """Return a process-wide Redis client (thread-safe, pooled)."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
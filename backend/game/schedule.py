@@ -0,0 +1,27 @@
+"""Turn schedule for a game.
+
+Teams take turns in ``order`` (any number of teams). With actor rotation
+enabled (``game.settings['rotate_actors']``) each team's players act in
+join order, cycling when the team runs out of players.
+"""
+
+
+def build_schedule(teams, total_rounds: int, rotate_actors: bool = False, start: int = 1) -> list:
+    """Return ``[{'round_number', 'team', 'actor'}, ...]`` for rounds ``start..total_rounds``.
+
+    Args:
+        teams: Teams in turn order, with ``players`` prefetched if rotating actors.
+        total_rounds: Last round number to schedule.
+        rotate_actors: Pre-assign actors round-robin within each team.
+        start: First round number to schedule (for extending an existing schedule).
+    """
+    schedule = []
+    for round_number in range(start, total_rounds + 1):
+        turn, team_index = divmod(round_number - 1, len(teams))
+        team = teams[team_index]
+        actor = None
+        if rotate_actors:
+            players = list(team.players.all())
+            actor = players[turn % len(players)] if players else None
+        schedule.append({'round_number': round_number, 'team': team, 'actor': actor})
+    return schedule
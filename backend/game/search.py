@@ -0,0 +1,67 @@
+"""Indexed prompt search.
+
+Queries are normalized like ``Prompt.search_text`` (``game/text.py``), so
+"محمد صلاح" finds "مُحَمَّد صَلَاح" and "spiderman" finds "Spider-Man"
+(by similarity). Two PostgreSQL GIN indexes on ``search_text`` back it:
+
+- full text (``simple`` config, no stemming): every query word as a
+  prefix, e.g. ``spid & man`` matches "Spider-Man";
+- trigrams (``pg_trgm``): substring matches (what the admin's search box
+  does) and typo-tolerant word similarity.
+
+A prompt matches if either does. Queries shorter than
+``MIN_QUERY_LENGTH`` characters are refused, and at most
+``SEARCH_CANDIDATES`` matches are ranked by trigram word similarity
+(then title), so a common prefix can't make one request score and sort a
+large share of the catalog. On other databases it falls back to
+substring matching of each word.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchVector, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Q
+from .models import Prompt
+from .text import normalize
+
+MAX_QUERY_WORDS = 8
+MIN_QUERY_LENGTH = 3
+SEARCH_CANDIDATES = 500
+
+
+def _words(query: str) -> list:
+    return normalize(query).split()[:MAX_QUERY_WORDS]
+
+
+def is_searchable(query: str) -> bool:
+    """True if the normalized query has at least MIN_QUERY_LENGTH characters besides spaces."""
+    return len(''.join(_words(query))) >= MIN_QUERY_LENGTH
+
+
+def substring_filter(query: str) -> Q:
+    """Rows whose search_text contains every word of ``query`` (trigram-indexed ILIKE on PostgreSQL)."""
+    condition = Q()
+    for word in _words(query):
+        condition &= Q(search_text__contains=word)
+    return condition
+
+
+def search_prompts(query: str, queryset=None):
+    """Prompts matching ``query``, best first; an empty queryset if it is too short."""
+    queryset = Prompt.objects.all() if queryset is None else queryset
+    words = _words(query)
+    if not is_searchable(query):
+        return queryset.none()
+    if connection.vendor != 'postgresql':
+        return queryset.filter(substring_filter(query)).order_by('title')
+
+    normalized = ' '.join(words)
+    prefix_query = SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config='simple')
+    candidates = (
+        queryset.annotate(document=SearchVector('search_text', config='simple'))
+        .filter(Q(document=prefix_query) | Q(search_text__trigram_word_similar=normalized))
+        .order_by().values('pk')[:SEARCH_CANDIDATES]
+    )
+    return (
+        Prompt.objects.filter(pk__in=candidates)
+        .annotate(similarity=TrigramWordSimilarity(normalized, 'search_text'))
+        .order_by('-similarity', 'title')
+    )
@@ -1,6 +1,6 @@
 """DRF serializers for 001 Game."""
 from rest_framework import serializers
-from .models import Game, Team, Player, Category, Prompt, Round
+from .models import Game, Team, Player, Category, Prompt, Round, GameEvent
 
 
 class PlayerSerializer(serializers.ModelSerializer):
@@ -59,6 +59,12 @@ class RoundSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'started_at', 'ended_at', 'time_taken_seconds', 'points_awarded']
 
 
+class GameEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GameEvent
+        fields = ['version', 'event_type', 'data', 'occurred_at']
+
+
 class GameSerializer(serializers.ModelSerializer):
     teams = TeamSerializer(many=True, read_only=True)
     unassigned_players = serializers.SerializerMethodField()
@@ -5,14 +5,44 @@ This separation makes it easy to add power-ups and wildcards later.
 """
 import uuid
 import logging
-import random
 from django.utils import timezone
 from django.db import transaction
-from .models import Game, Team, Player, Round, Category, Prompt
+from django.db.models import Case, Value, When
+from .models import Game, Team, Player, Round, Category
 from .scoring import calculate_points
+from .tokens import issue_round_token, verify_round_token
+from .usage import record_prompt_use
+from .prompt_selection import choose_prompt
+from .schedule import build_schedule
+from . import events, live_state, presence, prompt_cache
 
 logger = logging.getLogger('game')
 
+PROMPT_VIEWABLE_STATUSES = ('showing_qr', 'prompt_reveal', 'actor_ready', 'active')
+
+
+# Status a scheduled round opens in: actor selection is skipped when the
+# schedule pre-assigned an actor.
+OPENING_STATUS = Case(
+    When(actor__isnull=True, then=Value('selecting_actor')),
+    default=Value('selecting_category'),
+)
+
+
+def _opening_status(game_round) -> str:
+    """Python counterpart of ``OPENING_STATUS`` for an already-loaded round."""
+    return 'selecting_category' if game_round.actor_id else 'selecting_actor'
+
+
+def _round_event_data(game_round) -> dict:
+    return {
+        'id': str(game_round.id),
+        'round_number': game_round.round_number,
+        'team_id': str(game_round.team_id),
+        'actor_id': str(game_round.actor_id) if game_round.actor_id else None,
+        'status': _opening_status(game_round),
+    }
+
 
 class GameService:
     """Stateless service class for game operations."""
@@ -23,8 +53,10 @@ class GameService:
         """Create a new game and the host player."""
         game = Game.objects.create()
 
-        Team.objects.create(game=game, name='Team 1', color='#3B82F6', order=1)
-        Team.objects.create(game=game, name='Team 2', color='#EF4444', order=2)
+        teams = [
+            Team.objects.create(game=game, name='Team 1', color='#3B82F6', order=1),
+            Team.objects.create(game=game, name='Team 2', color='#EF4444', order=2),
+        ]
 
         host = Player.objects.create(
             game=game,
@@ -32,6 +64,17 @@ class GameService:
             session_key=session_key,
             is_host=True,
         )
+        events.record(
+            game.id, 'game_created',
+            code=game.code,
+            total_rounds=game.total_rounds,
+            max_time_per_turn=game.max_time_per_turn,
+            teams=[
+                {'id': str(team.id), 'name': team.name, 'color': team.color, 'order': team.order}
+                for team in teams
+            ],
+            host={'id': str(host.id), 'name': host.name},
+        )
 
         logger.info(f"Game {game.code} created by {host_name}")
         return {
@@ -51,6 +94,7 @@ class GameService:
         if existing:
             existing.name = player_name
             existing.save()
+            events.record(game.id, 'player_joined', player_id=str(existing.id), name=player_name)
             logger.info(f"Player {player_name} rejoined game {game.code}")
             return existing
 
@@ -59,6 +103,7 @@ class GameService:
             name=player_name,
             session_key=session_key,
         )
+        events.record(game.id, 'player_joined', player_id=str(player.id), name=player_name)
         logger.info(f"Player {player_name} joined game {game.code}")
         return player
 
@@ -79,6 +124,10 @@ class GameService:
             session_key=session_key,
             team=team,
         )
+        events.record(
+            game.id, 'player_joined',
+            player_id=str(player.id), name=player_name, team_id=str(team.id) if team else None,
+        )
         logger.info(f"Host added player {player_name} to game {game.code}")
         return player
 
@@ -93,6 +142,7 @@ class GameService:
 
         player.team = team
         player.save()
+        events.record(team.game_id, 'player_assigned', player_id=str(player.id), team_id=str(team.id))
         logger.info(f"Player {player.name} assigned to {team.name}")
         return player
 
@@ -105,15 +155,19 @@ class GameService:
         if color is not None:
             team.color = color
         team.save()
+        events.record(team.game_id, 'team_updated', team_id=str(team.id), name=name, color=color)
         return team
 
     @staticmethod
+    @transaction.atomic
     def update_game_settings(game_code: str, **kwargs) -> Game:
         """Update game settings (rounds, time, categories)."""
         game = Game.objects.get(code=game_code.upper())
 
         if 'total_rounds' in kwargs:
             game.total_rounds = kwargs['total_rounds']
+            if game.status == 'in_progress':
+                GameService._resize_schedule(game)
         if 'max_time_per_turn' in kwargs:
             game.max_time_per_turn = kwargs['max_time_per_turn']
         if 'settings' in kwargs:
@@ -122,43 +176,47 @@ class GameService:
             game.selected_categories.set(kwargs['category_ids'])
 
         game.save()
+        events.record(game.id, 'settings_updated', **kwargs)
         return game
 
     @staticmethod
     @transaction.atomic
     def start_game(game_code: str) -> Game:
         """Start the game — validate teams and create first round."""
+        if live_state.is_enabled():
+            live_state.release(game_code)
         game = Game.objects.select_related().get(code=game_code.upper())
 
         if game.status != 'lobby':
             raise ValueError("Game is not in lobby state")
 
-        teams = list(game.teams.all())
+        teams = list(game.teams.prefetch_related('players'))
         if len(teams) < 2:
             raise ValueError("Need at least 2 teams")
 
         for team in teams:
-            if team.players.count() < 1:
+            if not team.players.all():
                 raise ValueError(f"Team {team.name} needs at least 1 player")
 
         game.status = 'in_progress'
         game.current_round = 1
         game.save()
 
-        first_team = teams[0]
-        Round.objects.create(
-            game=game,
-            round_number=1,
-            team=first_team,
-            status='selecting_actor',
-        )
+        rounds = Round.objects.bulk_create(GameService._scheduled_rounds(game, teams, start=1))
+        first_round = rounds[0]
+        first_round.status = _opening_status(first_round)
+        first_round.save(update_fields=['status'])
+        events.record(game.id, 'game_started', round=_round_event_data(first_round))
 
         logger.info(f"Game {game.code} started with {game.total_rounds} rounds")
         return game
 
     @staticmethod
+    @transaction.atomic
     def select_actor(round_id: str, player_id: str) -> Round:
         """Select the actor for a round."""
+        if live_state.is_enabled():
+            live_state.release(live_state.code_for_round(round_id))
         game_round = Round.objects.select_related('game', 'team').get(id=round_id)
         player = Player.objects.get(id=player_id)
 
@@ -168,6 +226,7 @@ class GameService:
         game_round.actor = player
         game_round.status = 'selecting_category'
         game_round.save()
+        events.record(game_round.game_id, 'actor_selected', round_id=str(game_round.id), player_id=str(player.id))
 
         logger.info(f"Round {game_round.round_number}: {player.name} selected as actor")
         return game_round
@@ -175,7 +234,9 @@ class GameService:
     @staticmethod
     @transaction.atomic
     def select_category(round_id: str, category_id: str) -> Round:
-        """Select category and assign a random prompt for the round."""
+        """Select category and assign a prompt using the game's selection strategy."""
+        if live_state.is_enabled():
+            live_state.release(live_state.code_for_round(round_id))
         game_round = Round.objects.select_related('game').get(id=round_id)
         category = Category.objects.get(id=category_id)
 
@@ -184,164 +245,198 @@ class GameService:
             prompt__isnull=False,
         ).values_list('prompt_id', flat=True)
 
-        available_prompts = Prompt.objects.filter(
-            category=category,
-            is_active=True,
-        ).exclude(id__in=used_prompt_ids)
-
-        if not available_prompts.exists():
-            available_prompts = Prompt.objects.filter(
-                category=category,
-                is_active=True,
-            )
-
-        if not available_prompts.exists():
-            raise ValueError(f"No prompts available in category {category.name}")
-
-        prompt = random.choice(list(available_prompts))
+        prompt = choose_prompt(game_round.game, category, used_prompt_ids)
 
-        token = uuid.uuid4().hex
+        token = issue_round_token(game_round.id, prompt.id)
         game_round.category = category
         game_round.prompt = prompt
         game_round.token = token
         game_round.status = 'showing_qr'
         game_round.save()
-
-        prompt.times_used += 1
-        prompt.save(update_fields=['times_used'])
+        prompt_cache.store_payload(prompt_cache.build_payload(game_round, prompt, category))
+        transaction.on_commit(lambda: record_prompt_use(prompt.id))
+        events.record(
+            game_round.game_id, 'category_selected',
+            round_id=str(game_round.id), category_id=str(category.id), prompt_id=str(prompt.id),
+        )
 
         logger.info(f"Round {game_round.round_number}: category={category.name}, prompt={prompt.title}")
         return game_round
 
     @staticmethod
     def get_prompt_for_actor(round_id: str, token: str) -> dict:
-        """Get the prompt details for the actor (secured by token)."""
-        game_round = Round.objects.select_related('prompt', 'prompt__category').get(id=round_id)
+        """Get the prompt details for the actor (secured by a signed token).
 
-        if game_round.token != token:
-            raise PermissionError("Invalid token")
+        The token is verified before any lookup, and the payload is
+        precomputed by ``select_category``, so a viewable round is served
+        entirely from cache. The database is only a fallback after a cache
+        eviction.
+        """
+        claims = verify_round_token(round_id, token)
 
-        if game_round.status not in ('showing_qr', 'prompt_reveal', 'actor_ready', 'active'):
-            raise ValueError("Round is not in a valid state to view prompt")
+        payload = prompt_cache.get_payload(round_id)
+        if payload is None:
+            game_round = Round.objects.select_related('prompt', 'prompt__category').get(id=round_id)
 
-        prompt = game_round.prompt
-        return {
-            'round_id': str(game_round.id),
-            'round_number': game_round.round_number,
-            'title': prompt.title,
-            'title_ar': prompt.title_ar,
-            'image_url': prompt.get_image_display_url(),
-            'category': prompt.category.name,
-            'category_ar': prompt.category.name_ar,
-            'category_icon': prompt.category.icon,
-        }
+            if game_round.status not in PROMPT_VIEWABLE_STATUSES:
+                raise ValueError("Round is not in a valid state to view prompt")
+
+            payload = prompt_cache.build_payload(game_round, game_round.prompt, game_round.prompt.category)
+            prompt_cache.store_payload(payload)
+
+        if payload['prompt_id'] != claims['pid']:
+            raise PermissionError("Invalid token")
+
+        return {k: v for k, v in payload.items() if k != 'prompt_id'}
 
     @staticmethod
     def actor_ready(round_id: str) -> Round:
         """Mark the actor as ready — they've seen the prompt."""
-        game_round = Round.objects.get(id=round_id)
-        game_round.status = 'actor_ready'
-        game_round.save()
-        logger.info(f"Round {game_round.round_number}: actor is ready")
+        if live_state.is_enabled():
+            game_round = live_state.actor_ready(round_id)
+        else:
+            game_round = Round.objects.get(id=round_id)
+            game_round.status = 'actor_ready'
+            game_round.save()
+            logger.info(f"Round {game_round.round_number}: actor is ready")
+        events.record(game_round.game_id, 'actor_ready', round_id=str(game_round.id))
         return game_round
 
     @staticmethod
     def start_timer(round_id: str) -> Round:
         """Start the round timer."""
-        game_round = Round.objects.get(id=round_id)
-        if game_round.status not in ('actor_ready', 'prompt_reveal', 'showing_qr'):
-            raise ValueError("Round is not ready to start timer")
-        game_round.status = 'active'
-        game_round.started_at = timezone.now()
-        game_round.save()
-        logger.info(f"Round {game_round.round_number}: timer started")
+        if live_state.is_enabled():
+            game_round = live_state.start_timer(round_id)
+        else:
+            game_round = Round.objects.get(id=round_id)
+            if game_round.status not in ('actor_ready', 'prompt_reveal', 'showing_qr'):
+                raise ValueError("Round is not ready to start timer")
+            game_round.status = 'active'
+            game_round.started_at = timezone.now()
+            game_round.save()
+            logger.info(f"Round {game_round.round_number}: timer started")
+        events.record(
+            game_round.game_id, 'timer_started',
+            round_id=str(game_round.id), started_at=game_round.started_at,
+        )
         return game_round
 
     @staticmethod
-    @transaction.atomic
     def correct_guess(round_id: str) -> dict:
         """Mark the round as correctly guessed and award points."""
-        game_round = Round.objects.select_related('game', 'team', 'prompt').get(id=round_id)
+        if live_state.is_enabled():
+            result = live_state.correct_guess(round_id)
+            game_round = result['round']
+            events.record(
+                game_round.game_id, 'round_guessed', round_id=str(game_round.id),
+                team_id=str(game_round.team_id), time_taken=result['time_taken'], points=result['points'],
+            )
+            return result
 
-        if game_round.status != 'active':
-            raise ValueError("Round is not active")
+        with transaction.atomic():
+            game_round = Round.objects.select_related('game', 'team', 'prompt').get(id=round_id)
 
-        now = timezone.now()
-        time_taken = (now - game_round.started_at).total_seconds()
+            if game_round.status != 'active':
+                raise ValueError("Round is not active")
 
-        multiplier = game_round.metadata.get('multiplier', 1.0)
-        points = calculate_points(time_taken, multiplier)
+            now = timezone.now()
+            time_taken = (now - game_round.started_at).total_seconds()
 
-        game_round.status = 'guessed'
-        game_round.ended_at = now
-        game_round.time_taken_seconds = round(time_taken, 1)
-        game_round.points_awarded = points
-        game_round.save()
+            multiplier = game_round.metadata.get('multiplier', 1.0)
+            points = calculate_points(time_taken, multiplier)
 
-        team = game_round.team
-        team.total_score += points
-        team.save()
+            game_round.status = 'guessed'
+            game_round.ended_at = now
+            game_round.time_taken_seconds = round(time_taken, 1)
+            game_round.points_awarded = points
+            game_round.save()
+            prompt_cache.clear_payload(game_round.id)
 
-        logger.info(
-            f"Round {game_round.round_number}: guessed in {time_taken:.1f}s, "
-            f"{points} points to {team.name}"
-        )
+            team = game_round.team
+            team.total_score += points
+            team.save()
+            events.record(
+                game_round.game_id, 'round_guessed', round_id=str(game_round.id),
+                team_id=str(team.id), time_taken=round(time_taken, 1), points=points,
+            )
 
-        return {
-            'round': game_round,
-            'time_taken': round(time_taken, 1),
-            'points': points,
-            'team_score': team.total_score,
-        }
+            logger.info(
+                f"Round {game_round.round_number}: guessed in {time_taken:.1f}s, "
+                f"{points} points to {team.name}"
+            )
+
+            return {
+                'round': game_round,
+                'time_taken': round(time_taken, 1),
+                'points': points,
+                'team_score': team.total_score,
+            }
 
     @staticmethod
-    @transaction.atomic
     def timeout_round(round_id: str) -> Round:
         """Mark the round as timed out."""
-        game_round = Round.objects.select_related('game', 'team').get(id=round_id)
+        if live_state.is_enabled():
+            game_round = live_state.timeout_round(round_id)
+            events.record(game_round.game_id, 'round_timed_out', round_id=str(game_round.id))
+            return game_round
 
-        if game_round.status != 'active':
-            raise ValueError("Round is not active")
+        with transaction.atomic():
+            game_round = Round.objects.select_related('game', 'team').get(id=round_id)
 
-        now = timezone.now()
-        game_round.status = 'timeout'
-        game_round.ended_at = now
-        game_round.time_taken_seconds = (now - game_round.started_at).total_seconds()
-        game_round.points_awarded = 0
-        game_round.save()
+            if game_round.status != 'active':
+                raise ValueError("Round is not active")
 
-        logger.info(f"Round {game_round.round_number}: timed out")
-        return game_round
+            now = timezone.now()
+            game_round.status = 'timeout'
+            game_round.ended_at = now
+            game_round.time_taken_seconds = (now - game_round.started_at).total_seconds()
+            game_round.points_awarded = 0
+            game_round.save()
+            prompt_cache.clear_payload(game_round.id)
+
+            events.record(game_round.game_id, 'round_timed_out', round_id=str(game_round.id))
+            logger.info(f"Round {game_round.round_number}: timed out")
+            return game_round
 
     @staticmethod
-    @transaction.atomic
     def skip_round(round_id: str) -> Round:
         """Skip the current round."""
-        game_round = Round.objects.select_related('game', 'team').get(id=round_id)
-
-        if game_round.status not in ('active', 'showing_qr', 'prompt_reveal', 'actor_ready', 'selecting_actor', 'selecting_category'):
-            raise ValueError("Round cannot be skipped in current state")
-
-        now = timezone.now()
-        game_round.status = 'skipped'
-        game_round.ended_at = now
-        if game_round.started_at:
-            game_round.time_taken_seconds = (now - game_round.started_at).total_seconds()
-        game_round.points_awarded = 0
-        game_round.save()
-
-        logger.info(f"Round {game_round.round_number}: skipped")
-        return game_round
+        if live_state.is_enabled():
+            game_round = live_state.skip_round(round_id)
+            events.record(game_round.game_id, 'round_skipped', round_id=str(game_round.id))
+            return game_round
+
+        with transaction.atomic():
+            game_round = Round.objects.select_related('game', 'team').get(id=round_id)
+
+            if game_round.status not in ('active', 'showing_qr', 'prompt_reveal', 'actor_ready', 'selecting_actor', 'selecting_category'):
+                raise ValueError("Round cannot be skipped in current state")
+
+            now = timezone.now()
+            game_round.status = 'skipped'
+            game_round.ended_at = now
+            if game_round.started_at:
+                game_round.time_taken_seconds = (now - game_round.started_at).total_seconds()
+            game_round.points_awarded = 0
+            game_round.save()
+            prompt_cache.clear_payload(game_round.id)
+
+            events.record(game_round.game_id, 'round_skipped', round_id=str(game_round.id))
+            logger.info(f"Round {game_round.round_number}: skipped")
+            return game_round
 
     @staticmethod
     @transaction.atomic
     def advance_to_next_round(game_code: str) -> dict:
         """Advance to the next round or finish the game."""
+        if live_state.is_enabled():
+            live_state.release(game_code)
         game = Game.objects.get(code=game_code.upper())
 
         if game.current_round >= game.total_rounds:
             game.status = 'finished'
             game.save()
+            events.record(game.id, 'game_finished')
             logger.info(f"Game {game.code} finished")
             return {'finished': True, 'game': game}
 
@@ -349,24 +444,48 @@ class GameService:
         game.current_round = next_round_number
         game.save()
 
-        teams = list(game.teams.order_by('order'))
-        current_round_obj = game.rounds.get(round_number=game.current_round - 1)
-        current_team_order = current_round_obj.team.order
-        next_team = teams[0] if current_team_order == 2 else teams[1]
+        # The schedule was materialized by start_game, so opening the next
+        # round is a single update on the (game, round_number) index.
+        scheduled = Round.objects.filter(game=game, round_number=next_round_number, status='pending')
+        if not scheduled.update(status=OPENING_STATUS):
+            # Games started before schedules were materialized.
+            teams = list(game.teams.prefetch_related('players'))
+            Round.objects.bulk_create(GameService._scheduled_rounds(game, teams, start=next_round_number))
+            scheduled.update(status=OPENING_STATUS)
 
-        new_round = Round.objects.create(
-            game=game,
-            round_number=next_round_number,
-            team=next_team,
-            status='selecting_actor',
-        )
+        new_round = Round.objects.select_related('team', 'actor').get(game=game, round_number=next_round_number)
+        events.record(game.id, 'round_advanced', round=_round_event_data(new_round))
 
-        logger.info(f"Game {game.code}: advanced to round {next_round_number}, team {next_team.name}")
+        logger.info(f"Game {game.code}: advanced to round {next_round_number}, team {new_round.team.name}")
         return {'finished': False, 'round': new_round, 'game': game}
 
+    @staticmethod
+    def _scheduled_rounds(game, teams, start: int) -> list:
+        """Unsaved pending rounds for ``start..game.total_rounds``."""
+        schedule = build_schedule(
+            teams, game.total_rounds,
+            rotate_actors=game.settings.get('rotate_actors', False),
+            start=start,
+        )
+        return [
+            Round(game=game, round_number=slot['round_number'], team=slot['team'], actor=slot['actor'], status='pending')
+            for slot in schedule
+        ]
+
+    @staticmethod
+    def _resize_schedule(game):
+        """Add or drop pending rounds after total_rounds changes mid-game."""
+        Round.objects.filter(game=game, round_number__gt=game.total_rounds, status='pending').delete()
+        last = game.rounds.order_by('-round_number').values_list('round_number', flat=True).first() or 0
+        if last < game.total_rounds:
+            teams = list(game.teams.prefetch_related('players'))
+            Round.objects.bulk_create(GameService._scheduled_rounds(game, teams, start=last + 1))
+
     @staticmethod
     def get_scoreboard(game_code: str) -> dict:
         """Get the final scoreboard for a game."""
+        if live_state.is_enabled():
+            live_state.persist_game(game_code)
         game = Game.objects.get(code=game_code.upper())
         teams = game.teams.all()
         rounds = game.rounds.filter(status__in=['guessed', 'timeout', 'skipped']).select_related(
@@ -449,7 +568,7 @@ class GameService:
                     'points_awarded': round_obj.points_awarded,
                 }
 
-        return {
+        state = {
             'code': game.code,
             'status': game.status,
             'current_round': game.current_round,
@@ -461,8 +580,21 @@ class GameService:
                 for p in unassigned_players
             ],
             'round': current_round,
+            'schedule': [
+                {
+                    'round_number': r.round_number,
+                    'team_id': str(r.team_id),
+                    'actor_id': str(r.actor_id) if r.actor_id else None,
+                    'status': r.status,
+                }
+                for r in game.rounds.all()
+            ],
             'selected_categories': [
                 {'id': str(c.id), 'name': c.name, 'name_ar': c.name_ar, 'icon': c.icon}
                 for c in game.selected_categories.all()
             ],
+            'online_players': presence.online_players(game.code),
         }
+        if live_state.is_enabled() and game.status == 'in_progress':
+            state = live_state.overlay(state)
+        return state
@@ -0,0 +1,74 @@
+"""Content-addressed media storage.
+
+Files are stored under their SHA-256, as ``<top dir>/<2 hex>/<64 hex><ext>``
+(for example ``prompts/3f/3fa2….jpg``), whatever name they were saved
+with. The same bytes saved twice, by any prompt, upload, import or
+variant, end up as one file, and a name always refers to the same bytes,
+so nginx can serve ``/media/`` files as immutable.
+
+Because a file may be shared, ``delete()`` does nothing; files no longer
+referenced by any prompt are removed by ``manage.py dedupe_media --prune``
+(the ``media-pruner`` compose service), which skips recently saved files.
+Saving bytes that are already stored refreshes the file's mtime for that.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import uuid
+from django.core.files.storage import FileSystemStorage
+
+HASH_CHUNK = 1024 * 1024
+HASHED_NAME = re.compile(r'^[^/]+/[0-9a-f]{2}/[0-9a-f]{64}(\.[\w]+)?$')
+
+
+def content_hash(content) -> str:
+    """SHA-256 of a file-like object, leaving it at position 0."""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK) if hasattr(content, 'chunks') else iter(lambda: content.read(HASH_CHUNK), b''):
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name: str, sha256: str) -> str:
+    top = name.replace('\\', '/').split('/', 1)[0] if '/' in name else 'files'
+    extension = os.path.splitext(name)[1].lower()
+    return posixpath.join(top, sha256[:2], sha256 + extension)
+
+
+def is_hashed(name: str) -> bool:
+    return bool(HASHED_NAME.match(name or ''))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    def _save(self, name, content):
+        target = hashed_name(name, content_hash(content))
+        try:
+            os.utime(self.path(target))
+            return target
+        except FileNotFoundError:
+            pass
+        # Write under a temporary name and link it into place, so the hashed
+        # name never holds a partial file and a concurrent save of the same
+        # bytes that got there first counts as success instead of being
+        # renamed by ``get_available_name``.
+        temporary = super()._save(posixpath.join(posixpath.dirname(target), f'.{uuid.uuid4().hex}.tmp'), content)
+        try:
+            os.link(self.path(temporary), self.path(target))
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(self.path(temporary))
+        return target
+
+    def delete(self, name):
+        """Files may be shared between prompts; see ``delete_unshared``."""
+
+    def delete_unshared(self, name):
+        """Really delete ``name``; callers must know nothing references it."""
+        super().delete(name)
@@ -0,0 +1,120 @@
+"""Group delivery of ``LocalFanoutChannelLayer`` across two nodes.
+
+Two layer instances stand in for two Daphne processes and share one fake
+Redis server, so the Redis half of ``group_send`` runs for real.
+"""
+import asyncio
+import unittest
+from unittest import mock
+from django.test import SimpleTestCase
+from game.channel_layers import LocalFanoutChannelLayer
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+RECEIVE_TIMEOUT = 2
+REMOTE_RECHECK = 0.2
+
+
+class FakeRedisLayer(LocalFanoutChannelLayer):
+    def __init__(self, server, **kwargs):
+        super().__init__(**kwargs)
+        self.server = server
+
+    def connection(self, index):
+        return fakeredis.FakeAsyncRedis(server=self.server)
+
+
+@unittest.skipUnless(fakeredis, 'fakeredis is not installed')
+class LocalFanoutChannelLayerTests(SimpleTestCase):
+    group = 'game_TEST01'
+
+    def setUp(self):
+        server = fakeredis.FakeServer()
+        self.node_a = FakeRedisLayer(server, remote_recheck=REMOTE_RECHECK)
+        self.node_b = FakeRedisLayer(server, remote_recheck=REMOTE_RECHECK)
+
+    async def join(self, node, count):
+        channels = []
+        for _ in range(count):
+            channel = await node.new_channel()
+            await node.group_add(self.group, channel)
+            channels.append(channel)
+        return channels
+
+    async def assert_received(self, node, channel, labels):
+        """``channel`` gets exactly ``labels`` (in any order), then nothing else."""
+        received = []
+        for _ in labels:
+            message = await asyncio.wait_for(node.receive(channel), RECEIVE_TIMEOUT)
+            received.append(message['label'])
+        self.assertCountEqual(received, labels)
+        # A direct message sent after the broadcasts must be the next one received.
+        await node.send(channel, {'type': 'test.end', 'label': 'end'})
+        message = await asyncio.wait_for(node.receive(channel), RECEIVE_TIMEOUT)
+        self.assertEqual(message['label'], 'end')
+
+    async def broadcast(self, node, label):
+        await node.group_send(self.group, {'type': 'test.message', 'label': label})
+
+    async def test_local_only_group(self):
+        members = await self.join(self.node_a, 3)
+        self.assertEqual(self.node_a.local_groups[self.group], set(members))
+
+        await self.broadcast(self.node_a, 'one')
+        await self.broadcast(self.node_a, 'two')
+        for channel in members:
+            await self.assert_received(self.node_a, channel, ['one', 'two'])
+
+    async def test_all_local_group_skips_redis_until_recheck(self):
+        members = await self.join(self.node_a, 2)
+        with mock.patch.object(self.node_a, '_group_members', wraps=self.node_a._group_members) as lookup:
+            for label in ('one', 'two', 'three'):
+                await self.broadcast(self.node_a, label)
+            self.assertEqual(lookup.call_count, 1)
+
+            # A socket joining on another node is picked up once the recheck is due.
+            remote = await self.join(self.node_b, 1)
+            await asyncio.sleep(REMOTE_RECHECK)
+            await self.broadcast(self.node_a, 'four')
+            self.assertEqual(lookup.call_count, 2)
+        for channel in members:
+            await self.assert_received(self.node_a, channel, ['one', 'two', 'three', 'four'])
+        await self.assert_received(self.node_b, remote[0], ['four'])
+
+    async def test_remote_only_group(self):
+        members = await self.join(self.node_b, 2)
+        self.assertNotIn(self.group, self.node_a.local_groups)
+
+        await self.broadcast(self.node_a, 'from-a')
+        for channel in members:
+            await self.assert_received(self.node_b, channel, ['from-a'])
+
+    async def test_mixed_group_gets_one_copy_from_either_node(self):
+        local = await self.join(self.node_a, 2)
+        remote = await self.join(self.node_b, 2)
+
+        await self.broadcast(self.node_a, 'from-a')
+        await self.broadcast(self.node_b, 'from-b')
+        for channel in local:
+            await self.assert_received(self.node_a, channel, ['from-a', 'from-b'])
+        for channel in remote:
+            await self.assert_received(self.node_b, channel, ['from-a', 'from-b'])
+
+    async def test_group_discard(self):
+        local = await self.join(self.node_a, 2)
+        remote = await self.join(self.node_b, 2)
+        await self.node_a.group_discard(self.group, local[0])
+        await self.node_b.group_discard(self.group, remote[0])
+
+        await self.broadcast(self.node_a, 'from-a')
+        await self.broadcast(self.node_b, 'from-b')
+        await self.assert_received(self.node_a, local[0], [])
+        await self.assert_received(self.node_b, remote[0], [])
+        await self.assert_received(self.node_a, local[1], ['from-a', 'from-b'])
+        await self.assert_received(self.node_b, remote[1], ['from-a', 'from-b'])
+
+        await self.node_a.group_discard(self.group, local[1])
+        self.assertNotIn(self.group, self.node_a.local_groups)
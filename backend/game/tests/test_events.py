@@ -0,0 +1,20 @@
+"""Replaying events onto a state."""
+from django.test import SimpleTestCase
+from game import events
+
+
+class ApplyTests(SimpleTestCase):
+
+    def test_events_for_teams_and_players_never_created(self):
+        # Games created before the event log start without game_created/player_joined events.
+        state = events.initial_state()
+        events.apply(state, 'team_updated', {'team_id': 't1', 'name': 'Falcons', 'color': None})
+        events.apply(state, 'player_assigned', {'player_id': 'p1', 'team_id': 't1'})
+        events.apply(state, 'round_guessed', {
+            'round_id': 'r1', 'team_id': 't2', 'time_taken': 12, 'points': 3,
+        })
+
+        self.assertEqual(state['teams']['t1'], {'id': 't1', 'total_score': 0, 'name': 'Falcons'})
+        self.assertEqual(state['teams']['t2']['total_score'], 3)
+        self.assertEqual(state['players']['p1'], {'is_host': False, 'team_id': 't1'})
+        self.assertEqual(state['rounds']['r1']['status'], 'guessed')
@@ -0,0 +1,114 @@
+"""Image mirroring against a local stand-in HTTP server."""
+import io
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+from game import mirror
+
+
+def _jpeg() -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), 'red').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves ``server.routes[path]``: a list of ``(status, body)`` responses, the last one repeating."""
+
+    def do_GET(self):
+        responses = self.server.routes[self.path]
+        self.server.hits[self.path] = self.server.hits.get(self.path, 0) + 1
+        status, body = responses.pop(0) if len(responses) > 1 else responses[0]
+        self.send_response(status)
+        if body == 'truncated':
+            self.send_header('Content-Length', '1000')
+            self.end_headers()
+            self.wfile.write(b'partial')
+            return
+        if body == 'truncated-chunked':
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            self.wfile.write(b'3e8\r\npartial')
+            return
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(IMAGE_MIRROR_MAX_BYTES=10_000, IMAGE_MIRROR_RETRIES=2, IMAGE_MIRROR_TIMEOUT=5)
+class MirrorTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.routes = {}
+        self.server.hits = {}
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        patcher = mock.patch('game.mirror.time.sleep')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def url(self, path, *responses):
+        self.server.routes[path] = list(responses)
+        return f'http://127.0.0.1:{self.server.server_port}{path}'
+
+    def test_retries_503_then_mirrors(self):
+        url = self.url('/flaky.jpg', (503, b''), (200, _jpeg()))
+        with self.settings(MEDIA_ROOT=self.media):
+            values = mirror.mirror('prompt-1', url)
+        self.assertEqual(self.server.hits['/flaky.jpg'], 2)
+        self.assertEqual(values['mirrored_from'], url)
+        self.assertTrue(values['mirrored_image'].endswith('.jpg'))
+        self.assertTrue(values['image_variants']['variants'])
+
+    def test_gives_up_after_retries(self):
+        url = self.url('/down.jpg', (503, b''))
+        with self.assertRaises(mirror.MirrorError) as raised:
+            mirror.fetch(url)
+        self.assertTrue(raised.exception.retry)
+        self.assertEqual(self.server.hits['/down.jpg'], 3)
+
+    def test_404_is_not_retried(self):
+        url = self.url('/missing.jpg', (404, b''))
+        with self.assertRaises(mirror.MirrorError) as raised:
+            mirror.fetch(url)
+        self.assertFalse(raised.exception.retry)
+        self.assertEqual(self.server.hits['/missing.jpg'], 1)
+
+    def test_oversize_is_rejected(self):
+        url = self.url('/huge.jpg', (200, b'x' * 20_000))
+        with self.assertRaisesMessage(mirror.MirrorError, 'byte limit'):
+            mirror.fetch(url)
+
+    def test_non_image_is_rejected(self):
+        url = self.url('/page.html', (200, b'<html>not an image</html>'))
+        with self.settings(MEDIA_ROOT=self.media), self.assertRaisesMessage(mirror.MirrorError, 'not an image'):
+            mirror.mirror('prompt-2', url)
+
+    def test_truncated_response_is_retried(self):
+        url = self.url('/cut.jpg', (200, 'truncated'), (200, _jpeg()))
+        self.assertEqual(mirror.fetch(url), _jpeg())
+        self.assertEqual(self.server.hits['/cut.jpg'], 2)
+
+    def test_truncated_chunked_response_is_retried(self):
+        url = self.url('/cut-chunked.jpg', (200, 'truncated-chunked'), (200, _jpeg()))
+        self.assertEqual(mirror.fetch(url), _jpeg())
+        self.assertEqual(self.server.hits['/cut-chunked.jpg'], 2)
@@ -0,0 +1,51 @@
+"""Content-addressed storage under concurrent saves."""
+import os
+import shutil
+import tempfile
+import threading
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+from game.storage import ContentAddressedStorage, is_hashed
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def test_same_bytes_share_one_name(self):
+        first = self.storage.save('prompts/a.jpg', ContentFile(b'image bytes'))
+        second = self.storage.save('prompts/b.JPG', ContentFile(b'image bytes'))
+        self.assertTrue(is_hashed(first))
+        self.assertEqual(first, second)
+
+    def test_concurrent_saves_keep_the_hashed_name(self):
+        data = os.urandom(256 * 1024)
+        names = []
+        threads = [
+            threading.Thread(target=lambda: names.append(self.storage.save('prompts/a.jpg', ContentFile(data))))
+            for _ in range(16)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(names)), 1)
+        self.assertTrue(is_hashed(names[0]))
+        self.assertEqual(os.listdir(os.path.dirname(self.storage.path(names[0]))), [os.path.basename(names[0])])
+        with self.storage.open(names[0], 'rb') as file:
+            self.assertEqual(file.read(), data)
+
+    def test_saving_stored_bytes_refreshes_mtime(self):
+        name = self.storage.save('prompts/a.jpg', ContentFile(b'image bytes'))
+        os.utime(self.storage.path(name), (0, 0))
+        self.storage.save('prompts/b.jpg', ContentFile(b'image bytes'))
+        self.assertGreater(os.stat(self.storage.path(name)).st_mtime, 0)
+
+    def test_delete_keeps_shared_files(self):
+        name = self.storage.save('prompts/a.jpg', ContentFile(b'image bytes'))
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
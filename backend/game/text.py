@@ -0,0 +1,42 @@
+"""Text normalization for searching and comparing prompt titles.
+
+Arabic titles are written with and without diacritics and with several
+forms of the same letter (أ/إ/آ/ا, ى/ي, ة/ه), and Latin ones with varying
+case and accents. ``normalize`` folds all of these to one form, so the
+stored ``Prompt.search_text`` and a user's query compare equal whichever
+spelling either used. ``title_key`` goes one step further for duplicate
+detection and also ignores spacing, so "Spider-Man" and "Spiderman" share
+a key.
+"""
+import re
+import unicodedata
+
+# Letters NFKD leaves alone but that people use interchangeably.
+_LETTER_FORMS = str.maketrans({
+    'ٱ': 'ا',  # alef wasla
+    'ى': 'ي',  # alef maqsura
+    'ة': 'ه',  # teh marbuta
+    'ی': 'ي',  # farsi yeh
+    'ک': 'ك',  # keheh
+})
+_TATWEEL = 'ـ'
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop accents and Arabic diacritics, unify letter forms and punctuation to single spaces."""
+    # NFKD splits hamza/madda forms (أ إ آ ؤ ئ) and accented letters into a base letter plus a
+    # combining mark, and presentation forms into plain letters; the marks are then dropped.
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch) and ch != _TATWEEL)
+    return _NON_WORD.sub(' ', stripped.translate(_LETTER_FORMS).casefold()).strip()
+
+
+def search_text(title: str, title_ar: str) -> str:
+    """The ``Prompt.search_text`` value for these titles."""
+    return normalize(f'{title} {title_ar}')
+
+
+def title_key(title: str) -> str:
+    """The ``Prompt.title_key`` value: ``normalize`` without spaces."""
+    return normalize(title).replace(' ', '')
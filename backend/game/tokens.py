@@ -0,0 +1,76 @@
+"""Signed tokens for the actor QR code and for player identity.
+
+Round tokens are short JWTs signed with ``ROUND_TOKEN_SECRET`` that carry
+the round and prompt they were issued for, so the prompt endpoint can
+reject forged or expired links without touching the database. Player
+tokens carry a player id and game code and are signed with
+``PLAYER_TOKEN_SECRET``; they identify a phone on WebSocket connect and API
+calls without a session lookup.
+"""
+import time
+import jwt
+from django.conf import settings
+
+ALGORITHM = 'HS256'
+
+
+def issue_round_token(round_id, prompt_id) -> str:
+    """Sign a token granting access to one round's prompt."""
+    payload = {
+        'rid': str(round_id),
+        'pid': str(prompt_id),
+        'exp': int(time.time()) + settings.ROUND_TOKEN_TTL,
+    }
+    return jwt.encode(payload, settings.ROUND_TOKEN_SECRET, algorithm=ALGORITHM)
+
+
+def verify_round_token(round_id, token: str) -> dict:
+    """Return the token claims, raising PermissionError if it isn't valid for this round."""
+    if not token:
+        raise PermissionError("Missing token")
+    try:
+        claims = jwt.decode(
+            token,
+            settings.ROUND_TOKEN_SECRET,
+            algorithms=[ALGORITHM],
+            options={'require': ['exp', 'rid', 'pid']},
+        )
+    except jwt.ExpiredSignatureError:
+        raise PermissionError("Token expired")
+    except jwt.InvalidTokenError:
+        raise PermissionError("Invalid token")
+
+    if claims['rid'] != str(round_id):
+        raise PermissionError("Invalid token")
+    return claims
+
+
+def issue_player_token(player_id, game_code: str) -> str:
+    """Sign a token identifying a player within one game."""
+    payload = {
+        'sub': str(player_id),
+        'gc': game_code.upper(),
+        'exp': int(time.time()) + settings.PLAYER_TOKEN_TTL,
+    }
+    return jwt.encode(payload, settings.PLAYER_TOKEN_SECRET, algorithm=ALGORITHM)
+
+
+def verify_player_token(token: str, game_code: str = None) -> dict:
+    """Return the token claims, raising PermissionError if invalid or for another game."""
+    if not token:
+        raise PermissionError("Missing token")
+    try:
+        claims = jwt.decode(
+            token,
+            settings.PLAYER_TOKEN_SECRET,
+            algorithms=[ALGORITHM],
+            options={'require': ['exp', 'sub', 'gc']},
+        )
+    except jwt.ExpiredSignatureError:
+        raise PermissionError("Token expired")
+    except jwt.InvalidTokenError:
+        raise PermissionError("Invalid token")
+
+    if game_code is not None and claims['gc'] != game_code.upper():
+        raise PermissionError("Token is for a different game")
+    return claims
@@ -9,5 +9,9 @@ router.register(r'categories', views.CategoryViewSet, basename='category')
 router.register(r'rounds', views.RoundViewSet, basename='round')
 
 urlpatterns = [
+    path('health/live/', views.liveness, name='health-live'),
+    path('health/ready/', views.readiness, name='health-ready'),
+    path('catalog/', views.catalog_version, name='catalog-version'),
+    path('prompts/search/', views.prompt_search, name='prompt-search'),
     path('', include(router.urls)),
 ]
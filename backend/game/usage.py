@@ -0,0 +1,118 @@
+"""Buffered prompt usage counters.
+
+Rounds record prompt usage with a Redis ``HINCRBY`` instead of updating
+``Prompt.times_used`` inside the round transaction. ``flush_prompt_usage``
+periodically folds the buffered counts into the database with one
+``UPDATE`` per distinct increment, exactly once per batch.
+"""
+import logging
+import time
+import uuid
+from collections import defaultdict
+import redis
+from django.db import transaction
+from django.db.models import F
+from . import fingerprints
+from .locks import RedisLock
+from .models import Prompt
+from .redis_client import get_redis
+
+logger = logging.getLogger('game')
+
+PENDING_KEY = 'prompt_usage:pending'
+FLUSHING_KEY = 'prompt_usage:flushing'
+FLUSH_ID_KEY = 'prompt_usage:flush_id'
+FLUSH_LOCK_KEY = 'prompt_usage:flush_lock'
+FLUSH_LOCK_TTL = 60
+FLUSH_FINGERPRINT = 'prompt_usage_flush'
+
+
+def record_prompt_use(prompt_id):
+    """Buffer one use of a prompt, falling back to a direct update if Redis is down."""
+    try:
+        get_redis().hincrby(PENDING_KEY, str(prompt_id), 1)
+    except redis.RedisError as e:
+        logger.warning(f"Usage buffer unavailable ({e}), updating prompt {prompt_id} directly")
+        Prompt.objects.filter(id=prompt_id).update(times_used=F('times_used') + 1)
+
+
+def pending_uses(prompt_id) -> int:
+    """Uses of a prompt recorded since the last flush."""
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.hget(PENDING_KEY, str(prompt_id))
+    pipe.hget(FLUSHING_KEY, str(prompt_id))
+    try:
+        pending, flushing = pipe.execute()
+    except redis.RedisError:
+        return 0
+    return int(pending or 0) + int(flushing or 0)
+
+
+def pending_uses_many(prompt_ids) -> dict:
+    """``{id: uses since the last flush}`` for several prompts in one round trip."""
+    fields = [str(prompt_id) for prompt_id in prompt_ids]
+    if not fields:
+        return {}
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.hmget(PENDING_KEY, fields)
+    pipe.hmget(FLUSHING_KEY, fields)
+    try:
+        pending, flushing = pipe.execute()
+    except redis.RedisError:
+        return {}
+    return {
+        prompt_id: int(count or 0) + int(batch or 0)
+        for prompt_id, count, batch in zip(prompt_ids, pending, flushing)
+    }
+
+
+def flush_prompt_usage(wait: float = 0) -> int:
+    """Apply buffered counts to ``Prompt.times_used``; returns prompts updated.
+
+    One flusher runs at a time; others return 0 at once, or after waiting
+    up to ``wait`` seconds for the lock. The pending hash is renamed before
+    reading so new increments keep landing in a fresh hash, and the renamed
+    batch gets an id that is stored as a fingerprint in the same
+    transaction as the counts. A flush that dies before deleting the
+    batch is resumed by the next call: the batch is applied if its id is
+    not stored yet, and only deleted if it is.
+    """
+    r = get_redis()
+    lock = RedisLock(FLUSH_LOCK_KEY, FLUSH_LOCK_TTL)
+    deadline = time.monotonic() + wait
+    while not lock.acquire():
+        if time.monotonic() >= deadline:
+            return 0
+        time.sleep(0.5)
+
+    try:
+        if not r.exists(FLUSHING_KEY):
+            try:
+                r.rename(PENDING_KEY, FLUSHING_KEY)
+            except redis.ResponseError:
+                return 0  # nothing pending
+            r.delete(FLUSH_ID_KEY)
+        # Set after the rename; a batch that lost its id was never applied.
+        r.set(FLUSH_ID_KEY, uuid.uuid4().hex, nx=True)
+        flush_id = r.get(FLUSH_ID_KEY)
+
+        counts = r.hgetall(FLUSHING_KEY)
+        if fingerprints.get(FLUSH_FINGERPRINT) != flush_id:
+            by_increment = defaultdict(list)
+            for prompt_id, count in counts.items():
+                by_increment[int(count)].append(prompt_id)
+            lock.extend()
+            with transaction.atomic():
+                for increment, prompt_ids in by_increment.items():
+                    Prompt.objects.filter(id__in=prompt_ids).update(times_used=F('times_used') + increment)
+                fingerprints.store(FLUSH_FINGERPRINT, flush_id)
+        else:
+            logger.info(f"Usage batch {flush_id} was already applied, discarding it")
+            counts = {}
+
+        r.delete(FLUSHING_KEY, FLUSH_ID_KEY)
+    finally:
+        lock.release()
+    if counts:
+        logger.info(f"Flushed usage counts for {len(counts)} prompts")
+    return len(counts)
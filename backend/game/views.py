@@ -1,13 +1,17 @@
 """API views for 001 Game."""
 import uuid
 import logging
+import redis
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.conf import settings
+from django.db import DatabaseError, connection
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
@@ -16,21 +20,54 @@ from .serializers import (
     GameSerializer, TeamSerializer, CategorySerializer, RoundSerializer,
     CreateGameSerializer, JoinGameSerializer, AssignPlayerSerializer,
     UpdateTeamSerializer, GameSettingsSerializer, SelectActorSerializer,
-    SelectCategorySerializer,
+    SelectCategorySerializer, GameEventSerializer, PromptSerializer,
 )
 from .services import GameService
+from . import events as game_events
+from . import presence as game_presence
+from . import catalog
+from . import search
+from . import drain
+from . import images
+from .redis_client import get_redis
+from .profiling import ProfilingMixin
+from .auth import PlayerIdentity
+from .tokens import issue_player_token
 
 logger = logging.getLogger('game')
 
+PROMPT_SEARCH_DEFAULT_LIMIT = 20
+PROMPT_SEARCH_MAX_LIMIT = 50
+
+
+def _with_best_image(result: dict, request) -> dict:
+    """Replace the variant list with the variants that fit the device (``?width=`` in pixels)."""
+    try:
+        device_width = int(request.query_params.get('width', 0))
+    except ValueError:
+        device_width = 0
+    sources = images.best_sources(result.pop('image_variants', None), device_width)
+    if sources:
+        fallback = sources[-1]
+        result.update(image_url=fallback['url'], image_width=fallback['width'], image_height=fallback['height'])
+    result['image_sources'] = sources
+    return result
+
 
 @method_decorator(csrf_exempt, name='dispatch')
-class GameViewSet(viewsets.GenericViewSet):
+class GameViewSet(ProfilingMixin, viewsets.GenericViewSet):
     """Game management endpoints."""
     lookup_field = 'code'
 
     def get_queryset(self):
         return Game.objects.prefetch_related('teams__players', 'rounds', 'selected_categories')
 
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        code = kwargs.get('code')
+        if code and isinstance(request.user, PlayerIdentity) and request.user.game_code != code.upper():
+            raise PermissionDenied("Token is for a different game")
+
     def create(self, request):
         """POST /api/games/ — Create a new game."""
         try:
@@ -49,6 +86,7 @@ class GameViewSet(viewsets.GenericViewSet):
                 'code': game.code,
                 'game': GameSerializer(game).data,
                 'player_id': str(result['host'].id),
+                'player_token': issue_player_token(result['host'].id, game.code),
                 'session_key': session_key,
             }, status=status.HTTP_201_CREATED)
         except Exception as e:
@@ -66,12 +104,7 @@ class GameViewSet(viewsets.GenericViewSet):
         serializer = JoinGameSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        session_key = request.data.get('session_key', '')
-        if not session_key:
-            session_key = request.session.session_key
-            if not session_key:
-                request.session.create()
-                session_key = request.session.session_key
+        session_key = request.data.get('session_key', '') or f'player_{uuid.uuid4().hex[:16]}'
 
         try:
             player = GameService.join_game(
@@ -81,6 +114,7 @@ class GameViewSet(viewsets.GenericViewSet):
             )
             return Response({
                 'player_id': str(player.id),
+                'player_token': issue_player_token(player.id, code),
                 'session_key': session_key,
                 'player_name': player.name,
                 'team_id': str(player.team_id) if player.team_id else None,
@@ -154,6 +188,36 @@ class GameViewSet(viewsets.GenericViewSet):
         except Game.DoesNotExist:
             return Response({'error': 'Game not found'}, status=status.HTTP_404_NOT_FOUND)
 
+    @action(detail=True, methods=['get'], url_path='presence')
+    def presence(self, request, code=None):
+        """GET /api/games/{code}/presence/ — Players with a live connection."""
+        return Response({
+            'online': game_presence.online_players(code),
+            'timeout': settings.PRESENCE_TIMEOUT,
+        })
+
+    @action(detail=True, methods=['get'], url_path='events')
+    def events(self, request, code=None):
+        """GET /api/games/{code}/events/?since=N — Events after version N."""
+        game = get_object_or_404(Game.objects.only('id'), code=code.upper())
+        try:
+            since = int(request.query_params.get('since', 0))
+        except ValueError:
+            return Response({'error': 'since must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        page = game_events.events_since(game.id, since)[:500]
+        return Response({'events': GameEventSerializer(page, many=True).data})
+
+    @action(detail=True, methods=['get'], url_path='replay')
+    def replay(self, request, code=None):
+        """GET /api/games/{code}/replay/?version=N — Game state rebuilt from the event log."""
+        game = get_object_or_404(Game.objects.only('id'), code=code.upper())
+        try:
+            version = int(request.query_params['version']) if 'version' in request.query_params else None
+        except ValueError:
+            return Response({'error': 'version must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        state, applied = game_events.replay(game.id, version)
+        return Response({'version': applied, 'state': state})
+
 
 @method_decorator(csrf_exempt, name='dispatch')
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
@@ -163,7 +227,7 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class RoundViewSet(viewsets.GenericViewSet):
+class RoundViewSet(ProfilingMixin, viewsets.GenericViewSet):
     """Round action endpoints."""
 
     @action(detail=True, methods=['get'], url_path='prompt')
@@ -172,11 +236,14 @@ class RoundViewSet(viewsets.GenericViewSet):
         token = request.query_params.get('token', '')
         try:
             result = GameService.get_prompt_for_actor(pk, token)
-            return Response(result)
+            result = _with_best_image(result, request)
+            response = Response(result)
+            response['Cache-Control'] = 'private, no-store'
+            return response
         except Round.DoesNotExist:
             return Response({'error': 'Round not found'}, status=status.HTTP_404_NOT_FOUND)
-        except PermissionError:
-            return Response({'error': 'Invalid token'}, status=status.HTTP_403_FORBIDDEN)
+        except PermissionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
         except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -290,3 +357,76 @@ class RoundViewSet(viewsets.GenericViewSet):
             })
         except Game.DoesNotExist:
             return Response({'error': 'Game not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def prompt_search(request):
+    """GET /api/prompts/search/?q=...&category={id}&limit=N — Active prompts matching q, best first."""
+    try:
+        limit = min(int(request.query_params.get('limit', PROMPT_SEARCH_DEFAULT_LIMIT)), PROMPT_SEARCH_MAX_LIMIT)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    queryset = Prompt.objects.filter(is_active=True, category__is_active=True)
+    category = request.query_params.get('category')
+    if category:
+        try:
+            queryset = queryset.filter(category_id=uuid.UUID(category))
+        except ValueError:
+            return Response({'error': 'category must be a category id'}, status=status.HTTP_400_BAD_REQUEST)
+    query = request.query_params.get('q', '')
+    if not search.is_searchable(query):
+        return Response(
+            {'error': f'q must have at least {search.MIN_QUERY_LENGTH} letters or digits'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    results = search.search_prompts(query, queryset)[:max(limit, 1)]
+    return Response({'results': PromptSerializer(results, many=True).data})
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def catalog_version(request):
+    """GET /api/catalog/ — Current version and URLs of the static catalog bundles."""
+    version = catalog.current_version()
+    if version is None:
+        return Response({'error': 'Catalog not published yet'}, status=status.HTTP_404_NOT_FOUND)
+    response = Response({
+        'version': version,
+        **{f'{name}_url': catalog.bundle_url(name, version) for name in catalog.BUNDLES},
+    })
+    response['Cache-Control'] = 'public, max-age=30'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def liveness(request):
+    """GET /api/health/live/ — The process is up and serving requests."""
+    return Response({'status': 'ok'})
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def readiness(request):
+    """GET /api/health/ready/ — Whether the load balancer should route traffic here."""
+    if drain.is_draining():
+        return Response({'status': 'draining'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    checks = {}
+    try:
+        connection.ensure_connection()
+        checks['database'] = 'ok'
+    except DatabaseError as e:
+        checks['database'] = str(e)
+    try:
+        get_redis().ping()
+        checks['redis'] = 'ok'
+    except redis.RedisError as e:
+        checks['redis'] = str(e)
+
+    ready = all(result == 'ok' for result in checks.values())
+    return Response(
+        {'status': 'ready' if ready else 'unavailable', 'checks': checks},
+        status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
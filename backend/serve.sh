@@ -0,0 +1,21 @@
+#!/bin/sh
+# Start the web tier.
+#
+#   SERVER_MODE=asgi   (default) gunicorn runs WEB_WORKERS uvicorn workers, each serving
+#                      HTTP and WebSockets from config.asgi. It listens on both 8000 and
+#                      8001 so the nginx upstreams for /api and /ws work unchanged.
+#   SERVER_MODE=split  the old layout: gunicorn (WSGI, 3 workers) on 8000 and a single
+#                      Daphne process for WebSockets on 8001.
+set -e
+
+if [ "${SERVER_MODE:-asgi}" = "split" ]; then
+  gunicorn config.wsgi:application --bind 0.0.0.0:8000 --workers 3 &
+  exec daphne -b 0.0.0.0 -p 8001 config.asgi:application
+fi
+
+exec gunicorn config.asgi:application \
+  --worker-class uvicorn_worker.UvicornWorker \
+  --workers "${WEB_WORKERS:-$(nproc)}" \
+  --bind 0.0.0.0:8000 --bind 0.0.0.0:8001 \
+  --graceful-timeout 25 \
+  --keep-alive 75
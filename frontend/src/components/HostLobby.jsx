@@ -56,6 +56,7 @@ export default function HostLobby() {
 
   const totalPlayers = (gameState.teams || []).reduce((sum, t) => sum + (t.players?.length || 0), 0)
     + (gameState.unassigned_players?.length || 0);
+  const online = new Set(gameState.online_players || []);
 
   return (
     <div className="min-h-screen p-6 lg:p-10">
@@ -118,7 +119,13 @@ export default function HostLobby() {
                 <div className="space-y-2 min-h-[60px]">
                   {team.players?.map((player) => (
                     <div key={player.id} className="flex items-center justify-between px-3 py-2 bg-white/5 rounded-xl">
-                      <span className="text-white font-medium">{player.name}</span>
+                      <span className="flex items-center gap-2 text-white font-medium">
+                        <span
+                          className={`w-2 h-2 rounded-full ${online.has(player.id) ? 'bg-green-400' : 'bg-white/20'}`}
+                          title={online.has(player.id) ? 'Connected' : 'Not connected'}
+                        />
+                        {player.name}
+                      </span>
                       {player.is_host && (
                         <span className="text-xs px-2 py-0.5 bg-yellow-500/20 text-yellow-300 rounded-full">Host</span>
                       )}
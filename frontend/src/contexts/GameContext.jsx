@@ -1,6 +1,7 @@
 import React, { createContext, useContext, useState, useCallback, useEffect } from 'react';
 import useWebSocket from '../hooks/useWebSocket';
 import sounds from '../utils/sounds';
+import { setPlayerToken } from '../utils/constants';
 
 const GameContext = createContext(null);
 
@@ -23,6 +24,14 @@ export function GameProvider({ gameCode, children }) {
         setGameState(msg.data);
         break;
 
+      case 'joined':
+        setPlayerToken(gameCode, msg.player_token);
+        break;
+
+      case 'presence':
+        setGameState((prev) => prev ? { ...prev, online_players: msg.online } : prev);
+        break;
+
       case 'player_joined':
         sounds.join();
         setGameState((prev) => prev ? { ...prev } : prev);
@@ -70,7 +79,7 @@ export function GameProvider({ gameCode, children }) {
       default:
         break;
     }
-  }, []);
+  }, [gameCode]);
 
   const { connected, sendMessage } = useWebSocket(gameCode, handleMessage);
 
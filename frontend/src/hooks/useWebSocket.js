@@ -1,6 +1,20 @@
 import { useEffect, useRef, useState, useCallback } from 'react';
 import { getWsUrl } from '../utils/constants';
 
+// Must stay well under the server's PRESENCE_TIMEOUT (60s by default).
+const HEARTBEAT_INTERVAL = 20000;
+const RECONNECT_BASE_DELAY = 1000;
+const RECONNECT_MAX_DELAY = 30000;
+
+/**
+ * Exponential backoff with full jitter, so clients dropped together don't
+ * all come back at the same moment.
+ */
+function backoffDelay(attempt) {
+  const ceiling = Math.min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** attempt);
+  return Math.random() * ceiling;
+}
+
 /**
  * WebSocket hook for real-time game communication.
  * Handles connection, reconnection, and message routing.
@@ -9,6 +23,9 @@ export default function useWebSocket(gameCode, onMessage) {
   const [connected, setConnected] = useState(false);
   const wsRef = useRef(null);
   const reconnectTimer = useRef(null);
+  const heartbeatTimer = useRef(null);
+  const reconnectAttempts = useRef(0);
+  const serverReconnectDelay = useRef(null);
   const onMessageRef = useRef(onMessage);
 
   onMessageRef.current = onMessage;
@@ -22,15 +39,27 @@ export default function useWebSocket(gameCode, onMessage) {
 
     ws.onopen = () => {
       setConnected(true);
+      reconnectAttempts.current = 0;
       if (reconnectTimer.current) {
         clearTimeout(reconnectTimer.current);
         reconnectTimer.current = null;
       }
+      clearInterval(heartbeatTimer.current);
+      heartbeatTimer.current = setInterval(() => {
+        if (ws.readyState === WebSocket.OPEN) {
+          ws.send(JSON.stringify({ type: 'ping' }));
+        }
+      }, HEARTBEAT_INTERVAL);
     };
 
     ws.onmessage = (event) => {
       try {
         const data = JSON.parse(event.data);
+        if (data.type === 'reconnect') {
+          // Server is draining; it closes the socket next and picked our delay.
+          serverReconnectDelay.current = data.delay_ms;
+          return;
+        }
         if (onMessageRef.current) {
           onMessageRef.current(data);
         }
@@ -41,9 +70,20 @@ export default function useWebSocket(gameCode, onMessage) {
 
     ws.onclose = (event) => {
       setConnected(false);
+      clearInterval(heartbeatTimer.current);
+      heartbeatTimer.current = null;
+      if (wsRef.current !== ws) return; // closed on purpose by disconnect()
       wsRef.current = null;
-      if (!event.wasClean) {
-        reconnectTimer.current = setTimeout(() => connect(), 2000);
+      let delay = null;
+      if (serverReconnectDelay.current !== null) {
+        delay = serverReconnectDelay.current;
+        serverReconnectDelay.current = null;
+      } else if (!event.wasClean) {
+        delay = backoffDelay(reconnectAttempts.current);
+        reconnectAttempts.current += 1;
+      }
+      if (delay !== null) {
+        reconnectTimer.current = setTimeout(() => connect(), delay);
       }
     };
 
@@ -16,7 +16,9 @@ export default function ActorView() {
   useEffect(() => {
     async function fetchPrompt() {
       try {
-        const data = await api.getPrompt(roundId, token);
+        // The image fills the screen width up to max-w-sm (384px); ask for that many device pixels.
+        const width = Math.round(Math.min(window.innerWidth, 384) * (window.devicePixelRatio || 1));
+        const data = await api.getPrompt(roundId, token, width);
         setPrompt(data);
       } catch (err) {
         setError(err.message);
@@ -86,14 +88,21 @@ export default function ActorView() {
       {/* Prompt image */}
       <div className="flex-1 flex items-center justify-center p-4">
         {prompt.image_url ? (
-          <div className="w-full max-w-sm">
+          <picture className="block w-full max-w-sm">
+            {(prompt.image_sources || []).slice(0, -1).map((source) => (
+              <source key={source.type} type={source.type} srcSet={source.url} />
+            ))}
             <img
               src={prompt.image_url}
               alt="Act this out"
-              className="w-full rounded-2xl shadow-2xl object-cover"
+              width={prompt.image_width || undefined}
+              height={prompt.image_height || undefined}
+              className="w-full h-auto rounded-2xl shadow-2xl object-cover"
               loading="eager"
+              fetchpriority="high"
+              decoding="async"
             />
-          </div>
+          </picture>
         ) : (
           <div className="w-full max-w-sm aspect-square bg-white/5 rounded-2xl flex items-center justify-center border border-white/10">
             <Eye className="w-16 h-16 text-white/20" />
@@ -2,7 +2,7 @@ import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Gamepad2, Users, Zap, QrCode } from 'lucide-react';
 import api from '../utils/api';
-import { getOrCreateSessionKey } from '../utils/constants';
+import { getOrCreateSessionKey, setPlayerToken } from '../utils/constants';
 
 export default function Home() {
   const navigate = useNavigate();
@@ -21,6 +21,7 @@ export default function Home() {
       const sessionKey = getOrCreateSessionKey();
       const res = await api.createGame(hostName.trim(), sessionKey);
       localStorage.setItem('game001_player_id', res.player_id);
+      setPlayerToken(res.code, res.player_token);
       localStorage.setItem('game001_session', sessionKey);
       navigate(`/game/${res.code}`);
     } catch (err) {
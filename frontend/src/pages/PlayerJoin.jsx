@@ -2,7 +2,7 @@ import React, { useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { UserPlus, Gamepad2 } from 'lucide-react';
 import api from '../utils/api';
-import { getOrCreateSessionKey } from '../utils/constants';
+import { getOrCreateSessionKey, setPlayerToken } from '../utils/constants';
 
 export default function PlayerJoin() {
   const { code } = useParams();
@@ -20,6 +20,7 @@ export default function PlayerJoin() {
       const sessionKey = getOrCreateSessionKey();
       const res = await api.joinGame(code, name.trim(), sessionKey);
       localStorage.setItem('game001_player_id', res.player_id);
+      setPlayerToken(code, res.player_token);
       localStorage.setItem('game001_player_name', res.player_name);
       navigate(`/play/${code}`);
     } catch (err) {
@@ -1,14 +1,20 @@
 /**
  * API client for 001 Game backend.
  */
+import { getPlayerToken } from './constants';
+
 const API_BASE = import.meta.env.VITE_API_URL || '/api';
 
-async function request(method, path, data = null) {
+async function request(method, path, data = null, gameCode = null) {
   const url = `${API_BASE}${path}`;
   const options = {
     method,
     headers: { 'Content-Type': 'application/json' },
   };
+  const token = gameCode && getPlayerToken(gameCode);
+  if (token) {
+    options.headers.Authorization = `Player ${token}`;
+  }
   if (data) {
     options.body = JSON.stringify(data);
   }
@@ -20,24 +26,43 @@ async function request(method, path, data = null) {
   return res.json();
 }
 
+/**
+ * Active categories, from the static catalog bundle when one is published
+ * (cached by the browser for good, since each version has its own URL),
+ * else from the API.
+ */
+async function getCategories() {
+  try {
+    const { categories_url: url } = await request('GET', '/catalog/');
+    const res = await fetch(url);
+    if (res.ok) {
+      return (await res.json()).categories;
+    }
+  } catch (e) {
+    // Not published yet; fall back to the API.
+  }
+  return request('GET', '/categories/');
+}
+
 const api = {
   // Games
   createGame: (hostName, sessionKey) => request('POST', '/games/', { host_name: hostName, session_key: sessionKey }),
-  getGame: (code) => request('GET', `/games/${code}/`),
+  getGame: (code) => request('GET', `/games/${code}/`, null, code),
   joinGame: (code, playerName, sessionKey) =>
     request('POST', `/games/${code}/join/`, { player_name: playerName, session_key: sessionKey }),
-  updateSettings: (code, settings) => request('PATCH', `/games/${code}/settings/`, settings),
-  startGame: (code) => request('POST', `/games/${code}/start/`),
+  updateSettings: (code, settings) => request('PATCH', `/games/${code}/settings/`, settings, code),
+  startGame: (code) => request('POST', `/games/${code}/start/`, null, code),
   assignPlayer: (code, playerId, teamId) =>
-    request('POST', `/games/${code}/assign-player/`, { player_id: playerId, team_id: teamId }),
-  updateTeam: (code, teamId, data) => request('PATCH', `/games/${code}/teams/${teamId}/`, data),
-  getScoreboard: (code) => request('GET', `/games/${code}/scoreboard/`),
+    request('POST', `/games/${code}/assign-player/`, { player_id: playerId, team_id: teamId }, code),
+  updateTeam: (code, teamId, data) => request('PATCH', `/games/${code}/teams/${teamId}/`, data, code),
+  getScoreboard: (code) => request('GET', `/games/${code}/scoreboard/`, null, code),
 
   // Categories
-  getCategories: () => request('GET', '/categories/'),
+  getCategories,
 
   // Rounds
-  getPrompt: (roundId, token) => request('GET', `/rounds/${roundId}/prompt/?token=${token}`),
+  getPrompt: (roundId, token, width) =>
+    request('GET', `/rounds/${roundId}/prompt/?token=${token}&width=${width}`),
   selectActor: (roundId, playerId) =>
     request('POST', `/rounds/${roundId}/select-actor/`, { player_id: playerId }),
   selectCategory: (roundId, categoryId) =>
@@ -66,13 +66,28 @@ export function getOrCreateSessionKey() {
   return key;
 }
 
+/**
+ * Signed player token issued when this browser created or joined a game.
+ */
+export function getPlayerToken(gameCode) {
+  return localStorage.getItem(`game001_token_${gameCode.toUpperCase()}`);
+}
+
+export function setPlayerToken(gameCode, token) {
+  if (token) {
+    localStorage.setItem(`game001_token_${gameCode.toUpperCase()}`, token);
+  }
+}
+
 /**
  * Get the WebSocket URL for a game.
  */
 export function getWsUrl(gameCode) {
   const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
   const host = import.meta.env.VITE_WS_HOST || window.location.host;
-  return `${protocol}//${host}/ws/game/${gameCode}/`;
+  const token = getPlayerToken(gameCode);
+  const query = token ? `?token=${encodeURIComponent(token)}` : '';
+  return `${protocol}//${host}/ws/game/${gameCode}/${query}`;
 }
 
 /**